@@ -0,0 +1,72 @@
+u"""
+Benchmark receiving big bulk string replies through pyredis.protocol.Reader.
+
+A single GET reply of 1KB, 1MB and 64MB is sent over a local socket pair,
+and received with two strategies:
+
+  - feed: sock.recv(1500) per call, passing the data to Reader.feed()
+  - recv_into: Reader.recv_into(sock, 1500), which receives straight into
+    the read buffer, already reserved for the announced bulk size, and
+    asks for all the bytes still missing instead of 1500 bytes at a time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import socket
+import threading
+import time
+
+from pyredis.protocol import Reader
+
+MTU = 1500
+SIZES = (
+    (u'1KB', 1024),
+    (u'1MB', 1024 * 1024),
+    (u'64MB', 64 * 1024 * 1024),
+)
+
+
+def recv_feed(reader, sock):
+    data = sock.recv(MTU)
+    reader.feed(data)
+    return len(data)
+
+
+def recv_into(reader, sock):
+    return reader.recv_into(sock, MTU)
+
+
+def run(data, receive):
+    reader = Reader()
+    server, client = socket.socketpair()
+    sender = threading.Thread(target=server.sendall, args=(data,))
+    start = time.time()
+    sender.start()
+    calls = 0
+    result = reader.gets()
+    while result is False:
+        receive(reader, client)
+        calls += 1
+        result = reader.gets()
+    elapsed = time.time() - start
+    sender.join()
+    server.close()
+    client.close()
+    return elapsed, calls
+
+
+def main():
+    for name, size in SIZES:
+        data = '${0}\r\n'.format(size) + 'x' * size + '\r\n'
+        for mode, receive in ((u'feed', recv_feed), (u'recv_into', recv_into)):
+            elapsed, calls = run(data, receive)
+            print(u'{0:>5} {1:<10} {2:9.4f}s {3:10.1f}MB/s {4:>8} recv calls'.format(
+                name, mode, elapsed, size / elapsed / 1024 / 1024, calls
+            ))
+
+
+if __name__ == u'__main__':
+    main()
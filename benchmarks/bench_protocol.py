@@ -0,0 +1,203 @@
+u"""
+Protocol throughput suite for pyredis.protocol.
+
+Replays the RESP corpora from benchmarks.corpora through Reader.feed()/gets()
+of every available reader, the pure Python one and hiredis, feeding the stream in
+chunks of several sizes, the way data arrives from the socket.
+Encoding is measured with writer() for a set of typical command shapes.
+
+For every run ops/s, MB/s and allocations are reported. Allocations are the
+peak memory traced by tracemalloc during one pass, measured in a separate
+untimed pass, they are only reported where tracemalloc is available.
+
+Results can be saved with --json, and compared against a saved run with
+--baseline, which exits with status 1 if any run got slower than --threshold.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_protocol
+    python -m benchmarks.bench_protocol --chunk-sizes 1500 --json results.json
+    python -m benchmarks.bench_protocol --baseline results.json
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+import argparse
+import json
+import sys
+import time
+
+from benchmarks import corpora
+from pyredis.protocol import Reader as PythonReader
+from pyredis.protocol import writer
+
+try:
+    from hiredis import Reader as HiredisReader
+except ImportError:
+    HiredisReader = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+CHUNK_SIZES = (64, 1500, 16384, 0)
+MIN_TIME = 0.5
+
+COMMANDS = (
+    (u'get', (u'GET', u'user:1000:name')),
+    (u'set_small', (u'SET', u'user:1000:name', u'x' * 64)),
+    (u'set_big', (u'SET', u'blob', u'x' * 1024 * 1024)),
+    (u'mset_100', tuple([u'MSET'] + [u'key:{0}'.format(i) for i in range(100)] * 2)),
+    (u'zadd', (u'ZADD', u'leaderboard', 1234.5, u'user:1000')),
+)
+
+
+def replay(reader_class, chunks):
+    reader = reader_class()
+    replies = 0
+    for chunk in chunks:
+        reader.feed(chunk)
+        while reader.gets() is not False:
+            replies += 1
+    return replies
+
+
+def split(payload, chunk_size):
+    if not chunk_size:
+        return [payload]
+    return [payload[pos:pos + chunk_size] for pos in range(0, len(payload), chunk_size)]
+
+
+def measure(func, *args):
+    u""" Run func until MIN_TIME has passed, return the seconds per call. """
+    calls = 0
+    start = time.time()
+    while True:
+        func(*args)
+        calls += 1
+        elapsed = time.time() - start
+        if elapsed >= MIN_TIME:
+            return elapsed / calls
+
+
+def allocations(func, *args):
+    if not tracemalloc:
+        return None
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def encode_many(args, number):
+    for _ in range(number):
+        writer(*args)
+
+
+def bench_readers(corpus_list, readers, chunk_sizes):
+    results = []
+    for name, payload, replies in corpus_list:
+        for chunk_size in chunk_sizes:
+            chunks = split(payload, chunk_size)
+            for reader_name, reader_class in readers:
+                elapsed = measure(replay, reader_class, chunks)
+                results.append({
+                    u'name': u'{0}/{1}/{2}'.format(name, reader_name, chunk_size or u'all'),
+                    u'ops': replies / elapsed,
+                    u'mbs': len(payload) / elapsed / 1024 / 1024,
+                    u'alloc': allocations(replay, reader_class, chunks),
+                })
+    return results
+
+
+def bench_writer(number=1000):
+    results = []
+    for name, args in COMMANDS:
+        size = len(writer(*args))
+        elapsed = measure(encode_many, args, number) / number
+        results.append({
+            u'name': u'writer/{0}'.format(name),
+            u'ops': 1 / elapsed,
+            u'mbs': size / elapsed / 1024 / 1024,
+            u'alloc': allocations(encode_many, args, number),
+        })
+    return results
+
+
+def report(results, baseline=None):
+    print(u'{0:<40} {1:>12} {2:>10} {3:>12} {4:>8}'.format(u'run', u'ops/s', u'MB/s', u'alloc KiB', u'change'))
+    for result in results:
+        alloc = u'n/a' if result[u'alloc'] is None else u'{0:.0f}'.format(result[u'alloc'] / 1024)
+        change = u''
+        if baseline and result[u'name'] in baseline:
+            change = u'{0:+.1f}%'.format((result[u'ops'] / baseline[result[u'name']] - 1) * 100)
+        print(u'{0:<40} {1:12.0f} {2:10.1f} {3:>12} {4:>8}'.format(
+            result[u'name'], result[u'ops'], result[u'mbs'], alloc, change
+        ))
+
+
+def regressions(results, baseline, threshold):
+    slower = []
+    for result in results:
+        if result[u'name'] in baseline and result[u'ops'] < baseline[result[u'name']] * (1 - threshold):
+            slower.append(result[u'name'])
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=u'pyredis protocol throughput suite')
+    parser.add_argument(
+        u'--chunk-sizes', type=int, nargs=u'+', default=CHUNK_SIZES,
+        help=u'sizes of the chunks fed to the readers, 0 feeds a corpus at once'
+    )
+    parser.add_argument(u'--corpus-dir', help=u'directory with recorded .resp corpora')
+    parser.add_argument(u'--corpus', nargs=u'+', help=u'only run these corpora')
+    parser.add_argument(u'--reader', choices=(u'python', u'hiredis'), help=u'only run this reader')
+    parser.add_argument(u'--no-writer', action=u'store_true', help=u'skip the writer benchmarks')
+    parser.add_argument(u'--json', help=u'save results to this file')
+    parser.add_argument(u'--baseline', help=u'compare against results saved with --json')
+    parser.add_argument(
+        u'--threshold', type=float, default=0.1,
+        help=u'fraction of ops/s a run may lose against the baseline, default 0.1'
+    )
+    args = parser.parse_args()
+
+    readers = [(u'python', PythonReader)]
+    if HiredisReader:
+        readers.append((u'hiredis', HiredisReader))
+    else:
+        print(u'hiredis is not installed, only benchmarking the python reader')
+    if args.reader:
+        readers = [reader for reader in readers if reader[0] == args.reader]
+    if not tracemalloc:
+        print(u'tracemalloc is not available, allocations are not reported')
+
+    corpus_list = corpora.load(args.corpus_dir)
+    if args.corpus:
+        corpus_list = [corpus for corpus in corpus_list if corpus[0] in args.corpus]
+
+    results = bench_readers(corpus_list, readers, args.chunk_sizes)
+    if not args.no_writer:
+        results.extend(bench_writer())
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = dict((result[u'name'], result[u'ops']) for result in json.load(fd))
+    report(results, baseline)
+
+    if args.json:
+        with open(args.json, u'w') as fd:
+            json.dump(results, fd, indent=2)
+    if baseline:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(u'slower than baseline: {0}'.format(u', '.join(slower)))
+            sys.exit(1)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,44 @@
+u"""
+Benchmark feeding a buffer with many small replies into pyredis.protocol.Reader.
+
+Every reply is fed in one go and parsed afterwards, which is what bulk mode
+does, when a single recv returns thousands of replies.
+The time spend per reply has to stay flat, while the number of buffered
+replies grows, otherwise parsing is not linear in the number of buffered bytes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_reader
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import time
+
+from pyredis.protocol import Reader
+
+REPLY = '$5\r\nhello\r\n'
+
+
+def run(replies):
+    reader = Reader()
+    reader.feed(REPLY * replies)
+    start = time.time()
+    while reader.gets() is not False:
+        pass
+    return time.time() - start
+
+
+def main():
+    baseline = None
+    for replies in (5000, 10000, 25000, 50000):
+        elapsed = run(replies)
+        per_reply = elapsed / replies * 1000000
+        if baseline is None:
+            baseline = per_reply
+        print(u'{0:>6} replies: {1:8.4f}s {2:8.3f}us/reply ({3:.2f}x)'.format(
+            replies, elapsed, per_reply, per_reply / baseline
+        ))
+
+
+if __name__ == u'__main__':
+    main()
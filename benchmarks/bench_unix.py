@@ -0,0 +1,142 @@
+u"""
+Benchmark command latency over TCP loopback against a unix socket, through the full Client stack.
+
+The same commands are executed one at a time by pyredis.Client, once connected
+to 127.0.0.1 and once to the unix socket of the same Redis server, so the difference
+is the cost of the transport, the TCP/IP stack on loopback versus the unix socket.
+
+For every transport and command ops/s, and the 50th, 99th and 99.9th percentile
+latency in microseconds are reported.
+
+A Redis server listening on both is required, pass its port and unix socket,
+or use --spawn to start a throwaway redis-server from PATH.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_unix --spawn
+    python -m benchmarks.bench_unix --port 6379 --unix-sock /var/run/redis/redis.sock
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+from pyredis import Client
+from pyredis.exceptions import PyRedisConnError
+
+timer = getattr(time, u'perf_counter', time.time)
+
+NUM = 20000
+WARMUP = 1000
+
+COMMANDS = (
+    (u'ping', (u'PING',)),
+    (u'get', (u'GET', u'bench:unix:key')),
+    (u'set_1k', (u'SET', u'bench:unix:blob', u'x' * 1024)),
+    (u'get_64k', (u'GET', u'bench:unix:big')),
+)
+
+
+def percentile(latencies, pct):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+
+def measure(client, args, num):
+    for _ in range(WARMUP):
+        client.execute(*args)
+    latencies = []
+    start = timer()
+    for _ in range(num):
+        begin = timer()
+        client.execute(*args)
+        latencies.append(timer() - begin)
+    elapsed = timer() - start
+    latencies.sort()
+    return elapsed, latencies
+
+
+def spawn(port, unix_sock):
+    with open(os.devnull, u'w') as devnull:
+        proc = subprocess.Popen([
+            u'redis-server',
+            u'--port', str(port),
+            u'--bind', u'127.0.0.1',
+            u'--unixsocket', unix_sock,
+            u'--save', u'',
+            u'--appendonly', u'no',
+        ], stdout=devnull)
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        client = Client(unix_sock=unix_sock)
+        try:
+            client.ping()
+            return proc
+        except PyRedisConnError:
+            time.sleep(0.05)
+        finally:
+            client.close()
+    proc.terminate()
+    raise RuntimeError(u'redis-server did not start')
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind((u'127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def run(port, unix_sock, num):
+    transports = (
+        (u'tcp', dict(host=u'127.0.0.1', port=port)),
+        (u'unix', dict(unix_sock=unix_sock)),
+    )
+    setup = Client(unix_sock=unix_sock)
+    setup.set(u'bench:unix:key', u'x' * 16)
+    setup.set(u'bench:unix:big', u'x' * 65536)
+    setup.close()
+    for name, args in COMMANDS:
+        for transport, kwargs in transports:
+            client = Client(**kwargs)
+            elapsed, latencies = measure(client, args, num)
+            client.close()
+            print(u'{0:<8} {1:<5} {2:10.0f} ops/s  p50 {3:7.1f}us  p99 {4:7.1f}us  p999 {5:7.1f}us'.format(
+                name, transport, num / elapsed,
+                percentile(latencies, 50) * 1e6,
+                percentile(latencies, 99) * 1e6,
+                percentile(latencies, 99.9) * 1e6
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=u'Compare TCP loopback and unix socket latency.')
+    parser.add_argument(u'--port', type=int, default=6379, help=u'TCP port of the Redis server')
+    parser.add_argument(u'--unix-sock', help=u'unix socket of the same Redis server')
+    parser.add_argument(u'--spawn', action=u'store_true', help=u'start a throwaway redis-server from PATH')
+    parser.add_argument(u'--num', type=int, default=NUM, help=u'commands per run')
+    args = parser.parse_args()
+    if not args.spawn:
+        if not args.unix_sock:
+            parser.error(u'--unix-sock is required, unless --spawn is used')
+        run(args.port, args.unix_sock, args.num)
+        return
+    tmpdir = tempfile.mkdtemp()
+    port = free_port()
+    proc = spawn(port, os.path.join(tmpdir, u'redis.sock'))
+    try:
+        run(port, os.path.join(tmpdir, u'redis.sock'), args.num)
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == u'__main__':
+    main()
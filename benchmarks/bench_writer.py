@@ -0,0 +1,70 @@
+u"""
+Microbenchmark for command encoding in pyredis.protocol.
+
+Compares the previous, uncached writer implementation with the current
+writer, and with pack_commands encoding a whole pipeline into one bytearray,
+for typical SET, GET, HSET and ZADD command shapes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_writer
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import timeit
+
+from pyredis.protocol import pack_commands, to_bytes, writer
+
+NUMBER = 100000
+PIPELINE = 1000
+
+SHAPES = (
+    (u'GET', (u'GET', u'user:1000:name')),
+    (u'SET', (u'SET', u'user:1000:name', u'x' * 64)),
+    (u'HSET', (u'HSET', u'user:1000', u'visits', 42)),
+    (u'ZADD', (u'ZADD', u'leaderboard', 1234.5, u'user:1000')),
+)
+
+
+def legacy_writer(*args):
+    buf = list()
+
+    buf.append('*')
+    buf.append(to_bytes(len(args)))
+    buf.append('\r\n')
+
+    for member in args:
+        member = to_bytes(member)
+
+        buf.append('$')
+        buf.append(to_bytes(len(member)))
+        buf.append('\r\n')
+
+        buf.append(member)
+        buf.append('\r\n')
+
+    return ''.join(buf)
+
+
+def main():
+    for name, args in SHAPES:
+        assert legacy_writer(*args) == writer(*args)
+        legacy = timeit.timeit(lambda: legacy_writer(*args), number=NUMBER)
+        current = timeit.timeit(lambda: writer(*args), number=NUMBER)
+        commands = [args] * PIPELINE
+        joined = timeit.timeit(
+            lambda: ''.join([legacy_writer(*cmd) for cmd in commands]), number=NUMBER // PIPELINE
+        )
+        packed = timeit.timeit(lambda: pack_commands(commands), number=NUMBER // PIPELINE)
+        print(u'{0:<5} legacy {1:7.3f}us  writer {2:7.3f}us  '
+              u'legacy pipeline {3:7.3f}us  pack_commands {4:7.3f}us  (per command)'.format(
+                  name,
+                  legacy / NUMBER * 1000000,
+                  current / NUMBER * 1000000,
+                  joined / NUMBER * 1000000,
+                  packed / NUMBER * 1000000
+              ))
+
+
+if __name__ == u'__main__':
+    main()
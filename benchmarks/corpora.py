@@ -0,0 +1,176 @@
+u"""
+RESP byte streams replayed by the protocol benchmarks.
+
+Only synthetic corpora ship with the suite, no recorded captures. They are generated
+deterministically, shaped after typical replies (GET, SCAN pages, HGETALL, pipelines),
+so results are comparable between runs and machines. Streams recorded from a real server
+can be added with --corpus-dir, every file ending in .resp in a directory is loaded as one corpus.
+
+To record the replies of a list of commands from a running Redis server:
+
+    python -m benchmarks.corpora HOST PORT OUTFILE 'SCAN 0 COUNT 1000' 'HGETALL myhash'
+
+The raw reply bytes are written to OUTFILE, exactly as they were received.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+import socket
+import sys
+
+from pyredis.protocol import Reader, pack_commands
+
+
+def _bulk(value):
+    return '${0}\r\n{1}\r\n'.format(len(value), value)
+
+
+def _array(items):
+    return '*{0}\r\n{1}'.format(len(items), ''.join(items))
+
+
+def _tree(depth, width):
+    if not depth:
+        return ':{0}\r\n'.format(width)
+    return _array([_tree(depth - 1, width)] * width)
+
+
+def ok_many():
+    return '+OK\r\n' * 100000
+
+
+def get_small():
+    return _bulk('v' * 100) * 50000
+
+
+def get_big():
+    return _bulk('x' * 1024 * 1024) * 32
+
+
+def array_deep():
+    # 7 levels is the maximum nesting depth older hiredis versions support.
+    return _tree(7, 3) * 50
+
+
+def scan_pages():
+    pages = []
+    for page in range(100):
+        keys = [_bulk('user:{0}:session'.format(page * 1000 + i)) for i in range(1000)]
+        pages.append(_array([_bulk(str(page + 1)), _array(keys)]))
+    return ''.join(pages)
+
+
+def hgetall():
+    fields = []
+    for i in range(1000):
+        fields.append(_bulk('field:{0}'.format(i)))
+        fields.append(_bulk('value:{0}'.format(i * 7)))
+    return _array(fields) * 50
+
+
+def mixed_pipeline():
+    return ('+OK\r\n:42\r\n' + _bulk('bar' * 10) + _array([_bulk('a'), _bulk('b')]) + '$-1\r\n') * 20000
+
+
+CORPORA = (
+    (u'ok_many', ok_many),
+    (u'get_small', get_small),
+    (u'get_big', get_big),
+    (u'array_deep', array_deep),
+    (u'scan_pages', scan_pages),
+    (u'hgetall', hgetall),
+    (u'mixed_pipeline', mixed_pipeline),
+)
+
+
+def count_replies(payload):
+    u""" Return the number of replies in payload.
+
+    :param payload:
+        RESP byte stream.
+    :type payload: str
+
+    :return: int
+    """
+    reader = Reader()
+    reader.feed(payload)
+    return len(reader.gets_many())
+
+
+def load(directory=None):
+    u""" Return a list of (name, payload, replies) tuples.
+
+    :param directory:
+        Directory with recorded corpora, every file ending in .resp is loaded.
+        If None, only the built in corpora are returned.
+    :type directory: str
+
+    :return: list
+    """
+    corpora = []
+    for name, build in CORPORA:
+        payload = build()
+        corpora.append((name, payload, count_replies(payload)))
+    if directory:
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(u'.resp'):
+                continue
+            with open(os.path.join(directory, filename), u'rb') as fd:
+                payload = fd.read()
+            corpora.append((filename[:-len(u'.resp')], payload, count_replies(payload)))
+    return corpora
+
+
+def record(host, port, commands, path):
+    u""" Send commands to a Redis server, and write the raw replies to path.
+
+    :param host:
+        Redis host.
+    :type host: str
+
+    :param port:
+        Redis port.
+    :type port: int
+
+    :param commands:
+        List of commands, each a list of arguments.
+    :type commands: list
+
+    :param path:
+        File to write the replies to.
+    :type path: str
+
+    :return: int, number of bytes recorded
+    """
+    sock = socket.create_connection((host, port))
+    reader = Reader()
+    recorded = []
+    try:
+        sock.sendall(pack_commands(commands))
+        replies = 0
+        while replies < len(commands):
+            data = sock.recv(65536)
+            if not data:
+                raise IOError(u'Connection closed while recording')
+            recorded.append(data)
+            reader.feed(data)
+            replies += len(reader.gets_many())
+    finally:
+        sock.close()
+    payload = ''.join(recorded)
+    with open(path, u'wb') as fd:
+        fd.write(payload)
+    return len(payload)
+
+
+def main():
+    if len(sys.argv) < 5:
+        print(__doc__)
+        sys.exit(1)
+    host, port, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    commands = [command.split() for command in sys.argv[4:]]
+    print(u'recorded {0} bytes to {1}'.format(record(host, port, commands, path), path))
+
+
+if __name__ == u'__main__':
+    main()
@@ -11,6 +11,7 @@ License: MIT (see LICENSE for details)
 from __future__ import absolute_import
 from pyredis.exceptions import *
 from pyredis.client import Client, ClusterClient, HashClient, PubSubClient, SentinelClient
+from pyredis.multiplex import MultiplexClient
 from pyredis.pool import ClusterPool, HashPool, Pool, SentinelHashPool, SentinelPool
 
 __all__ = [
@@ -19,6 +20,7 @@ __all__ = [
     u'ClusterClient',
     u'ClusterPool',
     u'HashClient',
+    u'MultiplexClient',
     u'PubSubClient',
     u'SentinelClient',
     u'HashPool',
@@ -26,6 +28,7 @@ __all__ = [
     u'SentinelPool',
     u'SentinelHashPool',
     u'PyRedisConnError',
+    u'PyRedisCircuitOpen',
     u'PyRedisConnReadTimeout',
     u'PyRedisConnClosed',
     u'PyRedisError',
@@ -63,6 +66,8 @@ def get_by_url(url):
             except IndexError:
                 port = 6379
             return Pool(host=host, port=port, **kwargs)
+        elif scheme == u"unix":
+            return Pool(unix_sock=connect, **kwargs)
         elif scheme == u"sentinel":
             return SentinelPool(sentinels=conns, **kwargs)
         elif scheme == u"pubsub":
@@ -79,11 +84,14 @@ def get_by_url(url):
 
 
 def _opts_type_helper(opt, value):
-    if opt in [u'database', u'pool_size', u'retries']:
+    if opt in [
+            u'database', u'pool_size', u'retries', u'recv_buffer_size', u'protocol',
+            u'keepalive_idle', u'keepalive_interval', u'keepalive_count',
+            u'so_sndbuf', u'so_rcvbuf', u'tcp_user_timeout', u'peer_uid']:
         return int(value)
     elif opt in [u'conn_timeout', u'read_timeout']:
         return float(value)
-    elif opt in [u'slave_ok']:
+    elif opt in [u'slave_ok', u'recv_buffer_adaptive', u'lazy_decode', u'tcp_nodelay', u'keepalive']:
         if value in [u'true', u'True', 1]:
             return True
         else:
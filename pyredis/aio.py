@@ -0,0 +1,559 @@
+from __future__ import absolute_import
+from collections import deque
+import socket
+
+from pyredis import commands
+from pyredis.connection import HiredisReader, PARSERS, PROTOCOLS, Reader
+from pyredis.exceptions import *
+from pyredis.protocol import PushReply, pack_commands, writer
+from pyredis.protocol import Reader as PythonReader
+
+try:
+    import trollius as asyncio
+    from trollius import From, Return
+    coroutine = asyncio.coroutine
+except ImportError:
+    asyncio = None
+    coroutine = lambda func: func
+
+__all__ = [
+    u'AsyncClient',
+    u'AsyncConnection'
+]
+
+
+class RedisProtocol(asyncio.Protocol if asyncio else object):
+    u""" asyncio Protocol matching replies to the commands waiting for them.
+
+    Every command send registers a future in a FIFO queue, every complete reply
+    resolves the oldest future. Replies for cancelled futures, like commands that
+    timed out, are parsed and dropped, so the queue stays in sync with the stream.
+
+    :param reader:
+        Reader instance, pyredis.protocol.Reader or hiredis.Reader.
+    :type reader: object
+
+    :param encoding:
+        Encoding the reader uses, for commands that want their reply decoded.
+    :type encoding: str
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames.
+    :type push_handler: callable
+
+    :param loop:
+        Event loop.
+    :type loop: asyncio.AbstractEventLoop
+    """
+    def __init__(self, reader, encoding=None, push_handler=None, loop=None):
+        self._reader = reader
+        self._encoding = encoding
+        self._reader_encoding = encoding
+        self._push_handler = push_handler
+        self._loop = loop
+        self._waiters = deque()
+        self._writes = []
+        self._flush_scheduled = False
+        self._transport = None
+        self._paused = None
+        self._error = None
+
+    def _set_encoding(self, decode):
+        encoding = self._encoding if decode else None
+        if encoding != self._reader_encoding and hasattr(self._reader, u'set_encoding'):
+            self._reader.set_encoding(encoding)
+            self._reader_encoding = encoding
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self._transport is None:
+            return
+        data, self._writes = bytearray().join(self._writes), []
+        self._transport.write(data)
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def connection_lost(self, exc):
+        self._transport = None
+        self._fail(self._error or PyRedisConnClosed(u'Connection went away while reading'))
+        if self._paused and not self._paused.done():
+            self._paused.set_result(None)
+
+    def data_received(self, data):
+        self._reader.feed(data)
+        while True:
+            if self._waiters:
+                self._set_encoding(self._waiters[0][1])
+            try:
+                result = self._reader.gets()
+            except ProtocolError, err:
+                self._error = PyRedisConnError(u'Protocol error: {0}'.format(err))
+                self.close()
+                return
+            if result is False:
+                return
+            if isinstance(result, PushReply):
+                if self._push_handler:
+                    self._push_handler(result)
+                continue
+            if not self._waiters:
+                continue
+            waiter, _ = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def pause_writing(self):
+        self._paused = asyncio.Future(loop=self._loop)
+
+    def resume_writing(self):
+        if self._paused and not self._paused.done():
+            self._paused.set_result(None)
+        self._paused = None
+
+    def _fail(self, error):
+        while self._waiters:
+            waiter, _ = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    @property
+    def closed(self):
+        return self._transport is None
+
+    def close(self):
+        u""" Close the transport, pending commands fail with PyRedisConnClosed.
+
+        :return: None
+        """
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        self._fail(self._error or PyRedisConnClosed(u'Connection closed'))
+
+    @coroutine
+    def drain(self):
+        u""" Wait until the transport accepts more data.
+
+        :return: None
+        """
+        if self._paused is not None:
+            yield From(self._paused)
+
+    def send(self, data, replies, decode=True, flush=True):
+        u""" Queue data for writing, and return one future per expected reply.
+
+        Data queued during one iteration of the event loop is written at once.
+
+        :param data:
+            Encoded commands.
+        :type data: str
+
+        :param replies:
+            Number of replies data will produce.
+        :type replies: int
+
+        :param decode:
+            If False, the replies are not decoded.
+        :type decode: bool
+
+        :param flush:
+            If False, data is only written together with the next data send.
+        :type flush: bool
+
+        :return: list of futures
+        """
+        if self._transport is None:
+            raise self._error or PyRedisConnClosed(u'Connection closed')
+        self._writes.append(data)
+        if flush and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+        futures = []
+        for _ in xrange(replies):
+            future = asyncio.Future(loop=self._loop)
+            self._waiters.append((future, decode))
+            futures.append(future)
+        return futures
+
+
+class AsyncConnection(object):
+    u""" Low level asyncio client for talking to a Redis Server.
+
+    Commands are written as soon as they are executed, without waiting for the
+    replies of earlier commands, so many commands can be in flight on one connection.
+    Replies are matched to commands in the order they arrive.
+    If the connection is lost, pending commands fail, and the next command reconnects.
+
+    Requires the trollius package, the asyncio backport for Python 2.
+
+    :param host:
+        Host IP or Name to connect,
+        can only be set when unix_sock is None.
+    :type host: str
+
+    :param port:
+        Port to connect, only used when host is also set.
+    :type port: int
+
+    :param unix_sock:
+        Unix Socket to connect,
+        can only be set when host is None.
+    :type unix_sock: str
+
+    :param database:
+        Select which db should be used for this connection
+    :type database: int
+
+    :param password:
+        Password used for authentication. If None, no authentication is done
+    :type password: str
+
+    :param encoding:
+        Convert result strings with this encoding. If None, no encoding is done.
+    :type encoding: str
+
+    :param conn_timeout:
+        Connect Timeout.
+    :type conn_timeout: float
+
+    :param read_timeout:
+        Seconds a command may wait for its reply. If None, wait forever.
+    :type read_timeout: float
+
+    :param parser:
+        Reply parser to use, one of 'auto', 'hiredis' or 'python'.
+    :type parser: str
+
+    :param lazy_decode:
+        If True, return strings as pyredis.protocol.LazyString, which only get decoded on access.
+    :type lazy_decode: bool
+
+    :param protocol:
+        RESP protocol version, 2 or 3.
+    :type protocol: int
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames. If None, push frames are dropped.
+    :type push_handler: callable
+
+    :param tcp_nodelay:
+        Disable Nagle's algorithm.
+    :type tcp_nodelay: bool
+
+    :param client_name:
+        Name set with CLIENT SETNAME after connecting.
+    :type client_name: str
+
+    :param loop:
+        Event loop to use. If None, the default event loop is used.
+    :type loop: asyncio.AbstractEventLoop
+    """
+    def __init__(
+            self,
+            host=None,
+            port=6379,
+            unix_sock=None,
+            database=0,
+            password=None,
+            encoding=None,
+            conn_timeout=2,
+            read_timeout=2,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            tcp_nodelay=True,
+            client_name=None,
+            loop=None):
+
+        if not asyncio:
+            raise PyRedisError(u'AsyncConnection requires trollius, which is not installed')
+        if not bool(host) != bool(unix_sock):
+            raise PyRedisError(u'Ether host or unix_sock has to be provided')
+        if parser not in PARSERS:
+            raise PyRedisError(u'Unknown parser {0}, has to be one of {1}'.format(parser, PARSERS))
+        if parser == u'hiredis' and not HiredisReader:
+            raise PyRedisError(u'Parser hiredis requested, but hiredis is not installed')
+        if parser == u'hiredis' and (lazy_decode or protocol == 3):
+            raise PyRedisError(u'lazy_decode and RESP3 are not supported by the hiredis parser')
+        if protocol not in PROTOCOLS:
+            raise PyRedisError(u'Unknown protocol {0}, has to be one of {1}'.format(protocol, PROTOCOLS))
+        self._closed = False
+        self._conn_timeout = conn_timeout
+        self._read_timeout = read_timeout
+        self._encoding = encoding
+        self._lazy_decode = lazy_decode
+        self._parser = parser
+        self._protocol = protocol
+        self._push_handler = push_handler
+        self._tcp_nodelay = tcp_nodelay
+        self._client_name = client_name
+        self._loop = loop or asyncio.get_event_loop()
+        self._connecting = None
+        self._handshake = None
+        self._redis = None
+        self.host = host
+        self.port = port
+        self.unix_sock = unix_sock
+        self.password = password
+        self.database = database
+
+    def _get_reader(self):
+        if self._parser == u'hiredis':
+            reader = HiredisReader
+        elif self._parser == u'python' or self._lazy_decode or self._protocol == 3:
+            reader = PythonReader
+        else:
+            reader = Reader
+        if self._encoding and self._lazy_decode:
+            return reader(encoding=self._encoding, lazy_decode=True)
+        elif self._encoding:
+            return reader(encoding=self._encoding)
+        return reader()
+
+    def _handshake_commands(self):
+        commands = []
+        if self.password:
+            commands.append((u'AUTH', self.password))
+        if self._protocol != 2:
+            commands.append((u'HELLO', self._protocol))
+        if self.database:
+            commands.append((u'SELECT', self.database))
+        if self._client_name:
+            commands.append((u'CLIENT', u'SETNAME', self._client_name))
+        return commands
+
+    @coroutine
+    def _check_handshake(self):
+        handshake, self._handshake = self._handshake, None
+        for future in handshake:
+            result = yield From(future)
+            if isinstance(result, Exception):
+                self.close()
+                raise result
+
+    @coroutine
+    def _connect(self):
+        redis = RedisProtocol(self._get_reader(), self._encoding, self._push_handler, self._loop)
+        try:
+            if self.host:
+                connect = self._loop.create_connection(lambda: redis, self.host, self.port)
+            else:
+                connect = self._loop.create_unix_connection(lambda: redis, self.unix_sock)
+            transport, _ = yield From(asyncio.wait_for(connect, self._conn_timeout, loop=self._loop))
+        except asyncio.TimeoutError:
+            raise PyRedisConnError(u'Could not Connect to {0}: timed out'.format(self.host or self.unix_sock))
+        except (socket.error, OSError), err:
+            raise PyRedisConnError(u'Could not Connect to {0}: {1}'.format(self.host or self.unix_sock, err))
+        sock = transport.get_extra_info(u'socket')
+        if self.host and self._tcp_nodelay and sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._redis = redis
+        handshake = self._handshake_commands()
+        if handshake:
+            # send in front of the first command, unless SELECT has to succeed first
+            self._handshake = redis.send(pack_commands(handshake), len(handshake), flush=bool(self.database))
+            if self.database:
+                yield From(self._check_handshake())
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def protocol(self):
+        u""" Return the RESP protocol version used by this connection.
+
+        :return: int
+        """
+        return self._protocol
+
+    def close(self):
+        u""" Close Connection.
+
+        Commands still waiting for their replies fail with PyRedisConnClosed.
+
+        :return: None
+        """
+        if self._redis:
+            self._redis.close()
+        self._redis = None
+        self._handshake = None
+        self._closed = True
+
+    @coroutine
+    def connect(self):
+        u""" Connect to the server, and send the handshake.
+
+        Called by execute, if the connection is not connected yet.
+        Concurrent callers share a single connection attempt.
+
+        :return: None
+        """
+        if self._closed:
+            raise PyRedisConnError(u'Connection Gone')
+        if self._redis and not self._redis.closed:
+            return
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect(), loop=self._loop)
+        connecting = self._connecting
+        try:
+            yield From(asyncio.shield(connecting, loop=self._loop))
+        finally:
+            if self._connecting is connecting and connecting.done():
+                self._connecting = None
+
+    @coroutine
+    def execute(self, *args, **_3to2kwargs):
+        u""" Execute a command, and return its reply.
+
+        :param args:
+            Command and its arguments.
+        :type args: str, int, float
+
+        :param decode:
+            If False, return the raw reply, even if an encoding is set.
+        :type decode: bool
+
+        :return: result, exception
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if not self._redis or self._redis.closed:
+            yield From(self.connect())
+        redis = self._redis
+        yield From(redis.drain())
+        future, = redis.send(writer(*args), 1, decode)
+        try:
+            result = yield From(asyncio.wait_for(future, self._read_timeout, loop=self._loop))
+        except asyncio.TimeoutError:
+            raise PyRedisConnReadTimeout(u'Connection timeout while reading')
+        if self._handshake:
+            yield From(self._check_handshake())
+        if isinstance(result, Exception):
+            raise result
+        raise Return(result)
+
+    @coroutine
+    def execute_many(self, commands, raise_on_result_err=True):
+        u""" Execute many commands with a single write, and return their replies.
+
+        :param commands:
+            Iterable of commands, each command being a list or tuple of arguments.
+        :type commands: list
+
+        :param raise_on_result_err:
+            Raise the first error result, after all replies have been read.
+        :type raise_on_result_err: bool
+
+        :return: list, exception
+        """
+        commands = list(commands)
+        if not commands:
+            raise Return([])
+        if not self._redis or self._redis.closed:
+            yield From(self.connect())
+        redis = self._redis
+        yield From(redis.drain())
+        futures = redis.send(pack_commands(commands), len(commands))
+        try:
+            results = yield From(asyncio.wait_for(
+                asyncio.gather(*futures, loop=self._loop), self._read_timeout, loop=self._loop
+            ))
+        except asyncio.TimeoutError:
+            raise PyRedisConnReadTimeout(u'Connection timeout while reading')
+        if self._handshake:
+            yield From(self._check_handshake())
+        if raise_on_result_err:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        raise Return(results)
+
+
+class AsyncClient(
+    commands.Connection,
+    commands.Hash,
+    commands.HyperLogLog,
+    commands.Key,
+    commands.List,
+    commands.Publish,
+    commands.Scripting,
+    commands.Set,
+    commands.SSet,
+    commands.String,
+):
+    u""" asyncio Client for Talking to Redis.
+
+    Has the same commands as pyredis.Client, but every command returns a coroutine,
+    which has to be waited for with yield From(...) to get the reply.
+    Any number of commands may be executed concurrently, they share one connection.
+
+    Transactions are not supported, commands of other coroutines would end up
+    in between MULTI and EXEC, so commands.Transaction is not inherited.
+
+    Inherits the following Commmand classes:
+      - commands.Connection,
+      - commands.Hash,
+      - commands.HyperLogLog,
+      - commands.Key,
+      - commands.List,
+      - commands.Publish,
+      - commands.Scripting,
+      - commands.Set,
+      - commands.SSet,
+      - commands.String
+
+    :param kwargs:
+        pyredis.aio.AsyncClient takes the same arguments as pyredis.aio.AsyncConnection.
+    """
+    def __init__(self, **kwargs):
+        super(AsyncClient, self).__init__()
+        self._conn = AsyncConnection(**kwargs)
+
+    def close(self):
+        u""" Close client.
+
+        :return: None
+        """
+        self._conn.close()
+
+    @property
+    def closed(self):
+        u""" Check if client is closed.
+
+        :return: bool
+        """
+        return self._conn.closed
+
+    def execute(self, *args, **_3to2kwargs):
+        u""" Execute arbitrary redis command.
+
+        :param args:
+        :type args: list, int, float
+
+        :param decode:
+            If False, return the raw result, even if an encoding is set.
+        :type decode: bool
+
+        :return: coroutine, returning the result
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        return self._conn.execute(*args, decode=decode)
+
+    def execute_many(self, commands, raise_on_result_err=True):
+        u""" Execute many commands with a single write.
+
+        :param commands:
+            Iterable of commands, each command being a list or tuple of arguments.
+        :type commands: list
+
+        :param raise_on_result_err:
+            Raise the first error result, after all replies have been read.
+        :type raise_on_result_err: bool
+
+        :return: coroutine, returning a list of results
+        """
+        return self._conn.execute_many(commands, raise_on_result_err)
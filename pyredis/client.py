@@ -2,9 +2,100 @@ from __future__ import absolute_import
 from collections import deque
 
 from pyredis import commands
-from pyredis.connection import Connection
+from pyredis.connection import Connection, RECV_BUFFER_SIZE
 from pyredis.exceptions import PyRedisError, PyRedisConnError, PyRedisConnReadTimeout, ReplyError
+from pyredis.exceptions import PyRedisCircuitOpen, PyRedisConnClosed
 from pyredis.helper import dict_from_list, ClusterMap, slot_from_key
+from pyredis.pipeline import Pipeline
+from pyredis.protocol import encode_into
+
+BULK_FLUSH_BYTES = 65536
+BULK_FLUSH_SIZE = 1000
+
+
+def _execute_conn(conn, args, decode=True, as_array=None):
+    u""" Write a command to conn and read its reply.
+
+    If the connection fails, and the reconnect policy of conn allows it, the command is send again.
+    """
+    attempt = 0
+    while True:
+        try:
+            conn.write(*args)
+            return conn.read(decode=decode, as_array=as_array)
+        except (PyRedisConnError, PyRedisConnClosed, PyRedisConnReadTimeout), err:
+            attempt += 1
+            policy = conn.reconnect_policy
+            if isinstance(err, PyRedisCircuitOpen) or conn.closed or not policy:
+                raise
+            if not policy.should_retry(args[0], attempt):
+                raise
+
+
+class _BulkResults(object):
+    u""" Delivery of bulk mode results, shared by the clients supporting bulk mode. """
+    def _bulk_deliver(self, results):
+        index = self._bulk_index
+        self._bulk_index += len(results)
+        if self._bulk_errors_only:
+            results = [(num, result) for num, result in enumerate(results, index) if isinstance(result, Exception)]
+        elif self._bulk_callback:
+            results = enumerate(results, index)
+        if self._bulk_callback:
+            for num, result in results:
+                self._bulk_callback(num, result)
+        elif self._bulk_keep:
+            self._bulk_results.extend(results)
+
+    def _bulk_iter_execute(self, args):
+        self.execute(shard_key=args[1], *args)
+
+    def bulk_iter(self, commands, bulk_size=5000, errors_only=False, **kwargs):
+        u""" Execute commands in bulk mode, yielding (index, result) tuples as the results are fetched.
+
+        Memory stays bounded by bulk_size, no matter how many commands are executed.
+        If the generator is closed early, the outstanding results are fetched and dropped.
+        Bulk mode is always left, when the generator finishes, is closed or raises.
+
+        With ClusterClient and HashClient, the shard key of every command is
+        its first argument after the command name, like with the command methods of the client.
+
+        Example:
+
+            for index, err in client.bulk_iter(commands, errors_only=True):
+                log.error('command %s failed: %s', index, err)
+
+        :param commands:
+            Iterable of commands, each command being a list or tuple of arguments.
+        :type commands: iterable
+
+        :param bulk_size:
+            Number of commands to execute, before fetching results.
+        :type bulk_size: int
+
+        :param errors_only:
+            If True, only failed commands are yielded.
+        :type errors_only: bool
+
+        :param kwargs:
+            Further arguments for bulk_start, like duplex=True for Client and HashClient.
+
+        :return: generator
+        """
+        fetched = deque()
+        self.bulk_start(
+            bulk_size=bulk_size, errors_only=errors_only,
+            callback=lambda index, result: fetched.append((index, result)), **kwargs
+        )
+        try:
+            for args in commands:
+                self._bulk_iter_execute(args)
+                while fetched:
+                    yield fetched.popleft()
+        finally:
+            self.bulk_stop()
+        while fetched:
+            yield fetched.popleft()
 
 
 class Client(
@@ -19,6 +110,7 @@ class Client(
     commands.SSet,
     commands.String,
     commands.Transaction,
+    _BulkResults,
 ):
     u""" Base Client for Talking to Redis.
 
@@ -47,23 +139,55 @@ class Client(
         self._bulk_results = None
         self._bulk_size = None
         self._bulk_size_current = None
+        self._bulk_buf = None
+        self._bulk_buf_size = None
+        self._bulk_flush_bytes = None
+        self._bulk_flush_size = None
+        self._bulk_duplex = False
+        self._bulk_callback = None
+        self._bulk_errors_only = False
+        self._bulk_index = 0
 
     def _bulk_fetch(self):
-        while self._bulk_size_current != 0:
-            result = self._conn.read(raise_on_result_err=False)
-            self._bulk_size_current -= 1
-            if self._bulk_keep:
-                self._bulk_results.append(result)
-
-    def _execute_basic(self, *args):
-        self._conn.write(*args)
-        return self._conn.read()
+        self._bulk_flush()
+        results = self._conn.read_many(self._bulk_size_current, raise_on_result_err=False)
+        self._bulk_size_current = 0
+        self._bulk_deliver(results)
+
+    def _bulk_flush(self):
+        if not self._bulk_buf:
+            return
+        buf = self._bulk_buf
+        self._bulk_buf = bytearray()
+        self._bulk_buf_size = 0
+        if not self._bulk_duplex:
+            self._conn.write_packed(buf)
+            return
+        results = self._conn.write_packed_duplex(buf)
+        self._bulk_size_current -= len(results)
+        self._bulk_deliver(results)
+
+    def _execute_basic(self, *args, **_3to2kwargs):
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
+        return _execute_conn(self._conn, args, decode=decode, as_array=as_array)
 
     def _execute_bulk(self, *args):
-        self._conn.write(*args)
+        encode_into(self._bulk_buf, *args)
+        self._bulk_buf_size += 1
         self._bulk_size_current += 1
         if self._bulk_size_current == self._bulk_size:
             self._bulk_fetch()
+        elif self._bulk_buf_size >= self._bulk_flush_size or len(self._bulk_buf) >= self._bulk_flush_bytes:
+            self._bulk_flush()
+
+    def _bulk_iter_execute(self, args):
+        self.execute(*args)
+
+    def _pipeline_conn(self, shard_key=None, sock=None):
+        return self._conn
 
     @property
     def bulk(self):
@@ -73,7 +197,9 @@ class Client(
         """
         return self._bulk
 
-    def bulk_start(self, bulk_size=5000, keep_results=True):
+    def bulk_start(
+            self, bulk_size=5000, keep_results=True, flush_bytes=BULK_FLUSH_BYTES, flush_size=BULK_FLUSH_SIZE,
+            duplex=False, callback=None, errors_only=False):
         u""" Enable bulk mode
 
         Put the client into bulk mode. Instead of executing a command & waiting for
@@ -81,6 +207,10 @@ class Client(
         The results get fetched whenever $bulk_size commands have been executed,
         which will also resets the counter, or of bulk_stop() is called.
 
+        Commands are encoded into an outgoing buffer, which is written with a single call,
+        once it holds flush_bytes bytes or flush_size commands, and before results get fetched.
+        Connection errors are therefore raised by the command triggering the write.
+
         :param bulk_size:
             Number of commands to execute, before fetching results.
         :type bulk_size: int
@@ -89,6 +219,29 @@ class Client(
             If True, keep the results. The Results will be returned when calling bulk_stop.
         :type keep_results: bool
 
+        :param flush_bytes:
+            Size of the outgoing buffer in bytes, after which it is written to the socket.
+        :type flush_bytes: int
+
+        :param flush_size:
+            Number of buffered commands, after which the outgoing buffer is written to the socket.
+        :type flush_size: int
+
+        :param duplex:
+            If True, replies are read while the outgoing buffer is written, whenever the socket is readable.
+            Redis can then never block on a full output buffer, no matter how large bulk_size is.
+        :type duplex: bool
+
+        :param callback:
+            Called with the index of the command since bulk_start and its result, for every fetched result.
+            Results are then not kept, so memory stays bounded by bulk_size, and bulk_stop returns None.
+        :type callback: callable
+
+        :param errors_only:
+            If True, only failed commands are reported, as (index, exception) tuples in the list returned
+            by bulk_stop, even if keep_results is False, or as calls of callback.
+        :type errors_only: bool
+
         :return: None
         """
         if self.bulk:
@@ -96,7 +249,15 @@ class Client(
         self._bulk = True
         self._bulk_size = bulk_size
         self._bulk_size_current = 0
-        if keep_results:
+        self._bulk_buf_size = 0
+        self._bulk_flush_bytes = flush_bytes
+        self._bulk_flush_size = flush_size
+        self._bulk_duplex = duplex
+        self._bulk_buf = bytearray()
+        self._bulk_callback = callback
+        self._bulk_errors_only = errors_only
+        self._bulk_index = 0
+        if (keep_results or errors_only) and not callback:
             self._bulk_results = []
             self._bulk_keep = True
 
@@ -104,6 +265,7 @@ class Client(
         u""" Stop bulk mode.
 
         All outstanding results from previous commands get fetched.
+        Bulk mode is left, even if fetching them fails.
         If bulk_start was called with keep_results=True, return a list with all
         results from the executed commands in order. The list of results can also contain
         Exceptions, hat you should check for.
@@ -112,14 +274,23 @@ class Client(
         """
         if not self.bulk:
             raise PyRedisError(u"Not in bulk mode")
-        self._bulk_fetch()
-        results = self._bulk_results
-        self._bulk = False
-        self._bulk_keep = False
-        self._bulk_results = None
-        self._bulk_size = None
-        self._bulk_size_current = None
-        return results
+        try:
+            self._bulk_fetch()
+            return self._bulk_results
+        finally:
+            self._bulk = False
+            self._bulk_keep = False
+            self._bulk_results = None
+            self._bulk_size = None
+            self._bulk_size_current = None
+            self._bulk_buf = None
+            self._bulk_buf_size = None
+            self._bulk_flush_bytes = None
+            self._bulk_flush_size = None
+            self._bulk_duplex = False
+            self._bulk_callback = None
+            self._bulk_errors_only = False
+            self._bulk_index = 0
 
     def close(self):
         u""" Close client.
@@ -136,19 +307,68 @@ class Client(
         """
         return self._conn.closed
 
-    def execute(self, *args):
+    def execute(self, *args, **_3to2kwargs):
         u""" Execute arbitrary redis command.
 
         :param args:
         :type args: list, int, float
 
+        :param decode: (optional)
+            If False, return the raw reply, even if an encoding is set.
+            Ignored in bulk mode.
+        :type decode: bool
+
+        :param as_array: (optional)
+            array.array typecode, like 'd' or 'q'. Return an array reply holding only numbers
+            as array.array, or numpy array if numpy is installed.
+            The reply is converted after it has been parsed, see pyredis.protocol.numeric_array.
+            Ignored in bulk mode.
+        :type as_array: str
+
         :return: result, exception
         """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
         if not self._bulk:
-            return self._execute_basic(*args)
+            return self._execute_basic(decode=decode, as_array=as_array, *args)
         else:
             self._execute_bulk(*args)
 
+    def execute_iter(self, *args):
+        u""" Execute arbitrary redis command, iterating over the reply as it arrives.
+
+        Meant for commands returning huge arrays, like KEYS, SMEMBERS, HGETALL or LRANGE.
+        Elements are yielded as soon as they are read from the socket, instead of
+        building the whole reply in memory. See pyredis.connection.Connection.read_stream.
+
+        Can not be used in bulk mode.
+
+        :param args:
+        :type args: list, int, float
+
+        :return: generator
+        """
+        if self._bulk:
+            raise PyRedisError(u'execute_iter can not be used in bulk mode')
+        self._conn.write(*args)
+        return self._conn.read_stream()
+
+    def pipeline(self):
+        u""" Return a pipeline, which buffers commands, and sends them in one go.
+
+        Every command returns a pyredis.pipeline.Future. The buffered commands are send,
+        when the pipeline is flushed, or its with block is left. See pyredis.pipeline.Pipeline.
+
+        Can not be used in bulk mode.
+
+        :return: pyredis.pipeline.Pipeline
+        """
+        if self._bulk:
+            raise PyRedisError(u'pipeline can not be used in bulk mode')
+        return Pipeline(self)
+
 
 class ClusterClient(
     commands.Connection,
@@ -160,7 +380,8 @@ class ClusterClient(
     commands.Set,
     commands.SSet,
     commands.String,
-    commands.Transaction
+    commands.Transaction,
+    _BulkResults,
 ):
     u""" Base Client for Talking to Redis Cluster.
 
@@ -203,6 +424,70 @@ class ClusterClient(
     :param read_timeout:
         Read Timeout.
     :type read_timeout: float
+
+    :param recv_buffer_size:
+        Number of bytes to receive from the socket at once.
+    :type recv_buffer_size: int
+
+    :param recv_buffer_adaptive:
+        If True, grow and shrink the receive size with the size of the replies.
+    :type recv_buffer_adaptive: bool
+
+    :param parser:
+        Reply parser to use, one of 'auto', 'hiredis' or 'python'.
+    :type parser: str
+
+    :param lazy_decode:
+        If True, return strings as pyredis.protocol.LazyString, which only get decoded on access.
+    :type lazy_decode: bool
+
+    :param protocol:
+        RESP protocol version, 2 or 3.
+    :type protocol: int
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames received while reading replies.
+    :type push_handler: callable
+
+    :param tcp_nodelay:
+        Disable Nagle's algorithm.
+    :type tcp_nodelay: bool
+
+    :param keepalive:
+        Enable TCP keepalive.
+    :type keepalive: bool
+
+    :param keepalive_idle:
+        Idle seconds before keepalive probes are send.
+    :type keepalive_idle: int
+
+    :param keepalive_interval:
+        Seconds between keepalive probes.
+    :type keepalive_interval: int
+
+    :param keepalive_count:
+        Unanswered keepalive probes, before the connection is dropped.
+    :type keepalive_count: int
+
+    :param so_sndbuf:
+        Kernel send buffer size in bytes.
+    :type so_sndbuf: int
+
+    :param so_rcvbuf:
+        Kernel receive buffer size in bytes.
+    :type so_rcvbuf: int
+
+    :param tcp_user_timeout:
+        Milliseconds data may remain unacknowledged, before the connection is dropped.
+    :type tcp_user_timeout: int
+
+    :param client_name:
+        Name set with CLIENT SETNAME on every connection.
+    :type client_name: str
+
+    :param reconnect_policy:
+        Backoff, circuit breaker and retry policy, shared by all connections.
+    :type reconnect_policy: pyredis.reconnect.ReconnectPolicy
     """
     def __init__(
             self,
@@ -213,7 +498,23 @@ class ClusterClient(
             slave_ok=False,
             conn_timeout=2,
             read_timeout=2,
-            cluster_map=None):
+            cluster_map=None,
+            recv_buffer_size=RECV_BUFFER_SIZE,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None,
+            client_name=None,
+            reconnect_policy=None):
         super(ClusterClient, self).__init__()
         if not bool(seeds) != bool(cluster_map):
             raise PyRedisError(u'Ether seeds or cluster_map has to be provided')
@@ -224,12 +525,59 @@ class ClusterClient(
         self._encoding = encoding
         self._password = password
         self._database = database
+        self._recv_buffer_size = recv_buffer_size
+        self._recv_buffer_adaptive = recv_buffer_adaptive
+        self._parser = parser
+        self._lazy_decode = lazy_decode
+        self._protocol = protocol
+        self._push_handler = push_handler
+        self._client_name = client_name
+        self._reconnect_policy = reconnect_policy
+        self._socket_options = dict(
+            tcp_nodelay=tcp_nodelay,
+            keepalive=keepalive,
+            keepalive_idle=keepalive_idle,
+            keepalive_interval=keepalive_interval,
+            keepalive_count=keepalive_count,
+            so_sndbuf=so_sndbuf,
+            so_rcvbuf=so_rcvbuf,
+            tcp_user_timeout=tcp_user_timeout
+        )
         self._slave_ok = slave_ok
         if cluster_map:
             self._map = cluster_map
         else:
             self._map = ClusterMap(seeds=seeds)
         self._map_id = self._map.id
+        self._bulk = False
+        self._bulk_keep = False
+        self._bulk_results = None
+        self._bulk_size = None
+        self._bulk_size_current = None
+        self._bulk_callback = None
+        self._bulk_errors_only = False
+        self._bulk_index = 0
+        self._bulk_pipeline = None
+        self._bulk_futures = None
+
+    def _bulk_fetch(self):
+        futures = self._bulk_futures
+        self._bulk_futures = list()
+        self._bulk_size_current = 0
+        try:
+            self._bulk_pipeline.flush()
+        except Exception, err:
+            # an unexpected error may leave futures pending, they get it set, so they can be delivered
+            for future in futures:
+                if not future.done():
+                    future.set_exception(err)
+            raise
+        finally:
+            # futures of failed connections hold the error, deliver them before it is raised
+            if self._bulk_keep or self._bulk_callback:
+                self._bulk_deliver([future.exception() or future.result() for future in futures])
+            else:
+                self._bulk_index += len(futures)
 
     def _cleanup_conns(self):
         hosts = self._map.hosts(slave=self._slave_ok)
@@ -250,7 +598,16 @@ class ClusterClient(
             read_timeout=self._read_timeout,
             encoding=self._encoding,
             password=self._password,
-            database=self._database
+            database=self._database,
+            recv_buffer_size=self._recv_buffer_size,
+            recv_buffer_adaptive=self._recv_buffer_adaptive,
+            parser=self._parser,
+            lazy_decode=self._lazy_decode,
+            protocol=self._protocol,
+            push_handler=self._push_handler,
+            client_name=self._client_name,
+            reconnect_policy=self._reconnect_policy,
+            **self._socket_options
         )
         self._conns[sock] = client
 
@@ -265,11 +622,119 @@ class ClusterClient(
             self._cleanup_conns()
             return self._map.get_slot(shard_key, self._slave_ok)
 
+    def _pipeline_conn(self, shard_key=None, sock=None):
+        if not sock:
+            sock = self._get_slot_info(shard_key)
+        if sock not in self._conns.keys() or self._conns[sock].closed:
+            self._connect(sock)
+        return self._conns[sock]
+
+    def _pipeline_redirect(self, errstr, shard_key, refresh=False):
+        if errstr.startswith(u'ASK'):
+            return self._pipeline_conn(sock=errstr.split()[2].replace(u':', u'_'))
+        if not shard_key:
+            raise ReplyError(u'Explicitly set socket, but key does not belong to this redis')
+        if refresh:
+            self._map_id = self._map.update(self._map_id)
+            self._cleanup_conns()
+        return self._pipeline_conn(shard_key=shard_key)
+
+    def _pipeline_conn_failed(self, conns):
+        for sock, conn in list(self._conns.items()):
+            if conn in conns:
+                conn.close()
+                del self._conns[sock]
+        self._map_id = self._map.update(self._map_id)
+
+    @property
+    def bulk(self):
+        u""" True if bulk mode is enabled.
+
+        :return: bool
+        """
+        return self._bulk
+
+    def bulk_start(self, bulk_size=5000, keep_results=True, callback=None, errors_only=False):
+        u""" Enable bulk mode
+
+        Put the client into bulk mode. Instead of executing a command & waiting for
+        the reply, commands are buffered in a pyredis.pipeline.Pipeline.
+        Whenever $bulk_size commands have been executed, or bulk_stop() is called,
+        the buffered commands are grouped by the node owning their slot, and send to each node
+        with a single write. Commands answered with MOVED or ASK are send again to the right node,
+        results are kept in the order the commands were executed.
+
+        :param bulk_size:
+            Number of commands to execute, before fetching results.
+        :type bulk_size: int
+
+        :param keep_results:
+            If True, keep the results. The Results will be returned when calling bulk_stop.
+        :type keep_results: bool
+
+        :param callback:
+            Called with the index of the command since bulk_start and its result, for every fetched result.
+            Results are then not kept, so memory stays bounded by bulk_size, and bulk_stop returns None.
+        :type callback: callable
+
+        :param errors_only:
+            If True, only failed commands are reported, as (index, exception) tuples in the list returned
+            by bulk_stop, even if keep_results is False, or as calls of callback.
+        :type errors_only: bool
+
+        :return: None
+        """
+        if self.bulk:
+            raise PyRedisError(u"Already in bulk mode")
+        self._bulk = True
+        self._bulk_size = bulk_size
+        self._bulk_size_current = 0
+        self._bulk_callback = callback
+        self._bulk_errors_only = errors_only
+        self._bulk_index = 0
+        self._bulk_pipeline = Pipeline(self)
+        self._bulk_futures = list()
+        if (keep_results or errors_only) and not callback:
+            self._bulk_results = []
+            self._bulk_keep = True
+
+    def bulk_stop(self):
+        u""" Stop bulk mode.
+
+        All outstanding results from previous commands get fetched.
+        Bulk mode is left, even if fetching them fails.
+        If bulk_start was called with keep_results=True, return a list with all
+        results from the executed commands in order. The list of results can also contain
+        Exceptions, hat you should check for.
+
+        :return: None, list
+        """
+        if not self.bulk:
+            raise PyRedisError(u"Not in bulk mode")
+        try:
+            self._bulk_fetch()
+            return self._bulk_results
+        finally:
+            self._bulk = False
+            self._bulk_keep = False
+            self._bulk_results = None
+            self._bulk_size = None
+            self._bulk_size_current = None
+            self._bulk_callback = None
+            self._bulk_errors_only = False
+            self._bulk_index = 0
+            self._bulk_pipeline = None
+            self._bulk_futures = None
+
     @property
     def closed(self):
         return False
 
     def execute(self, *args, **_3to2kwargs):
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
         if 'retries' in _3to2kwargs: retries = _3to2kwargs['retries']; del _3to2kwargs['retries']
         else: retries = 3
         if 'asking' in _3to2kwargs: asking = _3to2kwargs['asking']; del _3to2kwargs['asking']
@@ -294,10 +759,28 @@ class ClusterClient(
             Can not be used if shard_key is set.
         :type sock: string
 
+        :param decode: (optional)
+            If False, return the raw reply, even if an encoding is set.
+        :type decode: bool
+
+        :param as_array: (optional)
+            array.array typecode, like 'd' or 'q'. Return an array reply holding only numbers
+            as array.array, or numpy array if numpy is installed.
+            The reply is converted after it has been parsed, see pyredis.protocol.numeric_array.
+        :type as_array: str
+
         :return: result, exception
         """
         if not bool(shard_key) != bool(sock):
             raise PyRedisError(u'Ether shard_key or sock has to be provided')
+        if self._bulk:
+            self._bulk_futures.append(self._bulk_pipeline.execute(
+                decode=decode, as_array=as_array, sock=sock, shard_key=shard_key, *args
+            ))
+            self._bulk_size_current += 1
+            if self._bulk_size_current == self._bulk_size:
+                self._bulk_fetch()
+            return
         if not sock:
             sock = self._get_slot_info(shard_key)
         if sock not in self._conns.keys():
@@ -305,9 +788,8 @@ class ClusterClient(
         try:
             if asking:
                 self._conns[sock].write(u'ASKING', *args)
-            else:
-                self._conns[sock].write(*args)
-            return self._conns[sock].read()
+                return self._conns[sock].read(decode=decode, as_array=as_array)
+            return _execute_conn(self._conns[sock], args, decode=decode, as_array=as_array)
         except ReplyError, err:
             errstr = unicode(err)
             if retries <= 1 and (errstr.startswith(u'MOVED') or errstr.startswith(u'ASK')):
@@ -317,10 +799,10 @@ class ClusterClient(
                     raise ReplyError(u'Explicitly set socket, but key does not belong to this redis: {0}'.format(sock))
                 self._map_id = self._map.update(self._map_id)
                 self._cleanup_conns()
-                return self.execute(*args, shard_key=shard_key, retries=retries-1)
+                return self.execute(*args, shard_key=shard_key, retries=retries-1, decode=decode, as_array=as_array)
             elif errstr.startswith(u'ASK'):
                 sock = errstr.split()[2].replace(u':', u'_')
-                return self.execute(*args, sock=sock, retries=retries-1, asking=True)
+                return self.execute(*args, sock=sock, retries=retries-1, asking=True, decode=decode, as_array=as_array)
             else:
                 raise err
         except (PyRedisConnError, PyRedisConnReadTimeout), err:
@@ -329,6 +811,24 @@ class ClusterClient(
             self._map.update(self._map_id)
             raise err
 
+    def pipeline(self):
+        u""" Return a pipeline, which buffers commands, and sends them in one go.
+
+        Commands take shard_key or sock, like with execute, and return a pyredis.pipeline.Future.
+        The commands for each node are send with a single write, when the pipeline is flushed,
+        or its with block is left. See pyredis.pipeline.Pipeline.
+
+        Commands answered with MOVED or ASK are send again to the right node,
+        see pyredis.pipeline.Pipeline.
+
+        Can not be used in bulk mode.
+
+        :return: pyredis.pipeline.Pipeline
+        """
+        if self._bulk:
+            raise PyRedisError(u'pipeline can not be used in bulk mode')
+        return Pipeline(self)
+
 
 class HashClient(
     commands.Connection,
@@ -342,6 +842,7 @@ class HashClient(
     commands.SSet,
     commands.String,
     commands.Transaction,
+    _BulkResults,
 ):
     u""" Client for Talking to Static Hashed Redis Cluster.
     
@@ -353,6 +854,7 @@ class HashClient(
     a list with 16384 ('host', port) pairs to the "buckets" parameter.
     If you have less then 16384 ('host', port) pairs, the client will try to
     distribute the key spaces evenly between available pairs.
+    A bucket can also be the path of a unix socket, for servers running on the same host.
     
     --- Warning ---
     Since this is static hashing, the the order of pairs has to match on each client you use!
@@ -371,8 +873,108 @@ class HashClient(
       - commands.SSet,
       - commands.String,
       - commands.Transaction
+
+    :param buckets:
+        list of ('host', port) pairs, or unix socket paths, where each entry represents a bucket
+        example: [('localhost', 7001), ('localhost', 7002), '/var/run/redis/redis3.sock']
+        The sock name of a unix socket bucket is its path.
+    :type buckets: list
+
+    :param recv_buffer_size:
+        Number of bytes to receive from the socket at once.
+    :type recv_buffer_size: int
+
+    :param recv_buffer_adaptive:
+        If True, grow and shrink the receive size with the size of the replies.
+    :type recv_buffer_adaptive: bool
+
+    :param parser:
+        Reply parser to use, one of 'auto', 'hiredis' or 'python'.
+    :type parser: str
+
+    :param lazy_decode:
+        If True, return strings as pyredis.protocol.LazyString, which only get decoded on access.
+    :type lazy_decode: bool
+
+    :param protocol:
+        RESP protocol version, 2 or 3.
+    :type protocol: int
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames received while reading replies.
+    :type push_handler: callable
+
+    :param tcp_nodelay:
+        Disable Nagle's algorithm.
+    :type tcp_nodelay: bool
+
+    :param keepalive:
+        Enable TCP keepalive.
+    :type keepalive: bool
+
+    :param keepalive_idle:
+        Idle seconds before keepalive probes are send.
+    :type keepalive_idle: int
+
+    :param keepalive_interval:
+        Seconds between keepalive probes.
+    :type keepalive_interval: int
+
+    :param keepalive_count:
+        Unanswered keepalive probes, before the connection is dropped.
+    :type keepalive_count: int
+
+    :param so_sndbuf:
+        Kernel send buffer size in bytes.
+    :type so_sndbuf: int
+
+    :param so_rcvbuf:
+        Kernel receive buffer size in bytes.
+    :type so_rcvbuf: int
+
+    :param tcp_user_timeout:
+        Milliseconds data may remain unacknowledged, before the connection is dropped.
+    :type tcp_user_timeout: int
+
+    :param peer_uid:
+        User id, the server of every unix socket bucket has to run as.
+    :type peer_uid: int
+
+    :param client_name:
+        Name set with CLIENT SETNAME on every connection.
+    :type client_name: str
+
+    :param reconnect_policy:
+        Backoff, circuit breaker and retry policy, shared by all connections.
+    :type reconnect_policy: pyredis.reconnect.ReconnectPolicy
+
+    All other arguments are the same as for pyredis.connection.Connection.
     """
-    def __init__(self, buckets, database=0, password=None, encoding=None, conn_timeout=2, read_timeout=2):
+    def __init__(
+            self,
+            buckets,
+            database=0,
+            password=None,
+            encoding=None,
+            conn_timeout=2,
+            read_timeout=2,
+            recv_buffer_size=RECV_BUFFER_SIZE,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None,
+            peer_uid=None,
+            client_name=None,
+            reconnect_policy=None):
 
         super(HashClient, self).__init__()
         self._conns = dict()
@@ -383,42 +985,108 @@ class HashClient(
         self._bulk_size = None
         self._bulk_size_current = None
         self._bulk_bucket_order = list()
+        self._bulk_bufs = dict()
+        self._bulk_buf_size = None
+        self._bulk_flush_bytes = None
+        self._bulk_flush_size = None
+        self._bulk_duplex = False
+        self._bulk_drained = dict()
+        self._bulk_callback = None
+        self._bulk_errors_only = False
+        self._bulk_index = 0
         self._closed = False
         self._cluster = True
         self._map = dict()
-        self._init_conns(buckets, database, password, encoding, conn_timeout, read_timeout)
+        socket_options = dict(
+            tcp_nodelay=tcp_nodelay,
+            keepalive=keepalive,
+            keepalive_idle=keepalive_idle,
+            keepalive_interval=keepalive_interval,
+            keepalive_count=keepalive_count,
+            so_sndbuf=so_sndbuf,
+            so_rcvbuf=so_rcvbuf,
+            tcp_user_timeout=tcp_user_timeout
+        )
+        self._init_conns(
+            buckets, database, password, encoding, conn_timeout, read_timeout,
+            recv_buffer_size, recv_buffer_adaptive, parser, lazy_decode, protocol, push_handler,
+            socket_options, peer_uid, client_name, reconnect_policy
+        )
         self._init_map()
 
     def _bulk_fetch(self):
+        self._bulk_flush()
+        pending = dict()
         for conn in self._bulk_bucket_order:
-            result = conn.read(raise_on_result_err=False)
-            if self._bulk_keep:
-                self._bulk_results.append(result)
+            pending[conn] = pending.get(conn, 0) + 1
+        replies = dict()
+        for conn, num in pending.items():
+            results = self._bulk_drained.pop(conn, [])
+            results.extend(conn.read_many(num - len(results), raise_on_result_err=False))
+            replies[conn] = iter(results)
+        if self._bulk_keep or self._bulk_callback:
+            self._bulk_deliver([next(replies[conn]) for conn in self._bulk_bucket_order])
+        else:
+            self._bulk_index += len(self._bulk_bucket_order)
         self._bulk_bucket_order = list()
         self._bulk_size_current = 0
 
+    def _bulk_flush(self):
+        bufs = self._bulk_bufs
+        self._bulk_bufs = dict()
+        self._bulk_buf_size = 0
+        for conn, buf in bufs.items():
+            if not self._bulk_duplex:
+                conn.write_packed(buf)
+                continue
+            results = conn.write_packed_duplex(buf)
+            if results:
+                self._bulk_drained.setdefault(conn, []).extend(results)
+
     @staticmethod
     def _execute_basic(*args, **_3to2kwargs):
         conn = _3to2kwargs['conn']; del _3to2kwargs['conn']
-        conn.write(*args)
-        return conn.read()
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
+        return _execute_conn(conn, args, decode=decode, as_array=as_array)
 
     def _execute_bulk(self, *args, **_3to2kwargs):
         conn = _3to2kwargs['conn']; del _3to2kwargs['conn']
-        conn.write(*args)
+        buf = self._bulk_bufs.get(conn)
+        if buf is None:
+            buf = self._bulk_bufs[conn] = bytearray()
+        encode_into(buf, *args)
+        self._bulk_buf_size += 1
         self._bulk_size_current += 1
         self._bulk_bucket_order.append(conn)
         if self._bulk_size_current == self._bulk_size:
             self._bulk_fetch()
+        elif self._bulk_buf_size >= self._bulk_flush_size or len(buf) >= self._bulk_flush_bytes:
+            self._bulk_flush()
 
-    def _init_conns(self, buckets, database, password, encoding, conn_timeout, read_timeout):
+    def _init_conns(
+            self, buckets, database, password, encoding, conn_timeout, read_timeout,
+            recv_buffer_size, recv_buffer_adaptive, parser, lazy_decode, protocol, push_handler,
+            socket_options, peer_uid, client_name, reconnect_policy):
         for bucket in buckets:
-            host, port = bucket
-            bucketname = u'{0}_{1}'.format(host, port)
+            if isinstance(bucket, basestring):
+                host, port, unix_sock = None, 6379, bucket
+                bucketname = bucket
+            else:
+                host, port = bucket
+                unix_sock = None
+                bucketname = u'{0}_{1}'.format(host, port)
             self._conn_names.append(bucketname)
             self._conns[bucketname] = Connection(
-                host=host, port=port, database=database, password=password,
-                encoding=encoding, conn_timeout=conn_timeout, read_timeout=read_timeout
+                host=host, port=port, unix_sock=unix_sock, peer_uid=peer_uid,
+                database=database, password=password,
+                encoding=encoding, conn_timeout=conn_timeout, read_timeout=read_timeout,
+                recv_buffer_size=recv_buffer_size, recv_buffer_adaptive=recv_buffer_adaptive,
+                parser=parser, lazy_decode=lazy_decode, protocol=protocol,
+                push_handler=push_handler, client_name=client_name,
+                reconnect_policy=reconnect_policy, **socket_options
             )
 
     def _init_map(self):
@@ -431,6 +1099,11 @@ class HashClient(
             else:
                 cur_bucket += 1
 
+    def _pipeline_conn(self, shard_key=None, sock=None):
+        if not sock:
+            sock = self._map[slot_from_key(shard_key)]
+        return self._conns[sock]
+
     @property
     def bulk(self):
         u""" True if bulk mode is enabled.
@@ -439,7 +1112,9 @@ class HashClient(
         """
         return self._bulk
 
-    def bulk_start(self, bulk_size=5000, keep_results=True):
+    def bulk_start(
+            self, bulk_size=5000, keep_results=True, flush_bytes=BULK_FLUSH_BYTES, flush_size=BULK_FLUSH_SIZE,
+            duplex=False, callback=None, errors_only=False):
         u""" Enable bulk mode
 
         Put the client into bulk mode. Instead of executing a command & waiting for
@@ -447,6 +1122,10 @@ class HashClient(
         The results get fetched whenever $bulk_size commands have been executed,
         which will also resets the counter, or of bulk_stop() is called.
 
+        Commands are encoded into an outgoing buffer, which is written with a single call,
+        once it holds flush_bytes bytes or flush_size commands, and before results get fetched.
+        Connection errors are therefore raised by the command triggering the write.
+
         :param bulk_size:
             Number of commands to execute, before fetching results.
         :type bulk_size: int
@@ -455,6 +1134,29 @@ class HashClient(
             If True, keep the results. The Results will be returned when calling bulk_stop.
         :type keep_results: bool
 
+        :param flush_bytes:
+            Size of the outgoing buffer in bytes, after which it is written to the socket.
+        :type flush_bytes: int
+
+        :param flush_size:
+            Number of buffered commands, after which the outgoing buffer is written to the socket.
+        :type flush_size: int
+
+        :param duplex:
+            If True, replies are read while the outgoing buffer is written, whenever the socket is readable.
+            Redis can then never block on a full output buffer, no matter how large bulk_size is.
+        :type duplex: bool
+
+        :param callback:
+            Called with the index of the command since bulk_start and its result, for every fetched result.
+            Results are then not kept, so memory stays bounded by bulk_size, and bulk_stop returns None.
+        :type callback: callable
+
+        :param errors_only:
+            If True, only failed commands are reported, as (index, exception) tuples in the list returned
+            by bulk_stop, even if keep_results is False, or as calls of callback.
+        :type errors_only: bool
+
         :return: None
         """
         if self.bulk:
@@ -462,7 +1164,17 @@ class HashClient(
         self._bulk = True
         self._bulk_size = bulk_size
         self._bulk_size_current = 0
-        if keep_results:
+        self._bulk_buf_size = 0
+        self._bulk_flush_bytes = flush_bytes
+        self._bulk_flush_size = flush_size
+        self._bulk_duplex = duplex
+        self._bulk_bufs = dict()
+        self._bulk_bucket_order = list()
+        self._bulk_drained = dict()
+        self._bulk_callback = callback
+        self._bulk_errors_only = errors_only
+        self._bulk_index = 0
+        if (keep_results or errors_only) and not callback:
             self._bulk_results = []
             self._bulk_keep = True
 
@@ -470,6 +1182,7 @@ class HashClient(
         u""" Stop bulk mode.
 
         All outstanding results from previous commands get fetched.
+        Bulk mode is left, even if fetching them fails.
         If bulk_start was called with keep_results=True, return a list with all
         results from the executed commands in order. The list of results can also contain
         Exceptions, hat you should check for.
@@ -478,14 +1191,25 @@ class HashClient(
         """
         if not self.bulk:
             raise PyRedisError(u"Not in bulk mode")
-        self._bulk_fetch()
-        results = self._bulk_results
-        self._bulk = False
-        self._bulk_keep = False
-        self._bulk_results = None
-        self._bulk_size = None
-        self._bulk_size_current = None
-        return results
+        try:
+            self._bulk_fetch()
+            return self._bulk_results
+        finally:
+            self._bulk = False
+            self._bulk_keep = False
+            self._bulk_results = None
+            self._bulk_size = None
+            self._bulk_size_current = None
+            self._bulk_bufs = dict()
+            self._bulk_bucket_order = list()
+            self._bulk_drained = dict()
+            self._bulk_buf_size = None
+            self._bulk_flush_bytes = None
+            self._bulk_flush_size = None
+            self._bulk_duplex = False
+            self._bulk_callback = None
+            self._bulk_errors_only = False
+            self._bulk_index = 0
 
     def close(self):
         u""" Close client.
@@ -505,10 +1229,6 @@ class HashClient(
         return self._closed
 
     def execute(self, *args, **_3to2kwargs):
-        if 'sock' in _3to2kwargs: sock = _3to2kwargs['sock']; del _3to2kwargs['sock']
-        else: sock = None
-        if 'shard_key' in _3to2kwargs: shard_key = _3to2kwargs['shard_key']; del _3to2kwargs['shard_key']
-        else: shard_key = None
         u""" Execute arbitrary redis command.
 
         :param args:
@@ -525,8 +1245,28 @@ class HashClient(
             Can not be used if shard_key is set.
         :type sock: string
 
+        :param decode: (optional)
+            If False, return the raw reply, even if an encoding is set.
+            Ignored in bulk mode.
+        :type decode: bool
+
+        :param as_array: (optional)
+            array.array typecode, like 'd' or 'q'. Return an array reply holding only numbers
+            as array.array, or numpy array if numpy is installed.
+            The reply is converted after it has been parsed, see pyredis.protocol.numeric_array.
+            Ignored in bulk mode.
+        :type as_array: str
+
         :return: result, exception
         """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
+        if 'sock' in _3to2kwargs: sock = _3to2kwargs['sock']; del _3to2kwargs['sock']
+        else: sock = None
+        if 'shard_key' in _3to2kwargs: shard_key = _3to2kwargs['shard_key']; del _3to2kwargs['shard_key']
+        else: shard_key = None
         if not bool(shard_key) != bool(sock):
             raise PyRedisError(u'Ether shard_key or sock has to be provided')
         if not sock:
@@ -534,13 +1274,69 @@ class HashClient(
         conn = self._conns[sock]
         try:
             if not self._bulk:
-                return self._execute_basic(conn=conn, *args)
+                return self._execute_basic(conn=conn, decode=decode, as_array=as_array, *args)
             else:
                 self._execute_bulk(conn=conn, *args)
         except PyRedisConnError, err:
-            self.close()
+            if not conn.reconnect_policy:
+                self.close()
             raise err
 
+    def execute_iter(self, *args, **_3to2kwargs):
+        u""" Execute arbitrary redis command, iterating over the reply as it arrives.
+
+        See pyredis.client.Client.execute_iter, can not be used in bulk mode.
+
+        :param args:
+        :type args: list, int, float
+
+        :param shard_key: (optional)
+            Should be set to the key name you try to work with.
+            Can not be used if sock is set.
+        :type shard_key: string
+
+        :param sock: (optional)
+            The string representation of a socket, the command should be executed against.
+            For example: "testhost_6379"
+            Can not be used if shard_key is set.
+        :type sock: string
+
+        :return: generator
+        """
+        if 'sock' in _3to2kwargs: sock = _3to2kwargs['sock']; del _3to2kwargs['sock']
+        else: sock = None
+        if 'shard_key' in _3to2kwargs: shard_key = _3to2kwargs['shard_key']; del _3to2kwargs['shard_key']
+        else: shard_key = None
+        if not bool(shard_key) != bool(sock):
+            raise PyRedisError(u'Ether shard_key or sock has to be provided')
+        if self._bulk:
+            raise PyRedisError(u'execute_iter can not be used in bulk mode')
+        if not sock:
+            sock = self._map[slot_from_key(shard_key)]
+        conn = self._conns[sock]
+        try:
+            conn.write(*args)
+        except PyRedisConnError, err:
+            if not conn.reconnect_policy:
+                self.close()
+            raise err
+        return conn.read_stream()
+
+    def pipeline(self):
+        u""" Return a pipeline, which buffers commands, and sends them in one go.
+
+        Commands take shard_key or sock, like with execute, and return a pyredis.pipeline.Future.
+        The commands for each bucket are send with a single write, when the pipeline is flushed,
+        or its with block is left. See pyredis.pipeline.Pipeline.
+
+        Can not be used in bulk mode.
+
+        :return: pyredis.pipeline.Pipeline
+        """
+        if self._bulk:
+            raise PyRedisError(u'pipeline can not be used in bulk mode')
+        return Pipeline(self)
+
 
 class PubSubClient(commands.Subscribe):
     u""" Pub/Sub Client.
@@ -12,9 +12,21 @@ __all__ = [
     u'SSet',
     u'String',
     u'Subscribe',
-    u'Transaction'
+    u'Transaction',
+    u'IDEMPOTENT'
 ]
 
+# Commands, which can be send again after a connection failure, without changing data or their result.
+IDEMPOTENT = frozenset([
+    u'BITCOUNT', u'BITPOS', u'DUMP', u'ECHO', u'EXISTS', u'GEODIST', u'GEOHASH', u'GEOPOS',
+    u'GET', u'GETBIT', u'GETRANGE', u'HEXISTS', u'HGET', u'HGETALL', u'HKEYS', u'HLEN', u'HMGET',
+    u'HSCAN', u'HSTRLEN', u'HVALS', u'KEYS', u'LINDEX', u'LLEN', u'LRANGE', u'MGET', u'OBJECT',
+    u'PFCOUNT', u'PING', u'PTTL', u'RANDOMKEY', u'SCAN', u'SCARD', u'SDIFF', u'SINTER', u'SISMEMBER',
+    u'SMEMBERS', u'SRANDMEMBER', u'SSCAN', u'STRLEN', u'SUNION', u'TTL', u'TYPE', u'ZCARD', u'ZCOUNT',
+    u'ZLEXCOUNT', u'ZRANGE', u'ZRANGEBYLEX', u'ZRANGEBYSCORE', u'ZRANK', u'ZREVRANGE', u'ZREVRANGEBYLEX',
+    u'ZREVRANGEBYSCORE', u'ZREVRANK', u'ZSCAN', u'ZSCORE'
+])
+
 
 class BaseCommand(object):
     def __init__(self):
@@ -152,11 +164,13 @@ class Key(BaseCommand):
     def dump(self, *args):
         u""" Execute DUMP Command, consult Redis documentation for details.
 
+        The serialized value is binary, so it is returned without decoding.
+
         :return: result, exception
         """
         if self._cluster:
-            return self.execute(u'DUMP', *args, shard_key=args[0])
-        return self.execute(u'DUMP', *args)
+            return self.execute(u'DUMP', *args, shard_key=args[0], decode=False)
+        return self.execute(u'DUMP', *args, decode=False)
 
     def exists(self, *args):
         u""" Execute EXISTS Command, consult Redis documentation for details.
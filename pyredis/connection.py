@@ -1,16 +1,80 @@
 from __future__ import absolute_import
 from pyredis.exceptions import *
-from pyredis.protocol import writer
+from pyredis.protocol import ARRAY_TYPECODES, STREAM_END, PushReply, decode_reply, encode_parts, numeric_array, pack_commands
+from pyredis.protocol import Reader as PythonReader
+from pyredis.resolver import shared_resolver
+import errno
+import os
+import select
 import socket
+import struct
+import sys
+import time
 try:
-    from hiredis import Reader
+    from hiredis import Reader as HiredisReader
 except ImportError:
-    from pyredis.protocol import Reader
+    HiredisReader = None
+
+Reader = HiredisReader or PythonReader
 
 __all__ = [
     u'Connection'
 ]
 
+HAS_POLL = hasattr(select, u'poll')
+
+HAS_SENDMSG = hasattr(socket.socket, u'sendmsg')
+
+PARSERS = (u'auto', u'hiredis', u'python')
+
+PROTOCOLS = (2, 3)
+
+# Delay before the next address is tried, while earlier connection attempts are pending (RFC 8305).
+CONNECT_ATTEMPT_DELAY = 0.25
+CONNECT_IN_PROGRESS = frozenset([
+    errno.EINPROGRESS,
+    errno.EWOULDBLOCK,
+    getattr(errno, u'WSAEWOULDBLOCK', errno.EWOULDBLOCK)
+])
+
+RECV_BUFFER_SIZE = 1500
+RECV_BUFFER_SIZE_MAX = 1048576
+
+# Not exposed by the socket module of older Python versions, the values are Linux specific.
+if sys.platform.startswith(u'linux'):
+    TCP_KEEPIDLE = getattr(socket, u'TCP_KEEPIDLE', 4)
+    TCP_KEEPINTVL = getattr(socket, u'TCP_KEEPINTVL', 5)
+    TCP_KEEPCNT = getattr(socket, u'TCP_KEEPCNT', 6)
+    TCP_USER_TIMEOUT = getattr(socket, u'TCP_USER_TIMEOUT', 18)
+    SO_PEERCRED = getattr(socket, u'SO_PEERCRED', 17)
+else:
+    # macOS names the idle time TCP_KEEPALIVE
+    TCP_KEEPIDLE = getattr(socket, u'TCP_KEEPIDLE', getattr(socket, u'TCP_KEEPALIVE', None))
+    TCP_KEEPINTVL = getattr(socket, u'TCP_KEEPINTVL', None)
+    TCP_KEEPCNT = getattr(socket, u'TCP_KEEPCNT', None)
+    TCP_USER_TIMEOUT = getattr(socket, u'TCP_USER_TIMEOUT', None)
+    SO_PEERCRED = getattr(socket, u'SO_PEERCRED', None)
+
+# struct ucred, pid, uid and gid of the peer of a unix socket
+UCRED = struct.Struct(u'3i')
+
+
+def unix_address(unix_sock):
+    u""" Return the address to connect for unix_sock.
+
+    A leading @ denotes a socket in the Linux abstract namespace, like in the output of ss,
+    its address starts with a null byte instead.
+
+    :param unix_sock:
+        Path of a unix socket, or @name of an abstract one.
+    :type unix_sock: str
+
+    :return: str
+    """
+    if unix_sock.startswith(u'@'):
+        return u'\0' + unix_sock[1:]
+    return unix_sock
+
 
 class Connection(object):
     u""" Low level client for talking to a Redis Server.
@@ -31,6 +95,7 @@ class Connection(object):
     :param unix_sock:
         Unix Socket to connect,
         can only be set when host is None.
+        A name starting with @ connects a socket in the Linux abstract namespace, like @redis.
     :type unix_sock: str
 
     :param database:
@@ -46,7 +111,9 @@ class Connection(object):
     :type encoding: str
 
     :param conn_timeout:
-        Connect Timeout.
+        Connect Timeout. If host resolves to several addresses, they are tried in parallel,
+        staggered by CONNECT_ATTEMPT_DELAY, and share this timeout. Lookups are cached by
+        pyredis.resolver.shared_resolver.
     :type conn_timeout: float
 
     :param read_timeout:
@@ -57,6 +124,99 @@ class Connection(object):
         If True, authentication and database selection is skipped.
     :type sentinel: bool
 
+    :param client_name:
+        Name set with CLIENT SETNAME after connecting. If None, no name is set.
+    :type client_name: str
+
+    :param reconnect_policy:
+        If set, a connection lost to an error is not closed for good, the next command reconnects,
+        spaced out by the backoff and circuit breaker of the policy,
+        and idempotent commands are retried, if the policy allows it.
+        Share one policy between connections to the same server, so they back off together.
+        If None, the connection is closed after an error.
+    :type reconnect_policy: pyredis.reconnect.ReconnectPolicy
+
+    :param recv_buffer_size:
+        Number of bytes to receive from the socket at once.
+    :type recv_buffer_size: int
+
+    :param recv_buffer_adaptive:
+        If True, the receive size doubles, up to RECV_BUFFER_SIZE_MAX, whenever a receive
+        filled the whole buffer, and shrinks back towards recv_buffer_size for small replies.
+        Data is received into a reusable buffer, instead of allocating a new string per call.
+    :type recv_buffer_adaptive: bool
+
+    :param parser:
+        Reply parser to use, one of 'auto', 'hiredis' or 'python'.
+        'auto' uses hiredis if it is installed, and falls back to the pure Python parser.
+        Strings, which can not be decoded with encoding, are returned undecoded by the pure Python parser,
+        hiredis raises UnicodeDecodeError instead.
+    :type parser: str
+
+    :param lazy_decode:
+        If True and encoding is set, strings are returned as pyredis.protocol.LazyString,
+        which keeps the raw bytes and only decodes them, when its text attribute is accessed.
+        Only supported by the pure Python parser, 'auto' selects it in this case.
+    :type lazy_decode: bool
+
+    :param protocol:
+        RESP protocol version, 2 or 3. With 3, HELLO 3 is send after connecting,
+        and replies use the RESP3 types, maps are returned as dict, sets as set,
+        and push frames as pyredis.protocol.PushReply.
+        Only supported by the pure Python parser, 'auto' selects it in this case.
+    :type protocol: int
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames received while reading replies.
+        If None, push frames are returned by read, like any other reply.
+    :type push_handler: callable
+
+    :param tcp_nodelay:
+        Disable Nagle's algorithm, so small commands are send right away.
+    :type tcp_nodelay: bool
+
+    :param keepalive:
+        Enable TCP keepalive, so dead peers are detected without sending a command.
+    :type keepalive: bool
+
+    :param keepalive_idle:
+        Seconds the connection has to be idle, before keepalive probes are send.
+        If None, the system default is used.
+    :type keepalive_idle: int
+
+    :param keepalive_interval:
+        Seconds between keepalive probes. If None, the system default is used.
+    :type keepalive_interval: int
+
+    :param keepalive_count:
+        Number of unanswered keepalive probes, before the connection is dropped.
+        If None, the system default is used.
+    :type keepalive_count: int
+
+    :param so_sndbuf:
+        Size of the kernel send buffer in bytes. If None, the system default is used.
+    :type so_sndbuf: int
+
+    :param so_rcvbuf:
+        Size of the kernel receive buffer in bytes. If None, the system default is used.
+    :type so_rcvbuf: int
+
+    :param tcp_user_timeout:
+        Milliseconds transmitted data may remain unacknowledged, before the connection
+        is dropped (TCP_USER_TIMEOUT, Linux only). If None, the system default is used.
+    :type tcp_user_timeout: int
+
+    :param peer_uid:
+        Only used with unix_sock. If set, the user id of the process, that accepted the connection,
+        is checked with SO_PEERCRED (Linux only), and the connection is refused, if it does not match.
+        Abstract sockets have no file permissions, any local user can bind their name first.
+    :type peer_uid: int
+
+    The handshake, AUTH, HELLO, SELECT and CLIENT SETNAME, is send as a single pipelined write,
+    in front of the first command, and its replies are checked, before the reply of that command is read.
+    If a database other than 0 is selected, the handshake is send and checked right after connecting,
+    so no command runs against the wrong database if SELECT fails.
+
     """
     def __init__(
             self,
@@ -68,17 +228,71 @@ class Connection(object):
             encoding=None,
             conn_timeout=2,
             read_timeout=2,
-            sentinel=False):
+            sentinel=False,
+            recv_buffer_size=RECV_BUFFER_SIZE,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None,
+            peer_uid=None,
+            client_name=None,
+            reconnect_policy=None):
 
         if not bool(host) != bool(unix_sock):
             raise PyRedisError(u'Ether host or unix_sock has to be provided')
+        if parser not in PARSERS:
+            raise PyRedisError(u'Unknown parser {0}, has to be one of {1}'.format(parser, PARSERS))
+        if parser == u'hiredis' and not HiredisReader:
+            raise PyRedisError(u'Parser hiredis requested, but hiredis is not installed')
+        if parser == u'hiredis' and lazy_decode:
+            raise PyRedisError(u'lazy_decode is not supported by the hiredis parser')
+        if protocol not in PROTOCOLS:
+            raise PyRedisError(u'Unknown protocol {0}, has to be one of {1}'.format(protocol, PROTOCOLS))
+        if parser == u'hiredis' and protocol == 3:
+            raise PyRedisError(u'RESP3 is not supported by the hiredis parser')
+        if unix_sock and unix_sock.startswith(u'@') and not sys.platform.startswith(u'linux'):
+            raise PyRedisError(u'Abstract unix sockets are only supported on Linux')
+        if peer_uid is not None and SO_PEERCRED is None:
+            raise PyRedisError(u'peer_uid requires SO_PEERCRED, which is not supported on this platform')
         self._closed = False
         self._conn_timeout = conn_timeout
         self._read_timeout = read_timeout
         self._encoding = encoding
+        self._lazy_decode = lazy_decode
+        self._parser = parser
+        self._protocol = protocol
+        self._push_handler = push_handler
+        self._tcp_nodelay = tcp_nodelay
+        self._keepalive = keepalive
+        self._keepalive_idle = keepalive_idle
+        self._keepalive_interval = keepalive_interval
+        self._keepalive_count = keepalive_count
+        self._so_sndbuf = so_sndbuf
+        self._so_rcvbuf = so_rcvbuf
+        self._tcp_user_timeout = tcp_user_timeout
+        self._peer_uid = peer_uid
+        self._client_name = client_name
+        self._reconnect_policy = reconnect_policy
+        self._reconnecting = False
+        self._handshake = None
+        self._handshake_replies = 0
         self._reader = None
+        self._recv_buf = None
+        self._stream = None
+        self._recv_buffer_size = recv_buffer_size
+        self._recv_buffer_adaptive = recv_buffer_adaptive
+        self._recv_size = recv_buffer_size
         self._sentinel = sentinel
-        self._writer = writer
+        self._writer = encode_parts
         self._sock = None
         self.host = host
         self.port = port
@@ -86,90 +300,315 @@ class Connection(object):
         self.password = password
         self.database = database
 
-    def _authenticate(self):
-        if self._sentinel:
-            return
-        if self.password:
-            self.write(u'AUTH', self.password)
-            try:
-                self.read()
-            except ReplyError, err:
-                self.close()
-                raise err
-
     def _connect(self):
         if self._closed:
             raise PyRedisConnError(u'Connection Gone')
-        if self.host:
-            sock = self._connect_inet46()
-        else:
-            sock = self._connect_unix()
+        policy = self._reconnect_policy
+        endpoint = self.unix_sock or u'{0}:{1}'.format(self.host, self.port)
+        if policy:
+            policy.before_connect(endpoint, self._reconnecting)
+        try:
+            if self.host:
+                sock = self._connect_inet46()
+            else:
+                sock = self._connect_unix()
+        except Exception:
+            if policy:
+                policy.connect_failed(endpoint)
+            raise
+        if policy:
+            policy.connect_succeeded(endpoint)
+        self._reconnecting = False
         self._sock = sock
-        if self._encoding:
-            self._reader = Reader(encoding=self._encoding)
+        reader = self._get_reader_class()
+        if self._encoding and self._lazy_decode:
+            self._reader = reader(encoding=self._encoding, lazy_decode=True)
+        elif self._encoding:
+            self._reader = reader(encoding=self._encoding)
         else:
-            self._reader = Reader()
-        if not self._sentinel:
-            self._authenticate()
-            self._setdb()
+            self._reader = reader()
+        self._handshake = self._handshake_commands()
+        self._handshake_replies = 0
+        if self._handshake and self.database:
+            self._finish_handshake()
         self._sock.settimeout(self._read_timeout)
 
+    def _connect_for_read(self):
+        if self._reconnecting:
+            # replies to commands written before the connection was lost will never arrive
+            raise PyRedisConnClosed(u'Connection lost, no replies to read')
+        self._connect()
+
     def _connect_inet46(self):
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self._conn_timeout)
-            sock.connect((self.host, self.port))
-        except socket.gaierror:
-            try:
-                sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-                sock.settimeout(self._conn_timeout)
-                sock.connect((self.host, self.port))
-            except socket.gaierror:
-                raise PyRedisConnError(u'Host is neither a IPv4 or IPv6 address')
-        except (
-            ConnectionAbortedError,
-            ConnectionRefusedError,
-            OverflowError,
-            socket.timeout,
-            OSError
-        ), err:
-            self.close()
+            addrs = shared_resolver.resolve(self.host, self.port)
+        except (socket.gaierror, OverflowError), err:
+            self._disconnect()
+            raise PyRedisConnError(u'Could not resolve {0}: {1}'.format(self.host, err))
+        try:
+            sock, sockaddr = self._connect_addrs(addrs)
+        except (OverflowError, socket.timeout, socket.error, OSError), err:
+            shared_resolver.invalidate(self.host, self.port)
+            self._disconnect()
             raise PyRedisConnError(u'Could not Connect to {0}:{1}: {2}'.format(
                 self.host,
                 self.port,
                 err
             ))
+        shared_resolver.prefer(self.host, self.port, sockaddr)
+        sock.settimeout(self._conn_timeout)
         return sock
 
+    def _connect_addrs(self, addrs):
+        u""" Connect to the first address that accepts, racing the attempts as described in RFC 8305.
+
+        A new attempt is started every CONNECT_ATTEMPT_DELAY seconds while earlier attempts
+        are pending, or right away when one fails. All attempts share the connect timeout.
+
+        :param addrs:
+            Addresses as returned by pyredis.resolver.Resolver.resolve.
+        :type addrs: list
+
+        :return: tuple of the connected socket and its address
+        """
+        addrs = list(addrs)
+        deadline = None
+        if self._conn_timeout is not None:
+            deadline = time.time() + self._conn_timeout
+        pending = {}
+        error = socket.error(u'No address found for {0}'.format(self.host))
+        next_attempt = 0
+        try:
+            while addrs or pending:
+                now = time.time()
+                if deadline is not None and now >= deadline:
+                    raise socket.timeout(u'timed out')
+                if addrs and now >= next_attempt:
+                    family, socktype, proto, _, sockaddr = addrs.pop(0)
+                    sock = socket.socket(family, socktype, proto)
+                    pending[sock] = sockaddr
+                    self._set_sockopts(sock)
+                    sock.setblocking(0)
+                    err = sock.connect_ex(sockaddr)
+                    if not err:
+                        del pending[sock]
+                        return sock, sockaddr
+                    if err not in CONNECT_IN_PROGRESS:
+                        del pending[sock]
+                        sock.close()
+                        error = socket.error(err, os.strerror(err))
+                        continue
+                    next_attempt = now + CONNECT_ATTEMPT_DELAY
+                if not pending:
+                    continue
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - now
+                if addrs:
+                    timeout = min(timeout, next_attempt - now) if timeout is not None else next_attempt - now
+                _, writable, _ = select.select([], list(pending), [], timeout)
+                for sock in writable:
+                    sockaddr = pending.pop(sock)
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if not err:
+                        return sock, sockaddr
+                    sock.close()
+                    error = socket.error(err, os.strerror(err))
+                    next_attempt = 0
+            raise error
+        finally:
+            for sock in pending:
+                sock.close()
+
     def _connect_unix(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         try:
-            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._set_sockopts(sock, tcp=False)
             sock.settimeout(self._conn_timeout)
-            sock.connect(self.unix_sock)
-        except (
-            ConnectionAbortedError,
-            ConnectionRefusedError,
-            FileNotFoundError,
-            socket.timeout,
-            OSError
-        ), err:
-            self.close()
+            sock.connect(unix_address(self.unix_sock))
+        except (socket.timeout, socket.error, OSError), err:
+            sock.close()
+            self._disconnect()
             raise PyRedisConnError(u'Could not Connect to {0}: {1}'.format(
-                self.host,
+                self.unix_sock,
                 err
             ))
+        if self._peer_uid is not None:
+            _, uid, _ = self._get_peer_credentials(sock)
+            if uid != self._peer_uid:
+                sock.close()
+                self._disconnect()
+                raise PyRedisConnError(u'Refusing {0}, the peer runs as uid {1} instead of {2}'.format(
+                    self.unix_sock,
+                    uid,
+                    self._peer_uid
+                ))
         return sock
 
-    def _setdb(self):
+    @staticmethod
+    def _get_peer_credentials(sock):
+        return UCRED.unpack(sock.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, UCRED.size))
+
+    def _get_reader_class(self):
+        if self._parser == u'hiredis':
+            return HiredisReader
+        elif self._parser == u'python' or self._lazy_decode or self._protocol == 3:
+            return PythonReader
+        return Reader
+
+    def _drain(self, replies):
+        while True:
+            result = self._reader.gets()
+            if result is False:
+                return
+            if self._push_handler and isinstance(result, PushReply):
+                self._push_handler(result)
+                continue
+            replies.append(result)
+
+    def _finish_handshake(self):
+        if self._handshake:
+            self._write_chunks([])
+        if not self._handshake_replies:
+            return
+        num = self._handshake_replies
+        self._handshake_replies = 0
+        # a handshake reply left unread would be returned for the next command, always close on timeout
+        for result in self.read_many(num, close_on_timeout=True, raise_on_result_err=False):
+            if isinstance(result, Exception):
+                self._disconnect()
+                raise result
+
+    def _handshake_commands(self):
+        commands = []
         if self._sentinel:
+            return commands
+        if self.password:
+            commands.append((u'AUTH', self.password))
+        if self._protocol != 2:
+            commands.append((u'HELLO', self._protocol))
+        if self.database:
+            commands.append((u'SELECT', self.database))
+        if self._client_name:
+            commands.append((u'CLIENT', u'SETNAME', self._client_name))
+        return commands
+
+    def _recv(self):
+        size = self._recv_size
+        if hasattr(self._reader, u'recv_into'):
+            received = self._reader.recv_into(self._sock, size)
+        elif self._recv_buffer_adaptive:
+            if self._recv_buf is None or len(self._recv_buf) < size:
+                self._recv_buf = bytearray(size)
+            received = self._sock.recv_into(self._recv_buf, size)
+            if received:
+                self._reader.feed(self._recv_buf, 0, received)
+        else:
+            data = self._sock.recv(size)
+            if data:
+                self._reader.feed(data)
+            received = len(data)
+        if self._recv_buffer_adaptive:
+            if received >= size:
+                self._recv_size = min(size * 2, RECV_BUFFER_SIZE_MAX)
+            elif received < size // 2:
+                self._recv_size = max(size // 2, self._recv_buffer_size)
+        return received
+
+    def _send(self, chunks):
+        for chunk in chunks:
+            view = None
+            chunk_len = len(chunk)
+            bytes_sent = self._sock.send(chunk)
+            while bytes_sent < chunk_len:
+                if view is None:
+                    view = memoryview(chunk)
+                bytes_sent += self._sock.send(view[bytes_sent:])
+
+    def _sendmsg(self, chunks):
+        views = [memoryview(chunk) for chunk in chunks]
+        pos = 0
+        while pos < len(views):
+            sent = self._sock.sendmsg(views[pos:])
+            while sent:
+                if sent >= len(views[pos]):
+                    sent -= len(views[pos])
+                    pos += 1
+                else:
+                    views[pos] = views[pos][sent:]
+                    sent = 0
+
+    def _wait_duplex(self):
+        u""" Wait until the socket is readable or writable, and return both as tuple of bools.
+
+        poll is used where available, as select can not watch file descriptors above FD_SETSIZE.
+        """
+        if HAS_POLL:
+            poller = select.poll()
+            poller.register(self._sock, select.POLLIN | select.POLLOUT)
+            timeout = None if self._read_timeout is None else self._read_timeout * 1000
+            events = 0
+            for _, event in poller.poll(timeout):
+                events |= event
+            return bool(events & (select.POLLIN | select.POLLERR | select.POLLHUP)), bool(events & select.POLLOUT)
+        readable, writable, _ = select.select([self._sock], [self._sock], [], self._read_timeout)
+        return bool(readable), bool(writable)
+
+    def _set_sockopts(self, sock, tcp=True):
+        u""" Apply the configured socket options, before the socket gets connected.
+
+        Buffer sizes have to be set before connecting, to be taken into account
+        for the TCP window scaling. Options not supported by the platform are skipped.
+        """
+        if self._so_sndbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._so_sndbuf)
+        if self._so_rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._so_rcvbuf)
+        if not tcp:
             return
-        self._sock.settimeout(0.1)
-        self.write(u'SELECT', self.database)
+        if self._tcp_nodelay:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._keepalive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for option, value in (
+                    (TCP_KEEPIDLE, self._keepalive_idle),
+                    (TCP_KEEPINTVL, self._keepalive_interval),
+                    (TCP_KEEPCNT, self._keepalive_count)):
+                if option is not None and value is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, option, value)
+        if self._tcp_user_timeout is not None and TCP_USER_TIMEOUT is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, TCP_USER_TIMEOUT, self._tcp_user_timeout)
+
+    def _write_chunks(self, chunks):
+        if self._handshake:
+            buf = pack_commands(self._handshake)
+            if chunks:
+                buf += chunks[0]
+            chunks = [buf] + list(chunks[1:])
+            self._handshake_replies = len(self._handshake)
+            self._handshake = None
         try:
-            self.read()
-        except ReplyError, err:
+            if HAS_SENDMSG:
+                self._sendmsg(chunks)
+            else:
+                self._send(chunks)
+        except socket.timeout:
+            self._disconnect()
+            raise PyRedisConnReadTimeout(u'Connection timeout while writing')
+        except socket.error, err:
+            self._disconnect()
+            raise PyRedisConnError(u'Connection lost while writing: {0}'.format(err))
+
+    def _disconnect(self):
+        self._stream = None
+        if not self._reconnect_policy:
             self.close()
-            raise err
+            return
+        if self._sock:
+            self._sock.close()
+        self._sock = None
+        self._reader = None
+        self._reconnecting = True
 
     def close(self):
         u""" Close Client Connection.
@@ -188,7 +627,65 @@ class Connection(object):
     def closed(self):
         return self._closed
 
-    def read(self, close_on_timeout=True, raise_on_result_err=True):
+    @property
+    def parser(self):
+        u""" Return the name of the reply parser used by this connection.
+
+        :return: str, 'hiredis' or 'python'
+        """
+        if HiredisReader and self._get_reader_class() is HiredisReader:
+            return u'hiredis'
+        return u'python'
+
+    @property
+    def peer_credentials(self):
+        u""" Return the credentials of the process, that accepted the unix socket (Linux only).
+
+        :return: tuple of pid, uid and gid, None if not connected by unix socket, or not supported
+        """
+        if not self._sock or not self.unix_sock or SO_PEERCRED is None:
+            return None
+        return self._get_peer_credentials(self._sock)
+
+    @property
+    def protocol(self):
+        u""" Return the RESP protocol version used by this connection.
+
+        :return: int
+        """
+        return self._protocol
+
+    @property
+    def reconnect_policy(self):
+        u""" Return the reconnect policy of this connection.
+
+        :return: pyredis.reconnect.ReconnectPolicy, None
+        """
+        return self._reconnect_policy
+
+    @property
+    def recv_buffer_size(self):
+        u""" Return the number of bytes, the next receive call will ask for.
+
+        :return: int
+        """
+        return self._recv_size
+
+    def _fill(self, close_on_timeout):
+        try:
+            received = self._recv()
+        except socket.timeout:
+            if close_on_timeout:
+                self._disconnect()
+            raise PyRedisConnReadTimeout(u'Connection timeout while reading')
+        except socket.error, err:
+            self._disconnect()
+            raise PyRedisConnError(u'Connection lost while reading: {0}'.format(err))
+        if not received:
+            self._disconnect()
+            raise PyRedisConnClosed(u'Connection went away while reading')
+
+    def read(self, close_on_timeout=True, raise_on_result_err=True, decode=True, as_array=None):
         u""" Read result from the socket.
 
         :param close_on_timeout:
@@ -199,30 +696,202 @@ class Connection(object):
             Raise exception on protocol errors
         :type raise_on_result_err: bool
 
+        :param decode:
+            If False, return the raw result, even if an encoding is set.
+        :type decode: bool
+
+        :param as_array:
+            array.array typecode, like 'd' or 'q'. If set, an array reply holding only numbers
+            is returned as array.array, or as numpy array if numpy is installed,
+            without decoding its elements first. Other replies are returned as usual.
+            The reply is converted after it has been parsed, see pyredis.protocol.numeric_array.
+        :type as_array: str
+
         :return: result, exception
         """
+        if self._stream is not None:
+            self._finish_stream()
+        if as_array:
+            if as_array not in ARRAY_TYPECODES:
+                raise PyRedisError(u'Unsupported typecode {0} for as_array'.format(as_array))
+            result = self.read(close_on_timeout, raise_on_result_err, decode=False)
+            converted = numeric_array(result, as_array)
+            if converted is not None:
+                return converted
+            if decode and self._encoding:
+                return decode_reply(result, self._encoding)
+            return result
         if not self._sock:
-            self._connect()
+            self._connect_for_read()
+        if self._handshake or self._handshake_replies:
+            self._finish_handshake()
+        if not decode and self._encoding and hasattr(self._reader, u'set_encoding'):
+            self._reader.set_encoding(None)
+            try:
+                return self.read(close_on_timeout, raise_on_result_err)
+            finally:
+                if self._reader:
+                    self._reader.set_encoding(self._encoding)
         while True:
             result = self._reader.gets()
             if result is not False:
+                if self._push_handler and isinstance(result, PushReply):
+                    self._push_handler(result)
+                    continue
                 if raise_on_result_err:
                     if isinstance(result, Exception):
                         raise result
                 return result
-            try:
-                data = self._sock.recv(1500)
-            except socket.timeout:
-                if close_on_timeout:
-                    self.close()
-                raise PyRedisConnReadTimeout(u'Connection timeout while reading')
-            except ConnectionResetError:
-                self.close()
-                raise PyRedisConnError(u'Connection reset by peer')
-            if not data:
-                self.close()
-                raise PyRedisConnClosed(u'Connection went away while reading')
-            self._reader.feed(data)
+            self._fill(close_on_timeout)
+
+    def read_many(self, num, close_on_timeout=True, raise_on_result_err=True):
+        u""" Read num results from the socket.
+
+        All complete replies already buffered are extracted in one pass,
+        the socket is only read from, if less then num replies are available.
+
+        :param num:
+            Number of results to read.
+        :type num: int
+
+        :param close_on_timeout:
+            Close the connection after a read timeout
+        :type close_on_timeout: book
+
+        :param raise_on_result_err:
+            Raise the first error result, after all num results have been read.
+        :type raise_on_result_err: bool
+
+        :return: list, exception
+        """
+        if self._stream is not None:
+            self._finish_stream()
+        results = []
+        if not num:
+            return results
+        if not self._sock:
+            self._connect_for_read()
+        if self._handshake or self._handshake_replies:
+            self._finish_handshake()
+        gets_many = getattr(self._reader, u'gets_many', None)
+        while True:
+            if gets_many:
+                while len(results) < num:
+                    replies = gets_many(num - len(results))
+                    if not replies:
+                        break
+                    if self._push_handler:
+                        replies = self._dispatch_pushes(replies)
+                    results.extend(replies)
+            else:
+                while len(results) < num:
+                    result = self._reader.gets()
+                    if result is False:
+                        break
+                    results.append(result)
+            if len(results) == num:
+                break
+            self._fill(close_on_timeout)
+        if raise_on_result_err:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def read_stream(self, close_on_timeout=True, raise_on_result_err=True):
+        u""" Read a single result from the socket, yielding its elements as they arrive.
+
+        If the result is an array, its elements are yielded one at a time,
+        so memory stays bounded by the receive buffer, instead of the size of the reply.
+        Any other result is yielded as a single element, an empty or nil array yields nothing.
+        Nested arrays inside the result are yielded as complete lists.
+
+        Until the generator is exhausted, the stream stays open on the connection.
+        Reading or writing anything else in the meantime first reads and drops the rest of the reply,
+        so it never gets mixed up with the following replies.
+        If the generator is closed early, the rest of the reply is left unread
+        and the connection gets closed.
+
+        The hiredis parser can not return partial replies,
+        in this case the whole reply is read, before the first element is yielded,
+        and a nil array is yielded as None.
+
+        :param close_on_timeout:
+            Close the connection after a read timeout
+        :type close_on_timeout: book
+
+        :param raise_on_result_err:
+            Raise the first error element, after the rest of the reply has been read.
+        :type raise_on_result_err: bool
+
+        :return: generator
+        """
+        if self._stream is not None:
+            self._finish_stream()
+        # the handshake replies are read with read_many, which would drain the stream itself
+        if not self._sock:
+            self._connect_for_read()
+        if self._handshake or self._handshake_replies:
+            self._finish_handshake()
+        self._stream = self._read_stream(close_on_timeout, raise_on_result_err)
+        return self._stream
+
+    def _read_stream(self, close_on_timeout, raise_on_result_err):
+        gets_stream = getattr(self._reader, u'gets_stream', None)
+        if not gets_stream:
+            self._stream = None
+            result = self.read(close_on_timeout, raise_on_result_err)
+            if isinstance(result, list):
+                for element in result:
+                    yield element
+            else:
+                yield result
+            return
+        finished = False
+        started = False
+        error = None
+        try:
+            while True:
+                element = gets_stream()
+                if element is False:
+                    self._fill(close_on_timeout)
+                    continue
+                if not started and self._push_handler and isinstance(element, PushReply):
+                    # a push frame ahead of the reply is returned whole, drop the STREAM_END following it
+                    self._push_handler(element)
+                    gets_stream()
+                    continue
+                started = True
+                if element is STREAM_END:
+                    finished = True
+                    break
+                elif raise_on_result_err and isinstance(element, Exception):
+                    error = error or element
+                elif not error:
+                    yield element
+        finally:
+            self._stream = None
+            if not finished:
+                self._disconnect()
+        if error:
+            raise error
+
+    def _finish_stream(self):
+        stream, self._stream = self._stream, None
+        try:
+            for _ in stream:
+                pass
+        except ReplyError:
+            pass
+
+    def _dispatch_pushes(self, results):
+        replies = []
+        for result in results:
+            if isinstance(result, PushReply):
+                self._push_handler(result)
+            else:
+                replies.append(result)
+        return replies
 
     def write(self, *args):
         u""" Write commands to socket.
@@ -233,15 +902,67 @@ class Connection(object):
 
         :return: None
         """
+        if self._stream is not None:
+            self._finish_stream()
         if not self._sock:
             self._connect()
-        msg = self._writer(*args)
-        msg_len = len(msg)
-        bytes_sent = 0
-        while bytes_sent < msg_len:
-            try:
-                sent = self._sock.send(msg[bytes_sent:])
-            except BrokenPipeError, err:
-                self.close()
-                raise PyRedisConnError(u'Connection lost while writing: {0}'.format(err))
-            bytes_sent += sent
+        self._write_chunks(self._writer(*args))
+
+    def write_packed(self, data):
+        u""" Write already encoded commands to socket.
+
+        :param data:
+            One or more commands, as encoded by pyredis.protocol.writer or pack_commands.
+        :type data: str, bytearray
+
+        :return: None
+        """
+        if self._stream is not None:
+            self._finish_stream()
+        if not self._sock:
+            self._connect()
+        self._write_chunks([data])
+
+    def write_packed_duplex(self, data):
+        u""" Write already encoded commands to socket, reading replies while writing.
+
+        Whenever the socket is readable, the pending replies are received, before writing on.
+        Redis can so always flush its output buffer, and writing a big batch of commands
+        with big replies neither stalls, nor hits the client-output-buffer-limit of the server.
+
+        :param data:
+            One or more commands, as encoded by pyredis.protocol.writer or pack_commands.
+        :type data: str, bytearray
+
+        :raises: PyRedisConnError, if the connection got lost while writing.
+            PyRedisConnReadTimeout, if the socket got neither readable nor writable within read_timeout.
+
+        :return: list, the complete replies read while writing, error replies included as exceptions.
+        """
+        if self._stream is not None:
+            self._finish_stream()
+        if not self._sock:
+            self._connect()
+        if self._handshake or self._handshake_replies:
+            self._finish_handshake()
+        replies = []
+        view = memoryview(data)
+        pos = 0
+        while pos < len(view):
+            readable, writable = self._wait_duplex()
+            if not readable and not writable:
+                self._disconnect()
+                raise PyRedisConnReadTimeout(u'Connection timeout while writing')
+            if readable:
+                self._fill(close_on_timeout=True)
+                self._drain(replies)
+            if writable:
+                try:
+                    pos += self._sock.send(view[pos:])
+                except socket.timeout:
+                    self._disconnect()
+                    raise PyRedisConnReadTimeout(u'Connection timeout while writing')
+                except socket.error, err:
+                    self._disconnect()
+                    raise PyRedisConnError(u'Connection lost while writing: {0}'.format(err))
+        return replies
@@ -6,6 +6,7 @@ __all__ = [
     u'PyRedisError',
     u'PyRedisURLError',
     u'PyRedisConnError',
+    u'PyRedisCircuitOpen',
     u'PyRedisConnClosed',
     u'PyRedisConnReadTimeout',
     u'ProtocolError',
@@ -25,6 +26,10 @@ class PyRedisConnError(PyRedisError):
     pass
 
 
+class PyRedisCircuitOpen(PyRedisConnError):
+    pass
+
+
 class PyRedisConnReadTimeout(PyRedisError):
     pass
 
@@ -13,6 +13,9 @@ from itertools import izip
 
 
 def dict_from_list(source):
+    if isinstance(source, dict):
+        # RESP3 map replies are already parsed into a dict
+        return source
     return dict(izip(*[iter(source)]*2))
 
 
@@ -0,0 +1,334 @@
+from __future__ import absolute_import
+from collections import deque
+from itertools import count
+from Queue import Empty, Queue
+import threading
+
+from pyredis import commands
+from pyredis.connection import Connection
+from pyredis.exceptions import *
+from pyredis.protocol import writer
+
+__all__ = [
+    u'MultiplexClient',
+    u'MultiplexConnection',
+    u'MultiplexFuture'
+]
+
+BATCH_SIZE = 1024
+
+
+def _conn_error(err):
+    if isinstance(err, PyRedisError):
+        return err
+    return PyRedisConnError(u'Connection lost: {0}'.format(err))
+
+
+class MultiplexFuture(object):
+    u""" Result of a command, that becomes available once its reply has been read. """
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        u""" Return True, if the result is available.
+
+        :return: bool
+        """
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        u""" Wait for the reply, and return it.
+
+        :param timeout:
+            Seconds to wait. If None, wait until the reply has been read, or the connection failed.
+        :type timeout: float
+
+        :raises: ReplyError, if the command failed, PyRedisConnError, if the connection failed.
+
+        :return: result
+        """
+        if not self._event.wait(timeout):
+            raise PyRedisConnReadTimeout(u'Timeout while waiting for the result')
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._event.set()
+
+    def set_result(self, result):
+        if isinstance(result, Exception):
+            self._exception = result
+        else:
+            self._result = result
+        self._event.set()
+
+
+class MultiplexConnection(object):
+    u""" Connection shared by many threads, with automatic pipelining.
+
+    Commands from all threads are queued, and written by a single writer thread,
+    which writes everything queued since its last write at once.
+    A reader thread reads the replies, and hands them out in the order the commands were written.
+
+    If the connection fails, all commands waiting for their replies fail with the error,
+    and the next command opens a new connection.
+
+    Blocking commands, like BLPOP, hold up all commands written after them.
+
+    :param batch_size:
+        Maximum number of commands written at once.
+    :type batch_size: int
+
+    :param kwargs:
+        All other arguments are the same as for pyredis.connection.Connection.
+    """
+    def __init__(self, batch_size=BATCH_SIZE, **kwargs):
+        self._kwargs = kwargs
+        self._batch_size = batch_size
+        self._closed = False
+        self._stopping = False
+        self._lock = threading.Lock()
+        # held by the writer thread while writing, so a reset by the reader thread
+        # does not close the connection in the middle of a write
+        self._write_lock = threading.Lock()
+        self._inflight_ready = threading.Condition(self._lock)
+        self._pending = Queue()
+        self._conn = Connection(**kwargs)
+        self._inflight = deque()
+        self._writer = self._start(self._write_loop, u'writer')
+        self._reader = self._start(self._read_loop, u'reader')
+
+    @staticmethod
+    def _start(target, name):
+        thread = threading.Thread(target=target, name=u'pyredis-multiplex-{0}'.format(name))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _reset(self, conn, err):
+        with self._lock:
+            if conn is not self._conn:
+                return
+            inflight = self._inflight
+            self._conn = Connection(**self._kwargs)
+            self._inflight = deque()
+        with self._write_lock:
+            conn.close()
+        for future, _ in inflight:
+            future.set_exception(_conn_error(err))
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            batch = []
+            item = self._pending.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) == self._batch_size:
+                    break
+                try:
+                    item = self._pending.get_nowait()
+                except Empty:
+                    break
+            stop = item is None
+            if not batch:
+                continue
+            with self._lock:
+                conn = self._conn
+            try:
+                with self._write_lock:
+                    conn.write_packed(bytearray().join(data for data, _, _ in batch))
+            except Exception, err:
+                # the thread has to survive any error, the commands fail instead
+                for _, _, future in batch:
+                    future.set_exception(_conn_error(err))
+                self._reset(conn, err)
+                continue
+            with self._lock:
+                if conn is self._conn:
+                    self._inflight.extend((future, decode) for _, decode, future in batch)
+                    self._inflight_ready.notify()
+                    batch = None
+            if batch:
+                for _, _, future in batch:
+                    future.set_exception(PyRedisConnError(u'Connection lost while writing'))
+
+    def _read_loop(self):
+        while True:
+            with self._lock:
+                while not self._inflight and not self._stopping:
+                    self._inflight_ready.wait()
+                if not self._inflight:
+                    return
+                conn, inflight = self._conn, self._inflight
+                decode = inflight[0][1]
+            try:
+                result = conn.read(raise_on_result_err=False, decode=decode)
+            except Exception, err:
+                self._reset(conn, err)
+                continue
+            with self._lock:
+                if inflight is not self._inflight or not inflight:
+                    continue
+                future, _ = inflight.popleft()
+            future.set_result(result)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        u""" Close the connection.
+
+        Commands already executed are written, and their replies are read, before the socket is closed.
+
+        :return: None
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._pending.put(None)
+        self._writer.join()
+        with self._lock:
+            self._stopping = True
+            self._inflight_ready.notify()
+        self._reader.join()
+        self._conn.close()
+
+    def execute_async(self, *args, **_3to2kwargs):
+        u""" Queue a command, and return a MultiplexFuture for its result.
+
+        :param args:
+            Command and its arguments.
+        :type args: str, int, float
+
+        :param decode:
+            If False, return the raw result, even if an encoding is set.
+        :type decode: bool
+
+        :return: pyredis.multiplex.MultiplexFuture
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        data = writer(*args)
+        future = MultiplexFuture()
+        # checked and queued under the lock, so close can not slip in between,
+        # and every queued command is written before the writer thread stops
+        with self._lock:
+            if self._closed:
+                raise PyRedisConnError(u'Connection Gone')
+            self._pending.put((data, decode, future))
+        return future
+
+
+class MultiplexClient(
+    commands.Connection,
+    commands.Hash,
+    commands.HyperLogLog,
+    commands.Key,
+    commands.List,
+    commands.Publish,
+    commands.Scripting,
+    commands.Set,
+    commands.SSet,
+    commands.String,
+):
+    u""" Thread safe Client, sharing a few connections between all threads.
+
+    Any number of threads can use the same client, their commands are pipelined
+    over the shared connections, see pyredis.multiplex.MultiplexConnection.
+    Each thread always uses the same connection, so commands of one thread
+    are executed in the order they were issued.
+
+    Transactions are not supported, commands of other threads would end up
+    in between MULTI and EXEC, so commands.Transaction is not inherited.
+
+    Inherits the following Commmand classes:
+      - commands.Connection,
+      - commands.Hash,
+      - commands.HyperLogLog,
+      - commands.Key,
+      - commands.List,
+      - commands.Publish,
+      - commands.Scripting,
+      - commands.Set,
+      - commands.SSet,
+      - commands.String
+
+    :param connections:
+        Number of connections to open.
+    :type connections: int
+
+    :param batch_size:
+        Maximum number of commands written at once, per connection.
+    :type batch_size: int
+
+    :param kwargs:
+        All other arguments are the same as for pyredis.connection.Connection.
+    """
+    def __init__(self, connections=1, batch_size=BATCH_SIZE, **kwargs):
+        super(MultiplexClient, self).__init__()
+        if connections < 1:
+            raise PyRedisError(u'At least one connection is required')
+        self._conns = [MultiplexConnection(batch_size=batch_size, **kwargs) for _ in xrange(connections)]
+        self._next_conn = count()
+        self._local = threading.local()
+
+    def _get_conn(self):
+        index = getattr(self._local, u'index', None)
+        if index is None:
+            index = self._local.index = next(self._next_conn) % len(self._conns)
+        return self._conns[index]
+
+    def close(self):
+        u""" Close client, after outstanding commands are finished.
+
+        :return: None
+        """
+        for conn in self._conns:
+            conn.close()
+
+    @property
+    def closed(self):
+        u""" Check if client is closed.
+
+        :return: bool
+        """
+        return self._conns[0].closed
+
+    def execute(self, *args, **_3to2kwargs):
+        u""" Execute arbitrary redis command, and wait for its result.
+
+        :param args:
+        :type args: list, int, float
+
+        :param decode:
+            If False, return the raw result, even if an encoding is set.
+        :type decode: bool
+
+        :return: result, exception
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        return self._get_conn().execute_async(*args, decode=decode).result()
+
+    def execute_async(self, *args, **_3to2kwargs):
+        u""" Execute arbitrary redis command, without waiting for its result.
+
+        :param args:
+        :type args: list, int, float
+
+        :param decode:
+            If False, return the raw result, even if an encoding is set.
+        :type decode: bool
+
+        :return: pyredis.multiplex.MultiplexFuture
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        return self._get_conn().execute_async(*args, decode=decode)
@@ -0,0 +1,347 @@
+from __future__ import absolute_import
+from pyredis import commands
+from pyredis.exceptions import *
+from pyredis.protocol import pack_commands
+
+__all__ = [
+    u'Future',
+    u'Pipeline'
+]
+
+CLUSTER_RETRIES = 3
+
+_CONN_ERRORS = (PyRedisConnError, PyRedisConnClosed, PyRedisConnReadTimeout)
+
+_PENDING = object()
+
+
+class _Command(object):
+    __slots__ = (u'conn', u'args', u'future', u'decode', u'as_array', u'shard_key', u'asking', u'redirects')
+
+    def __init__(self, conn, args, future, decode, as_array, shard_key):
+        self.conn = conn
+        self.args = args
+        self.future = future
+        self.decode = decode
+        self.as_array = as_array
+        self.shard_key = shard_key
+        self.asking = False
+        self.redirects = 0
+
+
+class Future(object):
+    u""" Result of a pipelined command, available once the pipeline has been flushed. """
+    __slots__ = (u'_result', u'_exception')
+
+    def __init__(self):
+        self._result = _PENDING
+        self._exception = None
+
+    def done(self):
+        u""" Return True, if the result is available.
+
+        :return: bool
+        """
+        return self._result is not _PENDING or self._exception is not None
+
+    def exception(self):
+        u""" Return the error of the command, or None if it succeeded.
+
+        :raises: PyRedisError, if the pipeline has not been flushed yet.
+
+        :return: exception, None
+        """
+        if not self.done():
+            raise PyRedisError(u'Pipeline not flushed yet')
+        return self._exception
+
+    def result(self):
+        u""" Return the result of the command.
+
+        :raises: ReplyError, if the command failed, PyRedisConnError, if the connection failed,
+            PyRedisError, if the pipeline has not been flushed yet.
+
+        :return: result
+        """
+        if self._exception is not None:
+            raise self._exception
+        if self._result is _PENDING:
+            raise PyRedisError(u'Pipeline not flushed yet')
+        return self._result
+
+    def set_exception(self, exception):
+        self._exception = exception
+
+    def set_result(self, result):
+        if isinstance(result, Exception):
+            self._exception = result
+        else:
+            self._result = result
+
+
+class Pipeline(
+    commands.Connection,
+    commands.Hash,
+    commands.HyperLogLog,
+    commands.Key,
+    commands.List,
+    commands.Publish,
+    commands.Scripting,
+    commands.Set,
+    commands.SSet,
+    commands.String,
+    commands.Transaction,
+):
+    u""" Buffers commands, and sends them in one go.
+
+    Every command returns a pyredis.pipeline.Future, instead of its result.
+    flush sends all buffered commands with a single write per connection,
+    and reads all their replies with a single batched read per connection.
+    Leaving the with block flushes the pipeline, unless an exception was raised,
+    in which case the buffered commands are discarded.
+
+    If the pipeline was created with release, the client is released once the pipeline
+    has been flushed or discarded, and the pipeline can not be used anymore.
+
+    Pipelines are created by the pipeline method of the clients and pools,
+    and take the same command arguments as the client they were created by.
+
+    With a pyredis.ClusterClient, commands answered with MOVED are send again to the new owner
+    of their slot, after the cluster map was refreshed, and commands answered with ASK are
+    send to the importing node, prefixed with ASKING. Only those commands are send again,
+    at most retries times, all other results are kept.
+    If a node connection fails, the cluster map is refreshed, so the next flush does not
+    go to a failed over master again.
+
+    Example:
+
+        with client.pipeline() as pipe:
+            pipe.set('key', 'value')
+            value = pipe.get('key')
+        value.result()
+
+    :param client:
+        Client, whose connections the commands are send to.
+    :type client: pyredis.Client, pyredis.ClusterClient, pyredis.HashClient
+
+    :param release:
+        Called with client, when the pipeline is flushed or discarded, used by the pools to release the client.
+    :type release: callable
+
+    :param retries:
+        Number of times a command answered with MOVED or ASK is send again, before giving up.
+    :type retries: int
+    """
+    def __init__(self, client, release=None, retries=CLUSTER_RETRIES):
+        super(Pipeline, self).__init__()
+        self._client = client
+        self._cluster = client._cluster
+        self._redirect = getattr(client, u'_pipeline_redirect', None)
+        self._conn_failed = getattr(client, u'_pipeline_conn_failed', None)
+        self._release = release
+        self._retries = retries
+        self._queue = []
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._client is None:
+            return
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def _release_client(self):
+        if self._release:
+            release, self._release = self._release, None
+            client, self._client = self._client, None
+            release(client)
+
+    @staticmethod
+    def _fail(entries, err):
+        for entry in entries:
+            entry.future.set_exception(err)
+
+    @staticmethod
+    def _pack(entries):
+        commands = []
+        for entry in entries:
+            if entry.asking:
+                commands.append((u'ASKING',))
+            commands.append(entry.args)
+        return pack_commands(commands)
+
+    @staticmethod
+    def _read_replies(conn, entries):
+        results = []
+        if all(entry.decode and not entry.as_array for entry in entries):
+            replies = iter(conn.read_many(sum(1 + entry.asking for entry in entries), raise_on_result_err=False))
+            for entry in entries:
+                if entry.asking:
+                    next(replies)
+                results.append(next(replies))
+            return results
+        for entry in entries:
+            if entry.asking:
+                conn.read(raise_on_result_err=False)
+            results.append(conn.read(raise_on_result_err=False, decode=entry.decode, as_array=entry.as_array))
+        return results
+
+    @staticmethod
+    def _redirection(result):
+        if not isinstance(result, ReplyError):
+            return None
+        errstr = unicode(result)
+        if errstr.startswith(u'MOVED') or errstr.startswith(u'ASK'):
+            return errstr
+        return None
+
+    def _send(self, queue):
+        u""" Send queue, set the results on the futures, and return the redirected commands and the first error. """
+        conns = []
+        by_conn = {}
+        for entry in queue:
+            if entry.conn not in by_conn:
+                conns.append(entry.conn)
+                by_conn[entry.conn] = []
+            by_conn[entry.conn].append(entry)
+        error = None
+        written = []
+        failed = []
+        for conn in conns:
+            try:
+                conn.write_packed(self._pack(by_conn[conn]))
+                written.append(conn)
+            except (PyRedisError, ProtocolError, ReplyError), err:
+                error = error or err
+                self._fail(by_conn[conn], err)
+                if isinstance(err, _CONN_ERRORS):
+                    failed.append(conn)
+        redirected = []
+        # replies of the other connections have to be read, even if one of them failed
+        for conn in written:
+            entries = by_conn[conn]
+            try:
+                results = self._read_replies(conn, entries)
+            except (PyRedisError, ProtocolError, ReplyError), err:
+                error = error or err
+                self._fail(entries, err)
+                if isinstance(err, _CONN_ERRORS):
+                    failed.append(conn)
+                continue
+            for entry, result in zip(entries, results):
+                errstr = self._redirection(result) if self._redirect else None
+                if errstr:
+                    redirected.append((entry, errstr))
+                else:
+                    entry.future.set_result(result)
+        if failed and self._conn_failed:
+            try:
+                self._conn_failed(failed)
+            except PyRedisError, err:
+                error = error or err
+        return redirected, error
+
+    def _requeue(self, redirected):
+        queue = []
+        refreshed = False
+        for entry, errstr in redirected:
+            entry.redirects += 1
+            if entry.redirects > self._retries:
+                entry.future.set_exception(PyRedisError(u'Slot moved to often or wrong shard_key, giving up,'))
+                continue
+            moved = errstr.startswith(u'MOVED')
+            try:
+                entry.conn = self._redirect(errstr, entry.shard_key, refresh=moved and not refreshed)
+            except (PyRedisError, ReplyError), err:
+                entry.future.set_exception(err)
+                continue
+            refreshed = refreshed or moved
+            entry.asking = not moved
+            queue.append(entry)
+        return queue
+
+    def discard(self):
+        u""" Drop all buffered commands, without sending them.
+
+        Their futures raise PyRedisError.
+
+        :return: None
+        """
+        queue, self._queue = self._queue, []
+        for entry in queue:
+            entry.future.set_exception(PyRedisError(u'Pipeline discarded'))
+        self._release_client()
+
+    def execute(self, *args, **_3to2kwargs):
+        u""" Buffer arbitrary redis command.
+
+        :param args:
+        :type args: list, int, float
+
+        :param shard_key: (optional)
+            Should be set to the key name you try to work with.
+            Only used with cluster and hash clients, can not be used if sock is set.
+        :type shard_key: string
+
+        :param sock: (optional)
+            The string representation of a socket, the command should be executed against.
+            Only used with cluster and hash clients, can not be used if shard_key is set.
+        :type sock: string
+
+        :param decode: (optional)
+            If False, return the raw reply, even if an encoding is set.
+        :type decode: bool
+
+        :param as_array: (optional)
+            array.array typecode, like 'd' or 'q'. Return an array reply holding only numbers
+            as array.array, or numpy array if numpy is installed.
+            The reply is converted after it has been parsed, see pyredis.protocol.numeric_array.
+        :type as_array: str
+
+        :return: pyredis.pipeline.Future
+        """
+        if 'decode' in _3to2kwargs: decode = _3to2kwargs['decode']; del _3to2kwargs['decode']
+        else: decode = True
+        if 'as_array' in _3to2kwargs: as_array = _3to2kwargs['as_array']; del _3to2kwargs['as_array']
+        else: as_array = None
+        if 'sock' in _3to2kwargs: sock = _3to2kwargs['sock']; del _3to2kwargs['sock']
+        else: sock = None
+        if 'shard_key' in _3to2kwargs: shard_key = _3to2kwargs['shard_key']; del _3to2kwargs['shard_key']
+        else: shard_key = None
+        if self._client is None:
+            raise PyRedisError(u'Pipeline has been released to the pool')
+        if self._cluster and not bool(shard_key) != bool(sock):
+            raise PyRedisError(u'Ether shard_key or sock has to be provided')
+        conn = self._client._pipeline_conn(shard_key=shard_key, sock=sock)
+        future = Future()
+        self._queue.append(_Command(conn, args, future, decode, as_array, shard_key))
+        return future
+
+    def flush(self):
+        u""" Send all buffered commands, and read their replies.
+
+        Error replies are set on the futures of the failed commands, and not raised.
+
+        :raises: PyRedisConnError, PyRedisConnClosed, PyRedisConnReadTimeout,
+            if a connection failed, after the replies of all other connections have been read.
+            The futures of the commands send to the failed connection get the error set.
+
+        :return: None
+        """
+        queue, self._queue = self._queue, []
+        error = None
+        try:
+            while queue:
+                redirected, err = self._send(queue)
+                error = error or err
+                queue = self._requeue(redirected)
+        finally:
+            self._release_client()
+        if error:
+            raise error
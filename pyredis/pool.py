@@ -3,8 +3,10 @@ from random import shuffle
 import threading
 from pyredis import commands
 from pyredis.client import Client, ClusterClient, HashClient, SentinelClient
+from pyredis.connection import RECV_BUFFER_SIZE
 from pyredis.exceptions import *
 from pyredis.helper import ClusterMap
+from pyredis.pipeline import Pipeline
 
 
 class BasePool(object):
@@ -37,6 +39,71 @@ class BasePool(object):
         Upper limit of connections this pool can handle.
     :type pool_size: int
 
+    :param recv_buffer_size:
+        Number of bytes to receive from the socket at once.
+    :type recv_buffer_size: int
+
+    :param recv_buffer_adaptive:
+        If True, grow and shrink the receive size with the size of the replies.
+    :type recv_buffer_adaptive: bool
+
+    :param parser:
+        Reply parser to use, one of 'auto', 'hiredis' or 'python'.
+    :type parser: str
+
+    :param lazy_decode:
+        If True, return strings as pyredis.protocol.LazyString, which only get decoded on access.
+    :type lazy_decode: bool
+
+    :param protocol:
+        RESP protocol version, 2 or 3.
+    :type protocol: int
+
+    :param push_handler:
+        Callable, which gets passed RESP3 push frames received while reading replies.
+    :type push_handler: callable
+
+    :param tcp_nodelay:
+        Disable Nagle's algorithm.
+    :type tcp_nodelay: bool
+
+    :param keepalive:
+        Enable TCP keepalive.
+    :type keepalive: bool
+
+    :param keepalive_idle:
+        Idle seconds before keepalive probes are send.
+    :type keepalive_idle: int
+
+    :param keepalive_interval:
+        Seconds between keepalive probes.
+    :type keepalive_interval: int
+
+    :param keepalive_count:
+        Unanswered keepalive probes, before the connection is dropped.
+    :type keepalive_count: int
+
+    :param so_sndbuf:
+        Kernel send buffer size in bytes.
+    :type so_sndbuf: int
+
+    :param so_rcvbuf:
+        Kernel receive buffer size in bytes.
+    :type so_rcvbuf: int
+
+    :param tcp_user_timeout:
+        Milliseconds data may remain unacknowledged, before the connection is dropped.
+    :type tcp_user_timeout: int
+
+    :param client_name:
+        Name set with CLIENT SETNAME on every connection.
+    :type client_name: str
+
+    :param reconnect_policy:
+        Backoff, circuit breaker and retry policy, shared by all connections of the pool.
+        With a policy, clients that lost their connection stay in the pool, and reconnect on their next command.
+    :type reconnect_policy: pyredis.reconnect.ReconnectPolicy
+
     :param lock:
         Class implementing a Lock.
     :type lock: _lock object, defaults to threading.Lock
@@ -50,7 +117,23 @@ class BasePool(object):
             conn_timeout=2,
             read_timeout=2,
             pool_size=16,
-            lock=threading.Lock()):
+            lock=threading.Lock(),
+            recv_buffer_size=RECV_BUFFER_SIZE,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None,
+            client_name=None,
+            reconnect_policy=None):
         self._conn_timeout = conn_timeout
         self._read_timeout = read_timeout
         self._lock = lock
@@ -60,6 +143,24 @@ class BasePool(object):
         self._password = password
         self._encoding = encoding
         self._pool_size = pool_size
+        self._recv_buffer_size = recv_buffer_size
+        self._recv_buffer_adaptive = recv_buffer_adaptive
+        self._parser = parser
+        self._lazy_decode = lazy_decode
+        self._protocol = protocol
+        self._push_handler = push_handler
+        self._client_name = client_name
+        self._reconnect_policy = reconnect_policy
+        self._socket_options = dict(
+            tcp_nodelay=tcp_nodelay,
+            keepalive=keepalive,
+            keepalive_idle=keepalive_idle,
+            keepalive_interval=keepalive_interval,
+            keepalive_count=keepalive_count,
+            so_sndbuf=so_sndbuf,
+            so_rcvbuf=so_rcvbuf,
+            tcp_user_timeout=tcp_user_timeout
+        )
         self._close_on_err = False
         self._cluster = False
 
@@ -103,6 +204,78 @@ class BasePool(object):
         """
         return self._encoding
 
+    @property
+    def recv_buffer_size(self):
+        u""" Return configured receive buffer size
+
+        :return: int
+        """
+        return self._recv_buffer_size
+
+    @property
+    def recv_buffer_adaptive(self):
+        u""" Return True, if the receive buffer size is adaptive
+
+        :return: bool
+        """
+        return self._recv_buffer_adaptive
+
+    @property
+    def parser(self):
+        u""" Return configured reply parser
+
+        :return: str
+        """
+        return self._parser
+
+    @property
+    def lazy_decode(self):
+        u""" Return True, if strings are decoded lazily
+
+        :return: bool
+        """
+        return self._lazy_decode
+
+    @property
+    def protocol(self):
+        u""" Return configured RESP protocol version
+
+        :return: int
+        """
+        return self._protocol
+
+    @property
+    def push_handler(self):
+        u""" Return configured handler for RESP3 push frames
+
+        :return: callable, None
+        """
+        return self._push_handler
+
+    @property
+    def client_name(self):
+        u""" Return configured client name
+
+        :return: str, None
+        """
+        return self._client_name
+
+    @property
+    def reconnect_policy(self):
+        u""" Return configured reconnect policy
+
+        :return: pyredis.reconnect.ReconnectPolicy, None
+        """
+        return self._reconnect_policy
+
+    @property
+    def socket_options(self):
+        u""" Return configured socket options, like tcp_nodelay or keepalive
+
+        :return: dict
+        """
+        return self._socket_options
+
     @property
     def pool_size(self):
         u""" Return, or adjust the current pool size.
@@ -157,6 +330,17 @@ class BasePool(object):
             self._lock.release()
         return client
 
+    def pipeline(self):
+        u""" Return a pipeline, on a client acquired from the pool.
+
+        The client is released, when the pipeline is flushed or discarded,
+        or its with block is left. The pipeline can not be used afterwards.
+        See pyredis.pipeline.Pipeline.
+
+        :return: pyredis.pipeline.Pipeline
+        """
+        return Pipeline(self.acquire(), release=self.release)
+
     def release(self, conn):
         u""" Return a client connection to the pool.
 
@@ -236,7 +420,16 @@ class ClusterPool(
             slave_ok=self.slave_ok,
             conn_timeout=self.conn_timeout,
             read_timeout=self.read_timeout,
-            cluster_map=self._map
+            cluster_map=self._map,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
         )
 
     def execute(self, *args, **kwargs):
@@ -279,6 +472,7 @@ class HashPool(
     a list with 16384 ('host', port) pairs to the "buckets" parameter.
     If you have less then 16384 ('host', port) pairs, the client will try to
     distribute the key spaces evenly between available pairs.
+    A bucket can also be the path of a unix socket, for servers running on the same host.
     
     --- Warning ---
     Since this is static hashing, the the order of pairs has to match on each client you use!
@@ -287,13 +481,18 @@ class HashPool(
 
 
     :param buckets:
-        list of ('host', port) pairs, where each pair represents a bucket
-        example: [('localhost', 7001), ('localhost', 7002), ('localhost', 7003)]
+        list of ('host', port) pairs, or unix socket paths, where each entry represents a bucket
+        example: [('localhost', 7001), ('localhost', 7002), '/var/run/redis/redis3.sock']
     :type port: list
+
+    :param peer_uid:
+        User id, the server of every unix socket bucket has to run as, checked with SO_PEERCRED.
+    :type peer_uid: int
     """
-    def __init__(self, buckets, **kwargs):
+    def __init__(self, buckets, peer_uid=None, **kwargs):
         super(HashPool, self).__init__(**kwargs)
         self._buckets = buckets
+        self._peer_uid = peer_uid
         self._cluster = True
 
     @property
@@ -304,14 +503,32 @@ class HashPool(
         """
         return self._buckets
 
+    @property
+    def peer_uid(self):
+        u""" Return the user id, the server of unix socket buckets has to run as.
+
+        :return: int, None
+        """
+        return self._peer_uid
+
     def _connect(self):
         return HashClient(
             buckets=self.buckets,
+            peer_uid=self.peer_uid,
             database=self.database,
             password=self.password,
             encoding=self.encoding,
             conn_timeout=self.conn_timeout,
-            read_timeout=self.read_timeout
+            read_timeout=self.read_timeout,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
         )
 
     def execute(self, *args, **kwargs):
@@ -358,16 +575,22 @@ class Pool(
     :param unix_sock:
         Unix Socket to connect,
         can only be set when host is None.
+        A name starting with @ connects a socket in the Linux abstract namespace.
     :type unix_sock: str
 
+    :param peer_uid:
+        Only used with unix_sock, the user id the server has to run as, checked with SO_PEERCRED.
+    :type peer_uid: int
+
     """
-    def __init__(self, host=None, port=6379, unix_sock=None, **kwargs):
+    def __init__(self, host=None, port=6379, unix_sock=None, peer_uid=None, **kwargs):
         if not bool(host) != bool(unix_sock):
             raise PyRedisError(u"Ether host or unix_sock has to be provided")
         super(Pool, self).__init__(**kwargs)
         self._host = host
         self._port = port
         self._unix_sock = unix_sock
+        self._peer_uid = peer_uid
 
     @property
     def host(self):
@@ -393,19 +616,37 @@ class Pool(
         """
         return self._unix_sock
 
+    @property
+    def peer_uid(self):
+        u""" Return the user id, the server of the unix socket has to run as.
+
+        :return: int, None
+        """
+        return self._peer_uid
+
     def _connect(self):
         return Client(
             host=self.host,
             port=self.port,
             unix_sock=self.unix_sock,
+            peer_uid=self.peer_uid,
             database=self.database,
             password=self.password,
             encoding=self.encoding,
             conn_timeout=self.conn_timeout,
-            read_timeout=self.read_timeout
+            read_timeout=self.read_timeout,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
             )
 
-    def execute(self, *args):
+    def execute(self, *args, **kwargs):
         u""" Execute arbitrary redis command.
 
         :param args:
@@ -415,7 +656,7 @@ class Pool(
         """
         conn = self.acquire()
         try:
-            return conn.execute(*args)
+            return conn.execute(*args, **kwargs)
         finally:
             self.release(conn)
 
@@ -510,7 +751,16 @@ class SentinelHashPool(
             password=self.password,
             encoding=self.encoding,
             conn_timeout=self.conn_timeout,
-            read_timeout=self.read_timeout
+            read_timeout=self.read_timeout,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
         )
 
     def _get_hash_client(self, buckets):
@@ -520,7 +770,16 @@ class SentinelHashPool(
             password=self.password,
             encoding=self.encoding,
             conn_timeout=self.conn_timeout,
-            read_timeout=self.read_timeout
+            read_timeout=self.read_timeout,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
         )
 
     def _get_master(self, bucket):
@@ -672,7 +931,16 @@ class SentinelPool(
             password=self.password,
             encoding=self.encoding,
             conn_timeout=self.conn_timeout,
-            read_timeout=self.read_timeout
+            read_timeout=self.read_timeout,
+            recv_buffer_size=self.recv_buffer_size,
+            recv_buffer_adaptive=self.recv_buffer_adaptive,
+            parser=self.parser,
+            lazy_decode=self.lazy_decode,
+            protocol=self.protocol,
+            push_handler=self.push_handler,
+            client_name=self.client_name,
+            reconnect_policy=self.reconnect_policy,
+            **self.socket_options
         )
 
     def _get_master(self):
@@ -692,7 +960,7 @@ class SentinelPool(
         client = self._get_client(host, port)
         return client
 
-    def execute(self, *args):
+    def execute(self, *args, **kwargs):
         u""" Execute arbitrary redis command.
 
         :param args:
@@ -702,6 +970,6 @@ class SentinelPool(
         """
         conn = self.acquire()
         try:
-            return conn.execute(*args)
+            return conn.execute(*args, **kwargs)
         finally:
             self.release(conn)
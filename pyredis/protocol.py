@@ -1,9 +1,15 @@
 from __future__ import absolute_import
+import array
 import sys
-from io import BytesIO
+from itertools import imap
 from pyredis.exceptions import ProtocolError, ReplyError
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 SYM_CRLF = '\r\n'
+SYM_CRLF_LEN = len(SYM_CRLF)
 SYM_EMPTY = ''
 
 TYPE_SIMPLE = '+'
@@ -12,8 +18,51 @@ TYPE_INT = ':'
 TYPE_BULK = '$'
 TYPE_ARRAY = '*'
 
+# RESP3 types
+TYPE_MAP = '%'
+TYPE_SET = '~'
+TYPE_ATTRIBUTE = '|'
+TYPE_PUSH = '>'
+TYPE_DOUBLE = ','
+TYPE_BOOLEAN = '#'
+TYPE_NULL = '_'
+TYPE_BIG_NUMBER = '('
+TYPE_VERBATIM = '='
+TYPE_BLOB_ERROR = '!'
+
+AGGREGATE_TYPES = frozenset([TYPE_MAP, TYPE_SET, TYPE_ATTRIBUTE, TYPE_PUSH])
+
+TYPES = frozenset([
+    TYPE_SIMPLE, TYPE_ERROR, TYPE_INT, TYPE_BULK, TYPE_ARRAY,
+    TYPE_MAP, TYPE_SET, TYPE_ATTRIBUTE, TYPE_PUSH, TYPE_DOUBLE, TYPE_BOOLEAN,
+    TYPE_NULL, TYPE_BIG_NUMBER, TYPE_VERBATIM, TYPE_BLOB_ERROR
+])
+
+BUFFER_SIZE = 16384
+BUFFER_SIZE_IDLE_MAX = 1048576
+COMPACT_THRESHOLD = 65536
+
+# Returned by Reader.gets_stream(), once all elements of a streamed reply have been returned.
+STREAM_END = object()
+
+# Marks a map frame, which is waiting for the next key.
+_NO_KEY = object()
+
+# Marks an array, set or push frame, whose elements are appended. Not None, which is a valid map key.
+_NO_MAP = object()
+
+ARRAY_TYPECODES = frozenset(u'bBhHiIlLqQfd')
+FLOAT_TYPECODES = frozenset(u'fd')
+
 __all__ = [
+    u'LazyString',
+    u'PushReply',
     u'Reader',
+    u'STREAM_END',
+    u'encode_into',
+    u'encode_parts',
+    u'numeric_array',
+    u'pack_commands',
     u'writer'
 ]
 
@@ -31,20 +80,154 @@ def is_exception(inst, classinfo):
             raise TypeError(u'{0} is not a subclass of {1}'.format(inst, classinfo))
 
 
+def _array_typecode(typecode):
+    # array on Python 2 has no 'q' and 'Q', use 'l' and 'L' if they are 64 bit wide.
+    if typecode in u'qQ':
+        try:
+            array.array(typecode)
+        except ValueError:
+            if array.array(u'l').itemsize != 8:
+                raise
+            return u'l' if typecode == u'q' else u'L'
+    return typecode
+
+
+def decode_reply(reply, encoding):
+    u""" Decode all strings of a raw reply, the same way the reader would have.
+
+    :param reply:
+        Raw reply.
+
+    :param encoding:
+        Encoding to use.
+    :type encoding: str
+
+    :return: decoded reply
+    """
+    if isinstance(reply, str):
+        try:
+            return reply.decode(encoding)
+        except UnicodeDecodeError:
+            return reply
+    elif isinstance(reply, list):
+        return type(reply)(decode_reply(item, encoding) for item in reply)
+    elif isinstance(reply, dict):
+        return dict((decode_reply(key, encoding), decode_reply(value, encoding)) for key, value in reply.items())
+    elif isinstance(reply, set):
+        return set(decode_reply(item, encoding) for item in reply)
+    return reply
+
+
+def numeric_array(reply, typecode):
+    u""" Convert an array reply of numbers into a compact array.
+
+    Elements can be integer replies or strings holding numbers, like the
+    replies of MGET, HMGET or ZRANGE WITHSCORES. If numpy is installed, a numpy array
+    is returned, otherwise an array.array.
+
+    The readers call this once a reply has been parsed completely, so while it is read,
+    the reply is still held as a list of strings. The compact array only saves memory
+    after the reply has been returned, and the list was dropped.
+
+    :param reply:
+        Reply to convert.
+    :type reply: list
+
+    :param typecode:
+        array.array typecode, for example 'd' for float or 'q' for 64 bit integers.
+    :type typecode: str
+
+    :return: array.array, numpy.ndarray or None, if reply is not a list of numbers
+    """
+    if typecode not in ARRAY_TYPECODES:
+        raise ValueError(u'Unsupported typecode {0}, has to be one of {1}'.format(
+            typecode, u''.join(sorted(ARRAY_TYPECODES))
+        ))
+    if not isinstance(reply, list):
+        return None
+    convert = float if typecode in FLOAT_TYPECODES else int
+    try:
+        if numpy:
+            return numpy.fromiter(imap(convert, reply), dtype=numpy.dtype(typecode), count=len(reply))
+        return array.array(_array_typecode(typecode), imap(convert, reply))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+class LazyString(str):
+    u""" Raw bulk string, which is only decoded when the text attribute is accessed.
+
+    Being a str, it can be used anywhere the raw reply could be used,
+    the decoded text is cached after the first access.
+    If the data can not be decoded with the given encoding, text returns the raw data.
+
+    :param data:
+        Raw reply data.
+    :type data: str
+
+    :param encoding:
+        Encoding used to decode data.
+    :type encoding: str
+    """
+    def __new__(cls, data, encoding):
+        self = str.__new__(cls, data)
+        self.encoding = encoding
+        return self
+
+    @property
+    def text(self):
+        try:
+            return self._text
+        except AttributeError:
+            try:
+                self._text = self.decode(self.encoding)
+            except UnicodeDecodeError:
+                self._text = str(self)
+            return self._text
+
+
+class PushReply(list):
+    u""" RESP3 push frame, like pub/sub messages or client side caching invalidations.
+
+    Behaves like the list of its elements, the type allows to tell pushes apart from replies.
+    """
+
+
 class ReplyParser(object):
-    def __init__(self, encoding, source, protocol_error=ProtocolError, reply_error=ReplyError):
-        self._len = 0
-        self._nested_parser = None
+    u""" Incremental, non recursive RESP2 and RESP3 reply parser.
+
+    Nested aggregates are tracked with an explicit stack of [remaining, container, type, key] frames,
+    so parsing an aggregate only allocates the container holding its elements.
+    Maps are built straight into a dict, sets into a set, if all members are hashable,
+    and push frames into a PushReply. An attribute map is not returned, it is stored in
+    the attributes attribute, and parsing continues with the reply it belongs to.
+    If the source does not yet hold a complete reply, parse() returns None and
+    keeps its state, the next call continues where the previous one stopped.
+
+    In stream mode, the elements of a top level array are not collected,
+    every element is returned as result as soon as it is parsed. complete is only set
+    after the last element, an empty or nil top level array results in STREAM_END.
+    Top level sets are streamed the same way, top level maps as alternating keys and values.
+
+    With lazy_decode set, strings are returned as LazyString, instead of being decoded right away.
+    """
+    def __init__(self, encoding, source, protocol_error=ProtocolError, reply_error=ReplyError, lazy_decode=False):
+        self._bulk_len = None
+        self._bulk_type = None
         self._encoding = encoding
+        self._lazy_decode = lazy_decode
         self._protocol_error = protocol_error
         self._reply_error = reply_error
-        self._todo = self.header
         self._source = source
+        self._stack = []
+        self.attributes = None
         self.complete = False
-        self.result = ''
+        self.result = None
 
     def decode(self, data):
         if self._encoding:
+            if self._lazy_decode:
+                return LazyString(data, self._encoding)
             try:
                 return data.decode(self._encoding)
             except UnicodeDecodeError:
@@ -52,174 +235,414 @@ class ReplyParser(object):
         else:
             return data
 
-    def header(self):
-        byte = self._source.read(1)
-        if byte == TYPE_ARRAY:
-            return self.parse_array
-        elif byte == TYPE_BULK:
-            return self.parse_bulk
-        elif byte == TYPE_SIMPLE:
-            return self.parse_str
-        elif byte == TYPE_INT:
-            return self.parse_int
-        elif byte == TYPE_ERROR:
-            return self.parse_error
-        elif byte == SYM_EMPTY:
-            return None
-        else:
-            raise self._protocol_error(u'Protocol error, got {0} as reply type byte'.format(byte))
-
-    def parse(self):
-        while not self.complete:
-            result = self._todo()
-            if not result:
-                return
-            else:
-                self._todo = result
-        return True
-
-    def parse_array(self):
-        if not self._len:
-            array_len = self.readline()
-            if array_len:
-                self._len = int(array_len)
-                if int(array_len) >= 0:
-                    self.result = []
+    def parse(self, stream=False):
+        source = self._source
+        stack = self._stack
+        while True:
+            if self._bulk_len is not None:
+                value = source.read_exact(self._bulk_len, SYM_CRLF_LEN)
+                if value is None:
+                    return
+                self._bulk_len = None
+                if self._bulk_type is None:
+                    value = self.decode(value)
                 else:
-                    self.result = None
+                    value = self._parse_blob(value)
             else:
-                return
-        try:
-            while len(self.result) < self._len:
-                if not self._nested_parser:
-                    self._nested_parser = ReplyParser(
-                        self._encoding,
-                        self._source,
-                        self._protocol_error,
-                        self._reply_error
-                    )
-                result = self._nested_parser.parse()
-                if result:
-                    self.result.append(self._nested_parser.result)
-                    self._nested_parser.reset()
-                else:
+                line = source.getline()
+                if line is None:
+                    byte = source.peek()
+                    if byte and byte not in TYPES:
+                        raise self._protocol_error(u'Protocol error, got {0} as reply type byte'.format(byte))
                     return
-        except TypeError:
-            pass
-        self.complete = True
-        return True
-
-    def parse_bulk(self):
-        if not self._len:
-            bulk_len = self.readline()
-            if bulk_len == '-1':
+                byte = line[:1]
+                if byte == TYPE_BULK:
+                    length = int(line[1:])
+                    if length >= 0:
+                        self._bulk_len = length
+                        source.reserve(length + SYM_CRLF_LEN - len(source))
+                        continue
+                    value = None
+                elif byte == TYPE_ARRAY:
+                    length = int(line[1:])
+                    if length > 0:
+                        stack.append([length, None if stream and not stack else [], None, _NO_MAP])
+                        continue
+                    elif stream and not stack:
+                        value = STREAM_END
+                    elif length == 0:
+                        value = []
+                    else:
+                        value = None
+                elif byte == TYPE_SIMPLE:
+                    value = self.decode(line[1:])
+                elif byte == TYPE_INT:
+                    value = int(line[1:])
+                elif byte == TYPE_ERROR:
+                    value = self._reply_error(line[1:].decode(sys.getdefaultencoding()))
+                elif byte in AGGREGATE_TYPES:
+                    length = int(line[1:])
+                    if byte == TYPE_MAP or byte == TYPE_ATTRIBUTE:
+                        length *= 2
+                    if length > 0:
+                        if stream and not stack and (byte == TYPE_MAP or byte == TYPE_SET):
+                            stack.append([length, None, byte, _NO_MAP])
+                        elif byte == TYPE_MAP or byte == TYPE_ATTRIBUTE:
+                            stack.append([length, {}, byte, _NO_KEY])
+                        else:
+                            stack.append([length, [], byte, _NO_MAP])
+                        continue
+                    elif byte == TYPE_ATTRIBUTE:
+                        self.attributes = {}
+                        continue
+                    elif stream and not stack and byte != TYPE_PUSH:
+                        value = STREAM_END
+                    elif length < 0:
+                        value = None
+                    else:
+                        value = self._finish(byte, [] if byte != TYPE_MAP else {})
+                elif byte == TYPE_NULL:
+                    value = None
+                elif byte == TYPE_DOUBLE:
+                    value = float(line[1:])
+                elif byte == TYPE_BOOLEAN:
+                    value = line[1:] == 't'
+                elif byte == TYPE_BIG_NUMBER:
+                    value = int(line[1:])
+                elif byte == TYPE_VERBATIM or byte == TYPE_BLOB_ERROR:
+                    self._bulk_len = int(line[1:])
+                    self._bulk_type = byte
+                    source.reserve(self._bulk_len + SYM_CRLF_LEN - len(source))
+                    continue
+                else:
+                    raise self._protocol_error(u'Protocol error, got {0} as reply type byte'.format(byte))
+            while stack:
+                frame = stack[-1]
+                frame[0] -= 1
+                container = frame[1]
+                if container is None:
+                    if not frame[0]:
+                        stack.pop()
+                        self.complete = True
+                    self.result = value
+                    return True
+                if frame[3] is _NO_MAP:
+                    container.append(value)
+                elif frame[3] is _NO_KEY:
+                    frame[3] = value
+                else:
+                    self._set_item(container, frame[3], value)
+                    frame[3] = _NO_KEY
+                if frame[0]:
+                    break
+                stack.pop()
+                if frame[2] is None:
+                    value = container
+                elif frame[2] == TYPE_ATTRIBUTE:
+                    self.attributes = container
+                    break
+                else:
+                    value = self._finish(frame[2], container)
+            else:
                 self.complete = True
-                self.result = None
+                self.result = value
                 return True
-            elif bulk_len:
-                self._len = int(bulk_len) + 2
-            else:
-                return
-        self.result += self._source.read(self._len - len(self.result))
-        if len(self.result) == self._len:
-            self.complete = True
-            self.result = self.decode(self.result.rstrip(SYM_CRLF))
-            return True
 
-    def parse_error(self):
-        result = self.readline()
-        if result:
-            self.complete = True
-            self.result = self._reply_error(result.decode(sys.getdefaultencoding()))
-            return True
+    def _finish(self, kind, container):
+        if kind == TYPE_SET:
+            try:
+                return set(container)
+            except TypeError:
+                return container
+        elif kind == TYPE_PUSH:
+            return PushReply(container)
+        return container
 
-    def parse_int(self):
-        result = self.readline()
-        if result:
-            self.complete = True
-            self.result = int(result)
-            return True
+    def _parse_blob(self, data):
+        kind = self._bulk_type
+        self._bulk_type = None
+        if kind == TYPE_VERBATIM:
+            # the first 4 bytes hold the format, like "txt:"
+            return self.decode(data[4:])
+        return self._reply_error(data.decode(sys.getdefaultencoding()))
 
-    def parse_str(self):
-        result = self.readline()
-        if result:
-            self.complete = True
-            self.result = result
-            return True
+    @staticmethod
+    def _set_item(container, key, value):
+        try:
+            container[key] = value
+        except TypeError:
+            container[tuple(key)] = value
 
-    def readline(self):
-        self.result += self._source.readline()
-        if self.result.endswith(SYM_CRLF):
-            result = self.result.rstrip(SYM_CRLF)
-            self.result = ''
-            return result
+    @property
+    def wanted(self):
+        u""" Number of bytes still missing, to complete the current bulk string.
+
+        :return: int
+        """
+        if self._bulk_len is None:
+            return 0
+        return max(self._bulk_len + SYM_CRLF_LEN - len(self._source), 0)
 
     def reset(self):
-        self._len = None
-        self._todo = self.header
-        self._nested_parser = None
+        self._bulk_len = None
+        self._bulk_type = None
+        self._stack = []
+        self.attributes = None
         self.complete = False
-        self.result = ''
+        self.result = None
+
+
+class ReadBuffer(object):
+    u""" Growable receive buffer, backed by a bytearray.
+
+    Data is appended at the write offset and consumed from the read offset,
+    the same way a BytesIO would be used, but consumed data is not copied
+    away after every reply. The unread tail only gets moved to the front
+    of the buffer, if more space is needed and the consumed prefix has grown
+    past compact_threshold, or if the buffer has to grow anyway.
+    This way the cost of feeding and parsing stays linear in the number of buffered bytes.
+    Once drained, a buffer that had to grow beyond BUFFER_SIZE_IDLE_MAX,
+    for example for a huge bulk string, is replaced by a fresh one of the initial size.
+
+    :param size:
+        Initial size of the buffer in bytes.
+    :type size: int
+
+    :param compact_threshold:
+        Minimum number of consumed bytes, before the buffer gets compacted.
+    :type compact_threshold: int
+    """
+    def __init__(self, size=BUFFER_SIZE, compact_threshold=COMPACT_THRESHOLD):
+        self._buf = bytearray(size)
+        self._compact_threshold = compact_threshold
+        self._size = size
+        self._rpos = 0
+        self._wpos = 0
+
+    def __len__(self):
+        return self._wpos - self._rpos
+
+    def _compact(self):
+        unread = self._wpos - self._rpos
+        self._buf[:unread] = self._buf[self._rpos:self._wpos]
+        self._rpos = 0
+        self._wpos = unread
+
+    def reserve(self, length):
+        if self._wpos + length <= len(self._buf):
+            return
+        unread = len(self)
+        if self._rpos and (self._rpos >= self._compact_threshold or
+                           unread + length <= len(self._buf) // 2):
+            self._compact()
+            if self._wpos + length <= len(self._buf):
+                return
+        buf = bytearray(max(unread + length, len(self._buf) * 2))
+        buf[:unread] = memoryview(self._buf)[self._rpos:self._wpos]
+        self._buf = buf
+        self._rpos = 0
+        self._wpos = unread
+
+    def read(self, length=-1):
+        if length < 0:
+            end = self._wpos
+        else:
+            end = min(self._rpos + length, self._wpos)
+        data = memoryview(self._buf)[self._rpos:end].tobytes()
+        self._advance(end)
+        return data
+
+    def getline(self):
+        end = self._buf.find(SYM_CRLF, self._rpos, self._wpos)
+        if end < 0:
+            return None
+        data = memoryview(self._buf)[self._rpos:end].tobytes()
+        self._advance(end + SYM_CRLF_LEN)
+        return data
+
+    def peek(self):
+        if self._rpos < self._wpos:
+            return chr(self._buf[self._rpos])
+        return SYM_EMPTY
+
+    def read_exact(self, length, skip=0):
+        end = self._rpos + length
+        if end + skip > self._wpos:
+            return None
+        data = memoryview(self._buf)[self._rpos:end].tobytes()
+        self._advance(end + skip)
+        return data
+
+    def _advance(self, pos):
+        if pos == self._wpos:
+            self._rpos = self._wpos = 0
+            if len(self._buf) > BUFFER_SIZE_IDLE_MAX:
+                self._buf = bytearray(self._size)
+        else:
+            self._rpos = pos
+
+    def recv_into(self, sock, length):
+        u""" Receive up to length bytes from sock, directly into the buffer.
+
+        :param sock:
+            Connected socket.
+        :type sock: socket.socket
+
+        :param length:
+            Maximum number of bytes to receive.
+        :type length: int
+
+        :return: int, number of bytes received
+        """
+        self.reserve(length)
+        received = sock.recv_into(memoryview(self._buf)[self._wpos:self._wpos + length], length)
+        self._wpos += received
+        return received
+
+    def write(self, data):
+        length = len(data)
+        self.reserve(length)
+        self._buf[self._wpos:self._wpos + length] = data
+        self._wpos += length
 
 
 class Reader(object):
-    def __init__(self, encoding=None, protocolError=ProtocolError, replyError=ReplyError):
-        self._buffer = BytesIO()
-        self._buffer_pos = 0
+    def __init__(
+            self, encoding=None, protocolError=ProtocolError, replyError=ReplyError,
+            lazy_decode=False, as_array=None):
+        if as_array is not None and as_array not in ARRAY_TYPECODES:
+            raise ValueError(u'Unsupported typecode {0}'.format(as_array))
+        self._as_array = as_array
+        self._buffer = ReadBuffer()
         self._encoding = encoding
+        self._stream_end = False
+        # RESP3 attributes, sent along with the last reply returned by gets()
+        self.attributes = None
         if is_exception(protocolError, Exception):
             self._protocol_error = protocolError
         if is_exception(replyError, Exception):
             self._reply_error = replyError
+        # with as_array, replies are parsed raw into lists, converted by numeric_array once complete,
+        # and only decoded if they are not numeric.
         self._replyparser = ReplyParser(
-            self._encoding,
+            None if as_array else self._encoding,
             self._buffer,
             self._protocol_error,
-            self._reply_error
+            self._reply_error,
+            lazy_decode
         )
 
-    def _truncate(self):
-        remain = BytesIO()
-        self._buffer.seek(self._buffer_pos)
-        remain.write(self._buffer.read())
-        self._buffer = remain
-        self._replyparser._source = self._buffer
-        self._buffer_pos = 0
-        self._buffer.seek(0)
-
-    def feed(self, data, offset=None, length=None):
-        if offset and length:
-            if (offset + length > len(data)) or \
-                    (offset or length) < 0:
-                raise ValueError(u'offset+length bigger then available date')
-            data = data[offset:][:length]
-        elif offset:
-            if (offset > len(data)) or (offset < 0):
-                raise ValueError(u'offset bigger then available data')
-            data = data[offset:]
-        elif length:
-            if (length > len(data)) or (length < 0):
-                raise ValueError(u'length bigger then available data')
-            data = data[:length]
-        self._buffer.seek(0, 2)
+    def feed(self, data, offset=0, length=-1):
+        if offset < 0:
+            raise ValueError(u'offset has to be positive')
+        if length == -1:
+            length = len(data) - offset
+        if length < 0 or offset + length > len(data):
+            raise ValueError(u'offset+length bigger then available data')
+        if offset or length != len(data):
+            data = memoryview(data)[offset:offset + length]
         self._buffer.write(data)
 
+    def set_encoding(self, encoding=None):
+        u""" Change the encoding used for replies, which have not been parsed yet.
+
+        :param encoding:
+            Encoding, if None, no decoding is done.
+        :type encoding: str
+
+        :return: None
+        """
+        self._encoding = encoding
+        if not self._as_array:
+            self._replyparser._encoding = encoding
+
+    def recv_into(self, sock, length):
+        u""" Receive data from sock, directly into the read buffer.
+
+        If the reply currently being parsed is a bulk string, which is
+        bigger then length, the receive size is raised to the number of bytes
+        still missing, the buffer already got reserved for the whole bulk string.
+
+        :param sock:
+            Connected socket.
+        :type sock: socket.socket
+
+        :param length:
+            Number of bytes to receive at least.
+        :type length: int
+
+        :return: int, number of bytes received
+        """
+        return self._buffer.recv_into(sock, max(length, self._replyparser.wanted))
+
+    def gets_many(self, max_n=None):
+        u""" Return all complete replies currently buffered.
+
+        :param max_n:
+            Return at most max_n replies, if None, there is no limit.
+        :type max_n: int
+
+        :return: list
+        """
+        results = []
+        parser = self._replyparser
+        while max_n is None or len(results) < max_n:
+            if not parser.parse():
+                break
+            if self._as_array:
+                results.append(self._to_array(parser.result))
+            else:
+                results.append(parser.result)
+            parser.reset()
+        return results
+
+    def gets_stream(self):
+        u""" Return the next element of the reply currently being read.
+
+        If the reply is an array, its elements are returned one at a time,
+        as soon as they are buffered, without building the list holding them.
+        Any other reply is returned as a single element. Once the reply has been
+        consumed, STREAM_END is returned, which is also the only value returned
+        for an empty or nil array.
+
+        :return: element, STREAM_END or False if no element is buffered yet
+        """
+        if self._stream_end:
+            self._stream_end = False
+            return STREAM_END
+        parser = self._replyparser
+        if not parser.parse(stream=True):
+            return False
+        result = parser.result
+        if parser.complete:
+            parser.reset()
+            self._stream_end = result is not STREAM_END
+        return result
+
     def gets(self):
-        self._buffer.seek(self._buffer_pos)
         result = self._replyparser.parse()
-        self._buffer_pos = self._buffer.tell()
         if result:
             result = self._replyparser.result
-            self._truncate()
+            self.attributes = self._replyparser.attributes
             self._replyparser.reset()
+            if self._as_array:
+                return self._to_array(result)
             return result
         return False
 
+    def _to_array(self, result):
+        converted = numeric_array(result, self._as_array)
+        if converted is not None:
+            return converted
+        if self._encoding:
+            return decode_reply(result, self._encoding)
+        return result
+
 
 def to_bytes(value):
     if isinstance(value, unicode):
-        return value.encode()
-    elif isinstance(value, (int, float)):
+        return value.encode(u'utf-8')
+    elif isinstance(value, (int, long, float)):
         return unicode(value).encode()
     elif isinstance(value, str):
         return value
@@ -227,21 +650,124 @@ def to_bytes(value):
         raise ValueError(u'Unsupported value, has to be a instance of bytes, str, int or float')
 
 
-def writer(*args):
-    buf = list()
+HEADER_CACHE_SIZE = 1024
+COMMAND_CACHE_SIZE = 512
+SCATTER_THRESHOLD = 65536
+
+_ARRAY_HEADERS = [TYPE_ARRAY + str(length) + SYM_CRLF for length in xrange(HEADER_CACHE_SIZE + 1)]
+_BULK_HEADERS = [TYPE_BULK + str(length) + SYM_CRLF for length in xrange(HEADER_CACHE_SIZE + 1)]
+_COMMANDS = dict()
+
+
+def _encode_command(verb):
+    try:
+        return _COMMANDS[verb]
+    except (KeyError, TypeError):
+        pass
+    member = to_bytes(verb)
+    length = len(member)
+    if length <= HEADER_CACHE_SIZE:
+        encoded = _BULK_HEADERS[length] + member + SYM_CRLF
+    else:
+        encoded = TYPE_BULK + str(length) + SYM_CRLF + member + SYM_CRLF
+    if isinstance(verb, basestring) and len(_COMMANDS) < COMMAND_CACHE_SIZE:
+        _COMMANDS[verb] = encoded
+    return encoded
+
+
+def _encode(args, add):
+    num = len(args)
+    if num <= HEADER_CACHE_SIZE:
+        add(_ARRAY_HEADERS[num])
+    else:
+        add(TYPE_ARRAY + str(num) + SYM_CRLF)
+    if not num:
+        return
+    add(_encode_command(args[0]))
+    for member in args[1:]:
+        if not isinstance(member, str):
+            member = to_bytes(member)
+        length = len(member)
+        if length <= HEADER_CACHE_SIZE:
+            add(_BULK_HEADERS[length])
+        else:
+            add(TYPE_BULK + str(length) + SYM_CRLF)
+        add(member)
+        add(SYM_CRLF)
 
-    buf.append(TYPE_ARRAY)
-    buf.append(to_bytes(len(args)))
-    buf.append(SYM_CRLF)
 
-    for member in args:
-        member = to_bytes(member)
+def encode_into(buf, *args):
+    u""" Encode a command, and append it to buf.
 
-        buf.append(TYPE_BULK)
-        buf.append(to_bytes(len(member)))
-        buf.append(SYM_CRLF)
+    The encoded pieces are appended to buf in place, without building an intermediate string.
 
-        buf.append(member)
-        buf.append(SYM_CRLF)
+    :param buf:
+        Buffer the encoded command gets appended to.
+    :type buf: bytearray
 
-    return ''.join(buf)
+    :param args:
+        Accepts a variable number of arguments
+    :type args: str, int, float
+
+    :return: bytearray
+    """
+    _encode(args, buf.extend)
+    return buf
+
+
+def pack_commands(commands, buf=None):
+    u""" Encode many commands into one bytearray, ready to be send in one go.
+
+    Like with encode_into, the encoded pieces are appended to the bytearray in place.
+
+    :param commands:
+        Iterable of commands, each command being a list or tuple of arguments.
+    :type commands: list
+
+    :param buf:
+        Buffer the encoded commands get appended to. If None, a new bytearray is created.
+    :type buf: bytearray
+
+    :return: bytearray
+    """
+    if buf is None:
+        buf = bytearray()
+    add = buf.extend
+    for args in commands:
+        _encode(args, add)
+    return buf
+
+
+def encode_parts(*args):
+    u""" Encode a command into a list of chunks, for scatter/gather writes.
+
+    Members of at least SCATTER_THRESHOLD bytes are returned as they are, as separate chunks,
+    everything in between is joined into one chunk. This way big payloads never get copied.
+
+    :param args:
+        Accepts a variable number of arguments
+    :type args: str, int, float
+
+    :return: list
+    """
+    parts = []
+    _encode(args, parts.append)
+    chunks = []
+    pending = []
+    for part in parts:
+        if len(part) >= SCATTER_THRESHOLD:
+            if pending:
+                chunks.append(SYM_EMPTY.join(pending))
+                pending = []
+            chunks.append(part)
+        else:
+            pending.append(part)
+    if pending:
+        chunks.append(SYM_EMPTY.join(pending))
+    return chunks
+
+
+def writer(*args):
+    parts = []
+    _encode(args, parts.append)
+    return SYM_EMPTY.join(parts)
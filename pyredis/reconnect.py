@@ -0,0 +1,203 @@
+from __future__ import absolute_import
+import random
+import threading
+import time
+
+from pyredis.commands import IDEMPOTENT
+from pyredis.exceptions import PyRedisCircuitOpen
+
+__all__ = [
+    u'CIRCUIT_CLOSED',
+    u'CIRCUIT_HALF_OPEN',
+    u'CIRCUIT_OPEN',
+    u'ReconnectPolicy'
+]
+
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 5
+CIRCUIT_RESET_TIMEOUT = 10
+
+CIRCUIT_CLOSED = u'closed'
+CIRCUIT_HALF_OPEN = u'half-open'
+CIRCUIT_OPEN = u'open'
+
+# 2 ** 32 times any sensible base delay is far beyond max_delay
+_BACKOFF_EXPONENT_MAX = 32
+
+
+class _Circuit(object):
+    def __init__(self):
+        self.failures = 0
+        self.open_until = None
+        self.trial = False
+
+
+class ReconnectPolicy(object):
+    u""" Spaces out reconnects with exponential backoff and jitter, and stops them with a circuit breaker.
+
+    State is kept per endpoint, so one policy can be shared by all connections of a pool,
+    or of a whole application. Connections to a failing server then back off together,
+    instead of each one starting over with an immediate reconnect.
+
+    Before a connection lost to an error is reconnected, and before every connect after a failed one,
+    the calling thread sleeps a random time between 0 and min(max_delay, base_delay * 2 ** failures),
+    failures being the number of consecutive failed connects to the endpoint.
+
+    After max_attempts consecutive failed connects, the circuit opens, and connects to the endpoint
+    fail right away with PyRedisCircuitOpen. After reset_timeout seconds a single trial connect is let through,
+    which closes the circuit if it succeeds, and opens it again if not.
+
+    :param base_delay:
+        Upper bound of the first delay in seconds.
+    :type base_delay: float
+
+    :param max_delay:
+        Upper bound of any delay in seconds.
+    :type max_delay: float
+
+    :param max_attempts:
+        Consecutive failed connects, before the circuit opens. If None, the circuit never opens.
+    :type max_attempts: int
+
+    :param reset_timeout:
+        Seconds the circuit stays open, before a trial connect is let through.
+    :type reset_timeout: float
+
+    :param retries:
+        Number of times a command listed in pyredis.commands.IDEMPOTENT is send again,
+        if the connection failed while it was executed. If 0, commands are never retried.
+    :type retries: int
+    """
+    def __init__(
+            self,
+            base_delay=BACKOFF_BASE,
+            max_delay=BACKOFF_MAX,
+            max_attempts=None,
+            reset_timeout=CIRCUIT_RESET_TIMEOUT,
+            retries=0):
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.reset_timeout = reset_timeout
+        self.retries = retries
+
+    def before_connect(self, endpoint, reconnect=False):
+        u""" Wait until endpoint may be connected.
+
+        :param endpoint:
+            Endpoint about to be connected, like "host:port", or the path of a unix socket.
+        :type endpoint: str
+
+        :param reconnect:
+            True, if the connection was lost to an error.
+            The connect is then delayed, even if the endpoint has no failed connects.
+        :type reconnect: bool
+
+        :raises: PyRedisCircuitOpen, if the circuit of endpoint is open.
+
+        :return: None
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            failures = circuit.failures if circuit else 0
+            if circuit and circuit.open_until is not None:
+                if circuit.trial or time.time() < circuit.open_until:
+                    raise PyRedisCircuitOpen(u'Circuit open for {0}, after {1} failed connects'.format(
+                        endpoint, failures
+                    ))
+                # reset_timeout already spaced out the trial
+                circuit.trial = True
+                return
+        if failures or reconnect:
+            time.sleep(self.delay(failures))
+
+    def connect_failed(self, endpoint):
+        u""" Record a failed connect to endpoint.
+
+        :param endpoint:
+            Endpoint, like "host:port", or the path of a unix socket.
+        :type endpoint: str
+
+        :return: None
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            circuit.trial = False
+            if self.max_attempts is None:
+                return
+            if circuit.open_until is not None or circuit.failures >= self.max_attempts:
+                circuit.open_until = time.time() + self.reset_timeout
+
+    def connect_succeeded(self, endpoint):
+        u""" Record a successful connect to endpoint, which resets its backoff, and closes its circuit.
+
+        :param endpoint:
+            Endpoint, like "host:port", or the path of a unix socket.
+        :type endpoint: str
+
+        :return: None
+        """
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def delay(self, failures):
+        u""" Return a random delay, for a connect after failures failed connects.
+
+        :param failures:
+            Number of consecutive failed connects.
+        :type failures: int
+
+        :return: float
+        """
+        exponent = min(failures, _BACKOFF_EXPONENT_MAX)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** exponent))
+
+    def reset(self, endpoint=None):
+        u""" Forget failed connects, and close circuits.
+
+        :param endpoint:
+            Endpoint to reset. If None, all endpoints are reset.
+        :type endpoint: str
+
+        :return: None
+        """
+        with self._lock:
+            if endpoint is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(endpoint, None)
+
+    def should_retry(self, command, attempt):
+        u""" Check if command should be send again, after the connection failed.
+
+        :param command:
+            Command name, like "GET".
+        :type command: str
+
+        :param attempt:
+            Number of times command failed so far.
+        :type attempt: int
+
+        :return: bool
+        """
+        return attempt <= self.retries and command.upper() in IDEMPOTENT
+
+    def state(self, endpoint):
+        u""" Return the circuit state of endpoint.
+
+        :param endpoint:
+            Endpoint, like "host:port", or the path of a unix socket.
+        :type endpoint: str
+
+        :return: str, one of CIRCUIT_CLOSED, CIRCUIT_OPEN or CIRCUIT_HALF_OPEN
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if not circuit or circuit.open_until is None:
+                return CIRCUIT_CLOSED
+            if circuit.trial or time.time() >= circuit.open_until:
+                return CIRCUIT_HALF_OPEN
+            return CIRCUIT_OPEN
@@ -0,0 +1,154 @@
+from __future__ import absolute_import
+import socket
+import threading
+import time
+
+__all__ = [
+    u'Resolver',
+    u'interleave',
+    u'shared_resolver'
+]
+
+RESOLVE_TTL = 30
+
+
+def interleave(addrs):
+    u""" Order addresses by alternating address families.
+
+    The family of the first address comes first, as described in RFC 8305 section 4,
+    so a broken family costs at most one connection attempt, before the other one is tried.
+
+    :param addrs:
+        List of address tuples, as returned by socket.getaddrinfo.
+    :type addrs: list
+
+    :return: list
+    """
+    families = []
+    by_family = {}
+    for addr in addrs:
+        if addr[0] not in by_family:
+            families.append(addr[0])
+            by_family[addr[0]] = []
+        if addr not in by_family[addr[0]]:
+            by_family[addr[0]].append(addr)
+    result = []
+    while families:
+        for family in list(families):
+            result.append(by_family[family].pop(0))
+            if not by_family[family]:
+                families.remove(family)
+    return result
+
+
+class Resolver(object):
+    u""" Resolves host names with socket.getaddrinfo, and caches the result.
+
+    The cache is thread safe. Concurrent lookups of the same host wait for a single
+    query, so a reconnect storm sends one query per host, instead of one per connection.
+
+    :param ttl:
+        Seconds a lookup is cached. If 0, nothing is cached.
+    :type ttl: float
+    """
+    def __init__(self, ttl=RESOLVE_TTL):
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._lookups = {}
+        self.ttl = ttl
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+
+    def clear(self):
+        u""" Drop all cached lookups. """
+        with self._lock:
+            self._cache.clear()
+
+    def invalidate(self, host, port):
+        u""" Drop the cached lookup of host and port.
+
+        Called when no address of a host could be connected, so the next attempt resolves it again.
+
+        :param host:
+            Host Name.
+        :type host: str
+
+        :param port:
+            Port.
+        :type port: int
+        """
+        with self._lock:
+            self._cache.pop((host, port), None)
+
+    def prefer(self, host, port, sockaddr):
+        u""" Move sockaddr to the front of the cached lookup of host and port.
+
+        Called after a successful connect, so following connections try the working address first.
+
+        :param host:
+            Host Name.
+        :type host: str
+
+        :param port:
+            Port.
+        :type port: int
+
+        :param sockaddr:
+            Address that could be connected.
+        :type sockaddr: tuple
+        """
+        with self._lock:
+            entry = self._cache.get((host, port))
+            if not entry:
+                return
+            addrs = [addr for addr in entry[1] if addr[4] == sockaddr]
+            if not addrs or entry[1][0] is addrs[0]:
+                return
+            others = [addr for addr in entry[1] if addr[4] != sockaddr]
+            self._cache[(host, port)] = (entry[0], addrs + interleave(others))
+
+    def resolve(self, host, port):
+        u""" Return the addresses of host and port, ordered by interleave.
+
+        :param host:
+            Host IP or Name.
+        :type host: str
+
+        :param port:
+            Port.
+        :type port: int
+
+        :raises: socket.gaierror
+
+        :return: list of (family, socktype, proto, canonname, sockaddr) tuples
+        """
+        key = (host, port)
+        addrs = self._cached(key)
+        if addrs:
+            return addrs
+        # [lock, number of threads using it], only kept while a lookup of the host is in flight
+        with self._lock:
+            lookup = self._lookups.setdefault(key, [threading.Lock(), 0])
+            lookup[1] += 1
+        try:
+            with lookup[0]:
+                addrs = self._cached(key)
+                if addrs:
+                    return addrs
+                addrs = interleave(socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+                if self.ttl > 0 and addrs:
+                    with self._lock:
+                        self._cache[key] = (time.time() + self.ttl, addrs)
+                return addrs
+        finally:
+            with self._lock:
+                lookup[1] -= 1
+                if not lookup[1]:
+                    del self._lookups[key]
+
+
+shared_resolver = Resolver()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+u"""
+RESP corpus for the reader conformance tests.
+
+Each entry is a tuple of (name, payload, expected replies). Error replies are
+represented by the ERROR marker tuple ('error', message).
+Arrays are nested at most 7 levels deep, which is the limit of older hiredis versions.
+
+Replies with an invalid encoding are where the readers differ, so CORPUS_INVALID_UTF8
+holds the expected replies of both: the python reader returns the raw string,
+hiredis raises UnicodeDecodeError for the whole reply, represented by DECODE_ERROR,
+and continues with the next one.
+"""
+from __future__ import absolute_import
+
+ERROR = u'error'
+DECODE_ERROR = u'decode_error'
+
+CORPUS = [
+    (u'status', '+OK\r\n', ['OK']),
+    (u'status_many', '+OK\r\n' * 100, ['OK'] * 100),
+    (u'error', '-ERR unknown command\r\n', [(ERROR, u'ERR unknown command')]),
+    (u'integer', ':1\r\n:-1\r\n:0\r\n', [1, -1, 0]),
+    (u'integer_big', ':9223372036854775807\r\n', [9223372036854775807]),
+    (u'bulk', '$5\r\nhello\r\n', ['hello']),
+    (u'bulk_empty', '$0\r\n\r\n', ['']),
+    (u'bulk_null', '$-1\r\n', [None]),
+    (u'bulk_crlf', '$4\r\n\r\n\r\n\r\n', ['\r\n\r\n']),
+    (u'bulk_binary', '$4\r\n\x00\xff\x00\xff\r\n', ['\x00\xff\x00\xff']),
+    (u'bulk_big', '$100000\r\n' + 'x' * 100000 + '\r\n', ['x' * 100000]),
+    (u'array_empty', '*0\r\n', [[]]),
+    (u'array_null', '*-1\r\n', [None]),
+    (u'array', '*3\r\n$3\r\nfoo\r\n:42\r\n$-1\r\n', [['foo', 42, None]]),
+    (u'array_errors', '*2\r\n-err0\r\n-err1\r\n', [[(ERROR, u'err0'), (ERROR, u'err1')]]),
+    (u'array_nested', '*2\r\n*2\r\n+a\r\n+b\r\n*0\r\n', [[['a', 'b'], []]]),
+    (u'array_deep', '*1\r\n' * 7 + ':1\r\n', [[[[[[[[1]]]]]]]]),
+    (u'hgetall', '*4\r\n$5\r\nfield\r\n$5\r\nvalue\r\n$6\r\nfield2\r\n$6\r\nvalue2\r\n',
+     [['field', 'value', 'field2', 'value2']]),
+    (u'scan_page', '*2\r\n$2\r\n17\r\n*3\r\n$4\r\nkey1\r\n$4\r\nkey2\r\n$4\r\nkey3\r\n',
+     [['17', ['key1', 'key2', 'key3']]]),
+    (u'cluster_slots', '*1\r\n*4\r\n:0\r\n:5460\r\n*3\r\n$9\r\n127.0.0.1\r\n:7000\r\n$4\r\nabcd\r\n'
+                       '*3\r\n$9\r\n127.0.0.1\r\n:7003\r\n$4\r\nefgh\r\n',
+     [[[0, 5460, ['127.0.0.1', 7000, 'abcd'], ['127.0.0.1', 7003, 'efgh']]]]),
+    (u'mixed', '+OK\r\n:1\r\n$3\r\nfoo\r\n*1\r\n$3\r\nbar\r\n-ERR\r\n',
+     ['OK', 1, 'foo', ['bar'], (ERROR, u'ERR')]),
+]
+
+CORPUS_UTF8 = [
+    (u'status_utf8', '+OK\r\n', [u'OK']),
+    (u'bulk_utf8', '$3\r\n\xe2\x98\x83\r\n', [u'☃']),
+    (u'array_utf8', '*2\r\n$3\r\n\xe2\x98\x83\r\n:1\r\n', [[u'☃', 1]]),
+]
+
+# (name, payload, python reader replies, hiredis replies)
+CORPUS_INVALID_UTF8 = [
+    (u'status_invalid_utf8', '+\xff\r\n+OK\r\n', ['\xff', u'OK'], [DECODE_ERROR, u'OK']),
+    (u'bulk_invalid_utf8', '$2\r\n\xff\xfe\r\n+OK\r\n', ['\xff\xfe', u'OK'], [DECODE_ERROR, u'OK']),
+    (u'array_invalid_utf8', '*2\r\n$1\r\n\xff\r\n:1\r\n+OK\r\n', [['\xff', 1], u'OK'], [DECODE_ERROR, u'OK']),
+]
@@ -0,0 +1,267 @@
+from __future__ import absolute_import
+from unittest import TestCase, skipIf
+from unittest.mock import Mock, patch
+
+from pyredis.exceptions import *
+from pyredis.protocol import writer, pack_commands
+import pyredis.aio
+
+asyncio = pyredis.aio.asyncio
+
+
+class FakeTransport(object):
+    u""" Transport answering every write with the next of replies. """
+    def __init__(self, loop, protocol, replies):
+        self.loop = loop
+        self.protocol = protocol
+        self.replies = replies if callable(replies) else list(replies)
+        self.written = []
+        self.closed = False
+
+    def write(self, data):
+        self.written.append(data)
+        if callable(self.replies):
+            self.loop.call_soon(self.protocol.data_received, self.replies(data))
+        elif self.replies:
+            self.loop.call_soon(self.protocol.data_received, self.replies.pop(0))
+
+    def close(self):
+        self.closed = True
+        self.loop.call_soon(self.protocol.connection_lost, None)
+
+    def get_extra_info(self, name):
+        return None
+
+
+@skipIf(not asyncio, u'trollius is not installed')
+class TestRedisProtocolUnit(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.reader = pyredis.aio.PythonReader()
+        self.redis = pyredis.aio.RedisProtocol(self.reader, loop=self.loop)
+        self.transport = Mock()
+        self.redis.connection_made(self.transport)
+
+    def test_send_coalesces_writes(self):
+        self.redis.send(writer(u'GET', u'a'), 1)
+        self.redis.send(writer(u'GET', u'b'), 1)
+        self.loop.run_until_complete(asyncio.sleep(0, loop=self.loop))
+        self.transport.write.assert_called_once_with(writer(u'GET', u'a') + writer(u'GET', u'b'))
+
+    def test_data_received_in_order(self):
+        first, = self.redis.send(writer(u'GET', u'a'), 1)
+        second, third = self.redis.send(pack_commands([(u'GET', u'b'), (u'GET', u'c')]), 2)
+        self.redis.data_received('$1\r\na\r\n$1\r')
+        self.assertEqual(first.result(), 'a')
+        self.assertFalse(second.done())
+        self.redis.data_received('\nb\r\n-ERR c\r\n')
+        self.assertEqual(second.result(), 'b')
+        self.assertIsInstance(third.result(), ReplyError)
+
+    def test_data_received_cancelled(self):
+        first, second = self.redis.send(pack_commands([(u'GET', u'a'), (u'GET', u'b')]), 2)
+        first.cancel()
+        self.redis.data_received('$1\r\na\r\n$1\r\nb\r\n')
+        self.assertEqual(second.result(), 'b')
+
+    def test_data_received_decode(self):
+        reader = pyredis.aio.PythonReader(encoding=u'utf-8')
+        redis = pyredis.aio.RedisProtocol(reader, encoding=u'utf-8', loop=self.loop)
+        redis.connection_made(self.transport)
+        raw, = redis.send(writer(u'GET', u'a'), 1, decode=False)
+        decoded, = redis.send(writer(u'GET', u'a'), 1)
+        redis.data_received('$2\r\n\xc3\xa4\r\n$2\r\n\xc3\xa4\r\n')
+        self.assertEqual(raw.result(), '\xc3\xa4')
+        self.assertEqual(decoded.result(), u'\xe4')
+
+    def test_data_received_push_handler(self):
+        handler = Mock()
+        redis = pyredis.aio.RedisProtocol(self.reader, push_handler=handler, loop=self.loop)
+        redis.connection_made(self.transport)
+        future, = redis.send(writer(u'GET', u'a'), 1)
+        redis.data_received('>2\r\n+message\r\n+hi\r\n$1\r\na\r\n')
+        handler.assert_called_once_with(['message', 'hi'])
+        self.assertEqual(future.result(), 'a')
+
+    def test_data_received_push_dropped(self):
+        first, second = self.redis.send(pack_commands([(u'GET', u'a'), (u'GET', u'b')]), 2)
+        self.redis.data_received('$1\r\na\r\n>2\r\n+message\r\n+hi\r\n$1\r\nb\r\n')
+        self.assertEqual(first.result(), 'a')
+        self.assertEqual(second.result(), 'b')
+
+    def test_data_received_protocol_error(self):
+        future, = self.redis.send(writer(u'GET', u'a'), 1)
+        self.redis.data_received('?\r\n')
+        self.assertRaises(PyRedisConnError, future.result)
+        self.assertTrue(self.redis.closed)
+        self.transport.close.assert_called_with()
+
+    def test_connection_lost(self):
+        future, = self.redis.send(writer(u'GET', u'a'), 1)
+        self.redis.connection_lost(None)
+        self.assertRaises(PyRedisConnClosed, future.result)
+        self.assertRaises(PyRedisConnClosed, self.redis.send, writer(u'GET', u'a'), 1)
+
+
+@skipIf(not asyncio, u'trollius is not installed')
+class TestAsyncConnectionUnit(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.transports = []
+
+    def connect(self, *replies):
+        if len(replies) == 1 and callable(replies[0]):
+            replies = replies[0]
+        @asyncio.coroutine
+        def create_connection(factory, *args):
+            protocol = factory()
+            transport = FakeTransport(self.loop, protocol, replies)
+            self.transports.append(transport)
+            protocol.connection_made(transport)
+            return transport, protocol
+        self.loop.create_connection = Mock(side_effect=create_connection)
+        self.loop.create_unix_connection = Mock(side_effect=create_connection)
+
+    def run_until_complete(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test___init__(self):
+        self.assertRaises(PyRedisError, pyredis.aio.AsyncConnection, loop=self.loop)
+        self.assertRaises(PyRedisError, pyredis.aio.AsyncConnection, host=u'localhost', protocol=4, loop=self.loop)
+        with patch(u'pyredis.aio.asyncio', None):
+            self.assertRaises(PyRedisError, pyredis.aio.AsyncConnection, host=u'localhost')
+
+    def test_execute(self):
+        self.connect('$3\r\nbar\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        self.assertEqual(self.run_until_complete(connection.execute(u'GET', u'foo')), 'bar')
+        self.loop.create_connection.assert_called_once_with(
+            self.loop.create_connection.call_args[0][0], u'localhost', 6379
+        )
+        self.assertEqual(self.transports[0].written, [writer(u'GET', u'foo')])
+
+    def test_execute_unix_sock(self):
+        self.connect('+OK\r\n')
+        connection = pyredis.aio.AsyncConnection(unix_sock=u'/tmp/redis.sock', loop=self.loop)
+        self.assertEqual(self.run_until_complete(connection.execute(u'PING')), 'OK')
+        self.assertEqual(self.loop.create_unix_connection.call_args[0][1], u'/tmp/redis.sock')
+
+    def test_execute_reply_error(self):
+        self.connect('-ERR wrong type\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        self.assertRaises(ReplyError, self.run_until_complete, connection.execute(u'GET', u'foo'))
+        self.assertFalse(connection.closed)
+
+    def test_execute_concurrent(self):
+        def echo_keys(data):
+            reader = pyredis.aio.PythonReader()
+            reader.feed(data)
+            return ''.join('$1\r\n{0}\r\n'.format(command[1]) for command in reader.gets_many())
+        self.connect(echo_keys)
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        results = self.run_until_complete(asyncio.gather(
+            *[connection.execute(u'GET', key) for key in u'abcdefgh'],
+            loop=self.loop
+        ))
+        self.assertEqual(results, list('abcdefgh'))
+        self.assertEqual(self.loop.create_connection.call_count, 1)
+        self.assertEqual(len(self.transports[0].written), 1)
+
+    def test_execute_many(self):
+        self.connect('+OK\r\n-ERR no\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        commands = [(u'SET', u'a', 1), (u'INCR', u'b')]
+        results = self.run_until_complete(connection.execute_many(commands, raise_on_result_err=False))
+        self.assertEqual(results[0], 'OK')
+        self.assertIsInstance(results[1], ReplyError)
+        self.assertEqual(self.transports[0].written, [pack_commands(commands)])
+
+    def test_execute_handshake_piggybacked(self):
+        self.connect('+OK\r\n+OK\r\n$3\r\nbar\r\n')
+        connection = pyredis.aio.AsyncConnection(
+            host=u'localhost', password=u'testpass', client_name=u'worker', loop=self.loop
+        )
+        self.assertEqual(self.run_until_complete(connection.execute(u'GET', u'foo')), 'bar')
+        self.assertEqual(self.transports[0].written, [
+            writer(u'AUTH', u'testpass') + writer(u'CLIENT', u'SETNAME', u'worker') + writer(u'GET', u'foo')
+        ])
+
+    def test_execute_handshake_error(self):
+        self.connect('-ERR invalid password\r\n$3\r\nbar\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', password=u'testpass', loop=self.loop)
+        self.assertRaises(ReplyError, self.run_until_complete, connection.execute(u'GET', u'foo'))
+        self.assertTrue(connection.closed)
+
+    def test_execute_select_not_piggybacked(self):
+        self.connect('-ERR DB index is out of range\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', database=23234, loop=self.loop)
+        self.assertRaises(ReplyError, self.run_until_complete, connection.execute(u'SET', u'foo', u'bar'))
+        self.assertEqual(self.transports[0].written, [writer(u'SELECT', 23234)])
+
+    def test_execute_read_timeout(self):
+        self.connect()
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', read_timeout=0.01, loop=self.loop)
+        self.assertRaises(PyRedisConnReadTimeout, self.run_until_complete, connection.execute(u'BLPOP', u'list', 0))
+
+    def test_execute_reconnect(self):
+        self.connect('+OK\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        self.run_until_complete(connection.execute(u'PING'))
+        self.transports[0].close()
+        self.run_until_complete(asyncio.sleep(0, loop=self.loop))
+        self.run_until_complete(connection.execute(u'PING'))
+        self.assertEqual(self.loop.create_connection.call_count, 2)
+
+    def test_connect_error(self):
+        @asyncio.coroutine
+        def create_connection(*args):
+            raise OSError(111, u'Connection refused')
+        self.loop.create_connection = Mock(side_effect=create_connection)
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        self.assertRaises(PyRedisConnError, self.run_until_complete, connection.execute(u'PING'))
+
+    def test_close(self):
+        self.connect('+OK\r\n')
+        connection = pyredis.aio.AsyncConnection(host=u'localhost', loop=self.loop)
+        self.run_until_complete(connection.execute(u'PING'))
+        connection.close()
+        self.assertTrue(connection.closed)
+        self.assertTrue(self.transports[0].closed)
+        self.assertRaises(PyRedisConnError, self.run_until_complete, connection.execute(u'PING'))
+
+
+@skipIf(not asyncio, u'trollius is not installed')
+class TestAsyncClientUnit(TestCase):
+    def setUp(self):
+        self.addCleanup(patch.stopall)
+        connection_patcher = patch(u'pyredis.aio.AsyncConnection', autospec=True)
+        self.connection_mock = connection_patcher.start()
+
+    def test_execute(self):
+        client = pyredis.aio.AsyncClient(host=u'localhost')
+        self.connection_mock.assert_called_with(host=u'localhost')
+        result = client.get(u'foo')
+        client._conn.execute.assert_called_with(u'GET', u'foo', decode=True)
+        self.assertEqual(result, client._conn.execute.return_value)
+
+    def test_execute_no_decode(self):
+        client = pyredis.aio.AsyncClient(host=u'localhost')
+        client.dump(u'foo')
+        client._conn.execute.assert_called_with(u'DUMP', u'foo', decode=False)
+
+    def test_no_transaction(self):
+        client = pyredis.aio.AsyncClient(host=u'localhost')
+        self.assertFalse(hasattr(client, u'multi'))
+        self.assertFalse(hasattr(client, u'exec'))
+
+    def test_execute_many(self):
+        client = pyredis.aio.AsyncClient(host=u'localhost')
+        client.execute_many([(u'GET', u'foo')])
+        client._conn.execute_many.assert_called_with([(u'GET', u'foo')], True)
+
+    def test_close(self):
+        client = pyredis.aio.AsyncClient(host=u'localhost')
+        client.close()
+        client._conn.close.assert_called_with()
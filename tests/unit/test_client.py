@@ -8,7 +8,9 @@ from unittest.mock import Mock, MagicMock, PropertyMock, call, patch
 from collections import deque
 
 import pyredis.client
+from pyredis.reconnect import ReconnectPolicy
 from pyredis.exceptions import *
+from pyredis.protocol import pack_commands
 
 try:
     from hiredis import ReplyError
@@ -34,7 +36,7 @@ class TestClientUnit(TestCase):
 
     def test__bulk_fetch(self):
         conn_mock = Mock()
-        conn_mock.read.return_value = 'PONG'
+        conn_mock.read_many.return_value = ['PONG', 'PONG', 'PONG']
         self.connection_mock.return_value = conn_mock
 
         client = pyredis.client.Client(host=u'127.0.0.1')
@@ -43,12 +45,9 @@ class TestClientUnit(TestCase):
         client._bulk_size_current = 3
 
         client._bulk_fetch()
-        conn_mock.read.assert_has_calls([
-            call(raise_on_result_err=False),
-            call(raise_on_result_err=False),
-            call(raise_on_result_err=False)
-        ])
+        conn_mock.read_many.assert_called_once_with(3, raise_on_result_err=False)
         self.assertEqual(client._bulk_results, ['PONG', 'PONG', 'PONG'])
+        self.assertEqual(client._bulk_size_current, 0)
 
     def test__execute_basic(self):
         conn_mock = Mock()
@@ -58,9 +57,64 @@ class TestClientUnit(TestCase):
         client = pyredis.client.Client(host=u'127.0.0.1')
         result = client._execute_basic(u'Ping')
         conn_mock.write.assert_called_with(u'Ping')
-        conn_mock.read.assert_called_with()
+        conn_mock.read.assert_called_with(decode=True, as_array=None)
         self.assertEqual(result, 'PONG')
 
+    def test__execute_basic_retry(self):
+        conn_mock = Mock()
+        conn_mock.closed = False
+        conn_mock.reconnect_policy = ReconnectPolicy(retries=1)
+        conn_mock.read.side_effect = [PyRedisConnClosed(u'lost'), 'bar']
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        self.assertEqual(client._execute_basic(u'GET', u'foo'), 'bar')
+        self.assertEqual(conn_mock.write.call_args_list, [call(u'GET', u'foo'), call(u'GET', u'foo')])
+
+    def test__execute_basic_retry_exhausted(self):
+        conn_mock = Mock()
+        conn_mock.closed = False
+        conn_mock.reconnect_policy = ReconnectPolicy(retries=1)
+        conn_mock.write.side_effect = PyRedisConnError(u'lost')
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        self.assertRaises(PyRedisConnError, client._execute_basic, u'GET', u'foo')
+        self.assertEqual(conn_mock.write.call_count, 2)
+
+    def test__execute_basic_retry_not_idempotent(self):
+        conn_mock = Mock()
+        conn_mock.closed = False
+        conn_mock.reconnect_policy = ReconnectPolicy(retries=1)
+        conn_mock.read.side_effect = PyRedisConnReadTimeout(u'timeout')
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        self.assertRaises(PyRedisConnReadTimeout, client._execute_basic, u'INCR', u'foo')
+        self.assertEqual(conn_mock.write.call_count, 1)
+
+    def test__execute_basic_retry_circuit_open(self):
+        conn_mock = Mock()
+        conn_mock.closed = False
+        conn_mock.reconnect_policy = ReconnectPolicy(retries=1)
+        conn_mock.write.side_effect = PyRedisCircuitOpen(u'open')
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        self.assertRaises(PyRedisCircuitOpen, client._execute_basic, u'GET', u'foo')
+        self.assertEqual(conn_mock.write.call_count, 1)
+
+    def test__execute_basic_no_retry_without_policy(self):
+        conn_mock = Mock()
+        conn_mock.closed = True
+        conn_mock.reconnect_policy = None
+        conn_mock.read.side_effect = PyRedisConnClosed(u'lost')
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        self.assertRaises(PyRedisConnClosed, client._execute_basic, u'GET', u'foo')
+        self.assertEqual(conn_mock.write.call_count, 1)
+
     def test__execute_bulk_bulk_size_not_reached(self):
         conn_mock = Mock()
         self.connection_mock.return_value = conn_mock
@@ -68,12 +122,41 @@ class TestClientUnit(TestCase):
         client = pyredis.client.Client(host=u'127.0.0.1')
         client.bulk_start()
         result = client._execute_bulk(u'Ping')
-        conn_mock.write.assert_called_with(u'Ping')
+        self.assertFalse(conn_mock.write.called)
+        self.assertFalse(conn_mock.write_packed.called)
+        self.assertEqual(client._bulk_buf, pack_commands([(u'Ping',)]))
         self.assertIsNone(result)
 
+    def test__execute_bulk_flush_size_reached(self):
+        conn_mock = Mock()
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start(flush_size=2)
+        client._execute_bulk(u'SET', u'a', 1)
+        self.assertFalse(conn_mock.write_packed.called)
+        client._execute_bulk(u'SET', u'b', 2)
+        conn_mock.write_packed.assert_called_once_with(pack_commands([(u'SET', u'a', 1), (u'SET', u'b', 2)]))
+        self.assertEqual(client._bulk_buf, bytearray())
+        self.assertEqual(client._bulk_buf_size, 0)
+        self.assertEqual(client._bulk_size_current, 2)
+
+    def test__execute_bulk_flush_bytes_reached(self):
+        conn_mock = Mock()
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start(flush_bytes=64)
+        client._execute_bulk(u'SET', u'a', u'x')
+        self.assertFalse(conn_mock.write_packed.called)
+        client._execute_bulk(u'SET', u'b', u'x' * 64)
+        conn_mock.write_packed.assert_called_once_with(
+            pack_commands([(u'SET', u'a', u'x'), (u'SET', u'b', u'x' * 64)])
+        )
+
     def test__execute_bulk_bulk_size_reached(self):
         conn_mock = Mock()
-        conn_mock.read.return_value = 'PONG'
+        conn_mock.read_many.return_value = ['PONG', 'PONG', 'PONG']
         self.connection_mock.return_value = conn_mock
 
         client = pyredis.client.Client(host=u'127.0.0.1')
@@ -90,6 +173,98 @@ class TestClientUnit(TestCase):
         self.assertIsNone(result)
         self.assertEqual(client._bulk_size_current, 0)
         self.assertEqual(client._bulk_results, ['PONG', 'PONG', 'PONG'])
+        conn_mock.write_packed.assert_called_once_with(pack_commands([(u'Ping',)] * 3))
+        self.assertFalse(conn_mock.write.called)
+
+    def test__execute_bulk_duplex(self):
+        conn_mock = Mock()
+        conn_mock.write_packed_duplex.return_value = ['OK']
+        conn_mock.read_many.return_value = ['OK']
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start(flush_size=2, duplex=True)
+        client._execute_bulk(u'SET', u'a', 1)
+        client._execute_bulk(u'SET', u'b', 2)
+        conn_mock.write_packed_duplex.assert_called_once_with(pack_commands([(u'SET', u'a', 1), (u'SET', u'b', 2)]))
+        self.assertFalse(conn_mock.write_packed.called)
+        self.assertEqual(client._bulk_size_current, 1)
+        self.assertEqual(client._bulk_results, ['OK'])
+        self.assertEqual(client.bulk_stop(), ['OK', 'OK'])
+        conn_mock.read_many.assert_called_once_with(1, raise_on_result_err=False)
+
+    def test__bulk_fetch_callback(self):
+        conn_mock = Mock()
+        conn_mock.read_many.side_effect = [['OK', 'OK'], [ReplyError(u'ERR')]]
+        self.connection_mock.return_value = conn_mock
+        callback = Mock()
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start(bulk_size=2, callback=callback)
+        for key in (u'a', u'b', u'c'):
+            client._execute_bulk(u'SET', key, 1)
+        self.assertIsNone(client.bulk_stop())
+        self.assertEqual(callback.call_args_list[:2], [call(0, 'OK'), call(1, 'OK')])
+        self.assertEqual(callback.call_count, 3)
+        self.assertEqual(callback.call_args[0][0], 2)
+        self.assertIsInstance(callback.call_args[0][1], ReplyError)
+
+    def test__bulk_fetch_errors_only(self):
+        conn_mock = Mock()
+        error = ReplyError(u'ERR')
+        conn_mock.read_many.side_effect = [['OK', error], ['OK']]
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start(bulk_size=2, keep_results=False, errors_only=True)
+        for key in (u'a', u'b', u'c'):
+            client._execute_bulk(u'INCR', key)
+        self.assertEqual(client.bulk_stop(), [(1, error)])
+
+    def test_bulk_iter(self):
+        conn_mock = Mock()
+        conn_mock.read_many.side_effect = [['OK', 'OK'], ['OK']]
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        commands = [(u'SET', key, 1) for key in (u'a', u'b', u'c')]
+        result = client.bulk_iter(commands, bulk_size=2)
+        self.assertEqual(next(result), (0, 'OK'))
+        self.assertEqual(conn_mock.read_many.call_count, 1)
+        self.assertEqual(list(result), [(1, 'OK'), (2, 'OK')])
+        self.assertFalse(client.bulk)
+
+    def test_bulk_iter_close(self):
+        conn_mock = Mock()
+        conn_mock.read_many.side_effect = [['OK', 'OK'], ['OK']]
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        commands = [(u'SET', key, 1) for key in (u'a', u'b', u'c')]
+        result = client.bulk_iter(commands, bulk_size=2)
+        next(result)
+        result.close()
+        self.assertFalse(client.bulk)
+        self.assertEqual(conn_mock.read_many.call_count, 2)
+
+    def test_bulk_iter_error(self):
+        conn_mock = Mock()
+        conn_mock.write_packed.side_effect = PyRedisConnError(u'lost')
+        conn_mock.read_many.side_effect = PyRedisConnError(u'lost')
+        self.connection_mock.return_value = conn_mock
+
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        commands = [(u'SET', key, 1) for key in (u'a', u'b', u'c')]
+        result = client.bulk_iter(commands, bulk_size=2)
+        self.assertRaises(PyRedisConnError, list, result)
+        self.assertFalse(client.bulk)
+
+    def test_bulk_stop_error(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client.bulk_start()
+        client._bulk_fetch = Mock(side_effect=PyRedisConnError(u'lost'))
+        self.assertRaises(PyRedisConnError, client.bulk_stop)
+        self.assertFalse(client.bulk)
 
     def test_execute_non_bulk(self):
         client = pyredis.client.Client(host=u'127.0.0.1')
@@ -97,7 +272,7 @@ class TestClientUnit(TestCase):
         client._execute_basic.return_value = 'PONG'
 
         result = client.execute(u'Ping')
-        client._execute_basic.assert_called_with(u'Ping')
+        client._execute_basic.assert_called_with(u'Ping', decode=True, as_array=None)
         self.assertEqual(result, 'PONG')
 
     def test_bulk(self):
@@ -161,7 +336,7 @@ class TestClientUnit(TestCase):
         client._execute_basic = Mock()
         client._execute_basic.return_value = 'PONG'
         result = client.execute('PING')
-        client._execute_basic.assert_called_with('PING')
+        client._execute_basic.assert_called_with('PING', decode=True, as_array=None)
         self.assertEqual(result, 'PONG')
 
     def test_execute_bulk(self):
@@ -171,6 +346,52 @@ class TestClientUnit(TestCase):
         client.execute('PING')
         client._execute_bulk.assert_called_with('PING')
 
+    def test_execute_no_decode(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._execute_basic = Mock()
+        client.execute('GET', 'key', decode=False)
+        client._execute_basic.assert_called_with('GET', 'key', decode=False, as_array=None)
+
+    def test_execute_as_array(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._execute_basic = Mock()
+        client.execute('MGET', 'a', 'b', as_array=u'q')
+        client._execute_basic.assert_called_with('MGET', 'a', 'b', decode=True, as_array=u'q')
+
+    def test_dump_no_decode(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._execute_basic = Mock()
+        client.dump('key')
+        client._execute_basic.assert_called_with(u'DUMP', 'key', decode=False, as_array=None)
+
+    def test_execute_iter(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._conn.read_stream.return_value = iter(['a', 'b'])
+        result = client.execute_iter('SMEMBERS', 'key')
+        client._conn.write.assert_called_with('SMEMBERS', 'key')
+        self.assertEqual(list(result), ['a', 'b'])
+
+    def test_execute_iter_bulk(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._bulk = True
+        self.assertRaises(PyRedisError, client.execute_iter, 'SMEMBERS', 'key')
+
+    def test_pipeline(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._conn.read_many.return_value = ['OK', 'bar']
+        with client.pipeline() as pipe:
+            pipe.set('foo', 'bar')
+            future = pipe.get('foo')
+        client._conn.write_packed.assert_called_once_with(
+            pack_commands([(u'SET', 'foo', 'bar'), (u'GET', 'foo')])
+        )
+        self.assertEqual(future.result(), 'bar')
+
+    def test_pipeline_bulk(self):
+        client = pyredis.client.Client(host=u'127.0.0.1')
+        client._bulk = True
+        self.assertRaises(PyRedisError, client.pipeline)
+
 
 class TestHashClientUnit(TestCase):
     def setUp(self):
@@ -190,9 +411,24 @@ class TestHashClientUnit(TestCase):
 
         self.assertEqual(client._conn_names, [u'localhost_7001', u'localhost_7002', u'localhost_7003'])
         self.connection_mock.assert_has_calls([
-            call(host=u'localhost', port=7001, conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2),
-            call(host=u'localhost', port=7002, conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2),
-            call(host=u'localhost', port=7003, conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2)
+            call(host=u'localhost', port=7001, unix_sock=None, peer_uid=None,
+                 conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2,
+                 recv_buffer_size=1500, recv_buffer_adaptive=False, parser=u'auto',
+                 lazy_decode=False, protocol=2, push_handler=None, client_name=None, reconnect_policy=None,
+                 tcp_nodelay=True, keepalive=False, keepalive_idle=None, keepalive_interval=None,
+                 keepalive_count=None, so_sndbuf=None, so_rcvbuf=None, tcp_user_timeout=None),
+            call(host=u'localhost', port=7002, unix_sock=None, peer_uid=None,
+                 conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2,
+                 recv_buffer_size=1500, recv_buffer_adaptive=False, parser=u'auto',
+                 lazy_decode=False, protocol=2, push_handler=None, client_name=None, reconnect_policy=None,
+                 tcp_nodelay=True, keepalive=False, keepalive_idle=None, keepalive_interval=None,
+                 keepalive_count=None, so_sndbuf=None, so_rcvbuf=None, tcp_user_timeout=None),
+            call(host=u'localhost', port=7003, unix_sock=None, peer_uid=None,
+                 conn_timeout=2, database=0, encoding=None, password=None, read_timeout=2,
+                 recv_buffer_size=1500, recv_buffer_adaptive=False, parser=u'auto',
+                 lazy_decode=False, protocol=2, push_handler=None, client_name=None, reconnect_policy=None,
+                 tcp_nodelay=True, keepalive=False, keepalive_idle=None, keepalive_interval=None,
+                 keepalive_count=None, so_sndbuf=None, so_rcvbuf=None, tcp_user_timeout=None)
         ])
         self.assertEqual(client._map[0], u'localhost_7001')
         self.assertEqual(client._map[1], u'localhost_7002')
@@ -201,34 +437,40 @@ class TestHashClientUnit(TestCase):
         self.assertEqual(client._map[4], u'localhost_7002')
         self.assertEqual(client._map[5], u'localhost_7003')
 
+    def test___init___unix_sock_buckets(self):
+        client = pyredis.client.HashClient(buckets=[(u'localhost', 7001), u'/tmp/redis.sock'], peer_uid=999)
+
+        self.assertEqual(client._conn_names, [u'localhost_7001', u'/tmp/redis.sock'])
+        self.assertEqual(self.connection_mock.call_args_list[0][1][u'host'], u'localhost')
+        self.assertIsNone(self.connection_mock.call_args_list[0][1][u'unix_sock'])
+        self.assertIsNone(self.connection_mock.call_args_list[1][1][u'host'])
+        self.assertEqual(self.connection_mock.call_args_list[1][1][u'unix_sock'], u'/tmp/redis.sock')
+        self.assertEqual(self.connection_mock.call_args_list[1][1][u'peer_uid'], 999)
+        self.assertEqual(client._map[1], u'/tmp/redis.sock')
+
     def test__bulk_fetch(self):
         conn_mock_1 = Mock()
-        conn_mock_1.read.return_value = 'PONG1'
+        conn_mock_1.read_many.return_value = ['PONG1a', 'PONG1b']
         conn_mock_2 = Mock()
-        conn_mock_2.read.return_value = 'PONG2'
+        conn_mock_2.read_many.return_value = ['PONG2']
         conn_mock_3 = Mock()
-        conn_mock_3.read.return_value = 'PONG3'
+        conn_mock_3.read_many.return_value = ['PONG3']
         self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
 
         client = pyredis.client.HashClient(buckets=self.buckets)
         client._bulk_keep = True
         client._bulk_results = []
-        client._bulk_size_current = 3
+        client._bulk_size_current = 4
         client._bulk_bucket_order.append(conn_mock_1)
         client._bulk_bucket_order.append(conn_mock_2)
+        client._bulk_bucket_order.append(conn_mock_1)
         client._bulk_bucket_order.append(conn_mock_3)
 
         client._bulk_fetch()
-        conn_mock_1.read.assert_has_calls([
-            call(raise_on_result_err=False),
-        ])
-        conn_mock_2.read.assert_has_calls([
-            call(raise_on_result_err=False),
-        ])
-        conn_mock_3.read.assert_has_calls([
-            call(raise_on_result_err=False),
-        ])
-        self.assertEqual(client._bulk_results, ['PONG1', 'PONG2', 'PONG3'])
+        conn_mock_1.read_many.assert_called_once_with(2, raise_on_result_err=False)
+        conn_mock_2.read_many.assert_called_once_with(1, raise_on_result_err=False)
+        conn_mock_3.read_many.assert_called_once_with(1, raise_on_result_err=False)
+        self.assertEqual(client._bulk_results, ['PONG1a', 'PONG2', 'PONG1b', 'PONG3'])
         self.assertEqual(client._bulk_size_current, 0)
         self.assertEqual(client._bulk_bucket_order, [])
 
@@ -245,7 +487,7 @@ class TestHashClientUnit(TestCase):
 
         result = client._execute_basic(u'Ping', conn=conn_mock_1)
         conn_mock_1.write.assert_called_with(u'Ping')
-        conn_mock_1.read.assert_called_with()
+        conn_mock_1.read.assert_called_with(decode=True, as_array=None)
         self.assertEqual(result, 'PONG1')
 
     def test__execute_bulk_bulk_size_not_reached(self):
@@ -257,16 +499,36 @@ class TestHashClientUnit(TestCase):
         client = pyredis.client.HashClient(buckets=self.buckets)
         client.bulk_start()
         result = client._execute_bulk(u'Ping', conn=conn_mock_1)
-        conn_mock_1.write.assert_called_with(u'Ping')
+        self.assertFalse(conn_mock_1.write.called)
+        self.assertFalse(conn_mock_1.write_packed.called)
+        self.assertEqual(client._bulk_bufs, {conn_mock_1: pack_commands([(u'Ping',)])})
         self.assertIsNone(result)
 
+    def test__execute_bulk_flush_size_reached(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        client.bulk_start(flush_size=3)
+        client._execute_bulk(u'Ping', conn=conn_mock_1)
+        client._execute_bulk(u'Ping', conn=conn_mock_2)
+        self.assertFalse(conn_mock_1.write_packed.called)
+        client._execute_bulk(u'Echo', u'x', conn=conn_mock_1)
+        conn_mock_1.write_packed.assert_called_once_with(pack_commands([(u'Ping',), (u'Echo', u'x')]))
+        conn_mock_2.write_packed.assert_called_once_with(pack_commands([(u'Ping',)]))
+        self.assertFalse(conn_mock_3.write_packed.called)
+        self.assertEqual(client._bulk_bufs, {})
+        self.assertEqual(client._bulk_buf_size, 0)
+
     def test__execute_bulk_bulk_size_reached(self):
         conn_mock_1 = Mock()
-        conn_mock_1.read.return_value = 'PONG1'
+        conn_mock_1.read_many.return_value = ['PONG1']
         conn_mock_2 = Mock()
-        conn_mock_2.read.return_value = 'PONG2'
+        conn_mock_2.read_many.return_value = ['PONG2']
         conn_mock_3 = Mock()
-        conn_mock_3.read.return_value = 'PONG3'
+        conn_mock_3.read_many.return_value = ['PONG3']
         self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
 
         client = pyredis.client.HashClient(buckets=self.buckets)
@@ -283,6 +545,77 @@ class TestHashClientUnit(TestCase):
         self.assertIsNone(result)
         self.assertEqual(client._bulk_size_current, 0)
         self.assertEqual(client._bulk_results, ['PONG1', 'PONG2', 'PONG3'])
+        for conn_mock in (conn_mock_1, conn_mock_2, conn_mock_3):
+            conn_mock.write_packed.assert_called_once_with(pack_commands([(u'Ping',)]))
+
+    def test__execute_bulk_duplex(self):
+        conn_mock_1 = Mock()
+        conn_mock_1.write_packed_duplex.return_value = ['PONG1a']
+        conn_mock_1.read_many.return_value = ['PONG1b']
+        conn_mock_2 = Mock()
+        conn_mock_2.write_packed_duplex.return_value = []
+        conn_mock_2.read_many.return_value = ['PONG2']
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        client.bulk_start(flush_size=3, duplex=True)
+        client._execute_bulk(u'Ping', conn=conn_mock_1)
+        client._execute_bulk(u'Ping', conn=conn_mock_2)
+        client._execute_bulk(u'Ping', conn=conn_mock_1)
+        self.assertEqual(client._bulk_drained, {conn_mock_1: ['PONG1a']})
+        self.assertEqual(client.bulk_stop(), ['PONG1a', 'PONG2', 'PONG1b'])
+        conn_mock_1.read_many.assert_called_once_with(1, raise_on_result_err=False)
+        conn_mock_2.read_many.assert_called_once_with(1, raise_on_result_err=False)
+        self.assertFalse(conn_mock_1.write_packed.called)
+        self.assertEqual(client._bulk_drained, {})
+
+    def test_bulk_reuse_after_error(self):
+        conn_mock_1 = Mock()
+        conn_mock_1.write_packed.side_effect = [PyRedisConnError(u'lost'), None]
+        conn_mock_1.read_many.side_effect = [PyRedisConnError(u'lost'), ['OK']]
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        client.bulk_start(bulk_size=2)
+        client._execute_bulk(u'Ping', conn=conn_mock_1)
+        self.assertRaises(PyRedisConnError, client._execute_bulk, u'Ping', conn=conn_mock_1)
+        self.assertRaises(PyRedisConnError, client.bulk_stop)
+        self.assertFalse(client.bulk)
+
+        client.bulk_start()
+        client._execute_bulk(u'Ping', conn=conn_mock_1)
+        self.assertEqual(client.bulk_stop(), ['OK'])
+        conn_mock_1.read_many.assert_called_with(1, raise_on_result_err=False)
+
+        conn_mock_2.write_packed_duplex.return_value = ['stale']
+        conn_mock_3.write_packed_duplex.side_effect = PyRedisConnError(u'lost')
+        client.bulk_start(flush_size=2, duplex=True)
+        client._execute_bulk(u'Ping', conn=conn_mock_2)
+        client._execute_bulk(u'Ping', conn=conn_mock_2)
+        client._execute_bulk(u'Ping', conn=conn_mock_3)
+        self.assertRaises(PyRedisConnError, client.bulk_stop)
+
+        conn_mock_2.read_many.return_value = ['OK']
+        client.bulk_start()
+        client._execute_bulk(u'Ping', conn=conn_mock_2)
+        self.assertEqual(client.bulk_stop(), ['OK'])
+
+    def test_bulk_iter(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+        error = ReplyError(u'ERR')
+        conn_mock_3.read_many.return_value = ['OK', error]
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        commands = [(u'SET', u'blarg', u'x'), (u'INCR', u'blarg')]
+        self.assertEqual(list(client.bulk_iter(commands, errors_only=True)), [(1, error)])
+        conn_mock_3.write_packed.assert_called_once_with(pack_commands(commands))
+        self.assertFalse(client.bulk)
 
     def test_execute_non_bulk_shard_key(self):
         conn_mock_1 = Mock()
@@ -296,7 +629,7 @@ class TestHashClientUnit(TestCase):
         client._execute_basic.return_value = 'PONG'
 
         result = client.execute(u'Ping', shard_key=u'blarg')
-        client._execute_basic.assert_called_with(u'Ping', conn=conn_mock_3)
+        client._execute_basic.assert_called_with(u'Ping', conn=conn_mock_3, decode=True, as_array=None)
         self.assertEqual(result, 'PONG')
 
     def test_bulk(self):
@@ -406,9 +739,48 @@ class TestHashClientUnit(TestCase):
         client._execute_basic = Mock()
         client._execute_basic.return_value = 'PONG'
         result = client.execute('PING', shard_key=u'blarg')
-        client._execute_basic.assert_called_with('PING', conn=conn_mock_3)
+        client._execute_basic.assert_called_with('PING', conn=conn_mock_3, decode=True, as_array=None)
         self.assertEqual(result, 'PONG')
 
+    def test_execute_conn_error(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+        conn_mock_3.reconnect_policy = None
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        client._execute_basic = Mock(side_effect=PyRedisConnError(u'lost'))
+        self.assertRaises(PyRedisConnError, client.execute, 'PING', shard_key=u'blarg')
+        self.assertTrue(client.closed)
+
+    def test_execute_conn_error_reconnect_policy(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+        conn_mock_3.reconnect_policy = ReconnectPolicy(retries=1)
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        client._execute_basic = Mock(side_effect=PyRedisCircuitOpen(u'open'))
+        self.assertRaises(PyRedisCircuitOpen, client.execute, 'PING', shard_key=u'blarg')
+        self.assertFalse(client.closed)
+        conn_mock_3.write.side_effect = PyRedisConnError(u'lost')
+        self.assertRaises(PyRedisConnError, client.execute_iter, 'SMEMBERS', 'blarg', shard_key=u'blarg')
+        self.assertFalse(client.closed)
+
+    def test_execute_iter(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+        conn_mock_3.read_stream.return_value = iter(['a', 'b'])
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        result = client.execute_iter('SMEMBERS', 'blarg', shard_key=u'blarg')
+        conn_mock_3.write.assert_called_with('SMEMBERS', 'blarg')
+        self.assertEqual(list(result), ['a', 'b'])
+
     def test_execute_bulk(self):
         conn_mock_1 = Mock()
         conn_mock_2 = Mock()
@@ -421,6 +793,24 @@ class TestHashClientUnit(TestCase):
         client.execute('PING', shard_key=u'blarg')
         client._execute_bulk.assert_called_with('PING', conn=conn_mock_3)
 
+    def test_pipeline(self):
+        conn_mock_1 = Mock()
+        conn_mock_2 = Mock()
+        conn_mock_3 = Mock()
+        self.connection_mock.side_effect = [conn_mock_1, conn_mock_2, conn_mock_3]
+        conn_mock_3.read_many.return_value = ['bar']
+
+        client = pyredis.client.HashClient(buckets=self.buckets)
+        pipe = client.pipeline()
+        future = pipe.get('blarg')
+        pipe.execute('PING', sock=u'localhost_7001')
+        conn_mock_1.read_many.return_value = ['PONG']
+        pipe.flush()
+        conn_mock_3.write_packed.assert_called_once_with(pack_commands([(u'GET', 'blarg')]))
+        conn_mock_1.write_packed.assert_called_once_with(pack_commands([('PING',)]))
+        self.assertFalse(conn_mock_2.write_packed.called)
+        self.assertEqual(future.result(), 'bar')
+
 
 class TestPubSubClientUnit(TestCase):
     def setUp(self):
@@ -727,6 +1117,15 @@ class TestClusterClientUnit(TestCase):
             encoding=self.client._encoding,
             password=self.client._password,
             database=self.client._database,
+            recv_buffer_size=self.client._recv_buffer_size,
+            recv_buffer_adaptive=self.client._recv_buffer_adaptive,
+            parser=self.client._parser,
+            lazy_decode=self.client._lazy_decode,
+            protocol=self.client._protocol,
+            push_handler=self.client._push_handler,
+            client_name=self.client._client_name,
+            reconnect_policy=self.client._reconnect_policy,
+            **self.client._socket_options
         )
 
     def test__get_slot_info(self):
@@ -795,6 +1194,124 @@ class TestClusterClientUnit(TestCase):
         self.assertEqual(result, u'success')
         conn.write.assert_called_with(u'GET', u'test')
 
+    def test_pipeline(self):
+        self.client._get_slot_info = Mock()
+        self.client._get_slot_info.return_value = u'host1_12345'
+        conn = Mock()
+        conn.read_many.return_value = [u'success']
+        self.connection_mock.return_value = conn
+
+        pipe = self.client.pipeline()
+        future = pipe.get(u'test')
+        self.assertRaises(PyRedisError, pipe.execute, u'GET', u'test')
+        pipe.flush()
+        self.assertEqual(self.client._conns[u'host1_12345'], conn)
+        conn.write_packed.assert_called_once_with(pack_commands([(u'GET', u'test')]))
+        self.assertEqual(future.result(), u'success')
+
+    def test_pipeline_bulk(self):
+        self.client._bulk = True
+        self.assertRaises(PyRedisError, self.client.pipeline)
+
+    def test__pipeline_redirect_moved(self):
+        self.client._pipeline_conn = Mock()
+        self.client._cleanup_conns = Mock()
+        id = self.client._map_id
+
+        result = self.client._pipeline_redirect(u'MOVED 42 host2:12345', u'test', refresh=True)
+        self.clustermap_inst.update.assert_called_with(id)
+        self.assertTrue(self.client._cleanup_conns.called)
+        self.client._pipeline_conn.assert_called_with(shard_key=u'test')
+        self.assertEqual(result, self.client._pipeline_conn.return_value)
+
+    def test__pipeline_redirect_moved_no_refresh(self):
+        self.client._pipeline_conn = Mock()
+        self.client._pipeline_redirect(u'MOVED 42 host2:12345', u'test')
+        self.assertFalse(self.clustermap_inst.update.called)
+
+    def test__pipeline_redirect_moved_sock(self):
+        self.assertRaises(ReplyError, self.client._pipeline_redirect, u'MOVED 42 host2:12345', None)
+
+    def test__pipeline_redirect_ask(self):
+        self.client._pipeline_conn = Mock()
+        self.client._pipeline_redirect(u'ASK 42 host2:12345', u'test')
+        self.client._pipeline_conn.assert_called_with(sock=u'host2_12345')
+        self.assertFalse(self.clustermap_inst.update.called)
+
+    def test__pipeline_conn_failed(self):
+        conn1 = Mock()
+        conn2 = Mock()
+        self.client._conns = {u'host1_12345': conn1, u'host2_12345': conn2}
+        id = self.client._map_id
+
+        self.client._pipeline_conn_failed([conn1])
+        conn1.close.assert_called_with()
+        self.assertFalse(conn2.close.called)
+        self.assertEqual(self.client._conns, {u'host2_12345': conn2})
+        self.clustermap_inst.update.assert_called_with(id)
+        self.assertEqual(self.client._map_id, self.clustermap_inst.update.return_value)
+
+    def test_bulk_start(self):
+        self.client.bulk_start()
+        self.assertTrue(self.client.bulk)
+        self.assertEqual(self.client._bulk_size, 5000)
+        self.assertEqual(self.client._bulk_results, [])
+        self.assertIsInstance(self.client._bulk_pipeline, pyredis.client.Pipeline)
+        self.assertRaises(PyRedisError, self.client.bulk_start)
+
+    def test_execute_bulk(self):
+        self.client._get_slot_info = Mock()
+        self.client._get_slot_info.side_effect = lambda shard_key: {
+            u'a': u'host1_12345', u'b': u'host2_12345'
+        }[shard_key]
+        conn1 = Mock()
+        conn1.closed = False
+        conn1.read_many.return_value = [u'1', u'3']
+        conn2 = Mock()
+        conn2.closed = False
+        conn2.read_many.side_effect = [[ReplyError(u'ERR')], [u'4']]
+        self.connection_mock.side_effect = [conn1, conn2]
+
+        self.client.bulk_start(bulk_size=3)
+        self.assertIsNone(self.client.execute(u'GET', u'a', shard_key=u'a'))
+        self.client.execute(u'GET', u'b', shard_key=u'b')
+        self.assertFalse(conn1.write_packed.called)
+        self.client.execute(u'GET', u'a', shard_key=u'a')
+        conn1.write_packed.assert_called_once_with(pack_commands([(u'GET', u'a'), (u'GET', u'a')]))
+        conn2.write_packed.assert_called_once_with(pack_commands([(u'GET', u'b')]))
+        self.client.execute(u'GET', u'b', shard_key=u'b')
+        results = self.client.bulk_stop()
+        self.assertEqual(results[0], u'1')
+        self.assertIsInstance(results[1], ReplyError)
+        self.assertEqual(results[2:], [u'3', u'4'])
+        self.assertFalse(self.client.bulk)
+        self.assertFalse(conn1.write.called)
+
+    def test_execute_bulk_unexpected_error(self):
+        self.client._get_slot_info = Mock()
+        self.client._get_slot_info.return_value = u'host1_12345'
+        conn = Mock()
+        conn.closed = False
+        conn.read_many.side_effect = ValueError(u'boom')
+        self.connection_mock.return_value = conn
+
+        self.client.bulk_start(bulk_size=1)
+        self.assertRaises(ValueError, self.client.execute, u'GET', u'a', shard_key=u'a')
+        self.assertEqual(len(self.client._bulk_results), 1)
+        self.assertIsInstance(self.client._bulk_results[0], ValueError)
+
+    def test_bulk_iter(self):
+        self.client._get_slot_info = Mock()
+        self.client._get_slot_info.return_value = u'host1_12345'
+        conn = Mock()
+        error = ReplyError(u'ERR')
+        conn.read_many.return_value = [u'OK', error]
+        self.connection_mock.return_value = conn
+
+        commands = [(u'SET', u'a', 1), (u'INCR', u'a')]
+        self.assertEqual(list(self.client.bulk_iter(commands, errors_only=True)), [(1, error)])
+        self.assertFalse(self.client.bulk)
+
     def test_execute_ReplyError_ASK(self):
         self.client._get_slot_info = Mock()
         self.client._get_slot_info.return_value = u'host1_12345'
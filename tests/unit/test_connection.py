@@ -1,14 +1,26 @@
 from __future__ import absolute_import
 from unittest import TestCase
-from unittest.mock import Mock, MagicMock, PropertyMock, call, patch
+from unittest.mock import ANY, Mock, MagicMock, PropertyMock, call, patch
 
 from pyredis.exceptions import *
 
 import pyredis.connection
-from pyredis.protocol import writer, Reader
+from pyredis.reconnect import ReconnectPolicy
+from pyredis.protocol import writer, Reader, SCATTER_THRESHOLD
+import errno
 import socket
 
 
+def recv_into_chunks(*chunks):
+    chunks = list(chunks)
+
+    def recv_into(buf, nbytes):
+        chunk = chunks.pop(0)
+        buf[:len(chunk)] = chunk
+        return len(chunk)
+    return recv_into
+
+
 class TestConnectionUnit(TestCase):
     def setUp(self):
         self.addCleanup(patch.stopall)
@@ -16,6 +28,17 @@ class TestConnectionUnit(TestCase):
         socket_patcher = patch(u'pyredis.connection.socket', autospec=True)
         self.socket_mock = socket_patcher.start()
         self.socket_mock.socket.return_value = Mock()
+        self.socket_mock.error = socket.error
+        self.socket_mock.gaierror = socket.gaierror
+        self.socket_mock.timeout = socket.timeout
+        self.socket_mock.socket.side_effect = self._new_socket
+
+        resolver_patcher = patch(u'pyredis.connection.shared_resolver', autospec=True)
+        self.resolver_mock = resolver_patcher.start()
+        self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
+
+        sendmsg_patcher = patch(u'pyredis.connection.HAS_SENDMSG', False)
+        sendmsg_patcher.start()
 
         reader_patcher = patch(u'pyredis.connection.Reader', autospec=True)
         self.reader_mock = reader_patcher.start()
@@ -26,7 +49,7 @@ class TestConnectionUnit(TestCase):
         self.assertEqual(connection._read_timeout, 2)
         self.assertEqual(connection.host, u'127.0.0.1')
         self.assertEqual(connection.port, 6379)
-        self.assertEqual(connection._writer, pyredis.connection.writer)
+        self.assertEqual(connection._writer, pyredis.connection.encode_parts)
         self.assertIsNone(connection.password)
         self.assertIsNone(connection._reader)
         self.assertIsNone(connection._encoding)
@@ -37,7 +60,7 @@ class TestConnectionUnit(TestCase):
         self.assertEqual(connection._conn_timeout, 2)
         self.assertEqual(connection._read_timeout, 2)
         self.assertEqual(connection.unix_sock, u'/tmp/test.sock')
-        self.assertEqual(connection._writer, pyredis.connection.writer)
+        self.assertEqual(connection._writer, pyredis.connection.encode_parts)
         self.assertIsNone(connection.password)
         self.assertIsNone(connection._reader)
         self.assertFalse(connection._closed)
@@ -52,7 +75,7 @@ class TestConnectionUnit(TestCase):
         self.assertEqual(connection.password, u'blubber')
         self.assertEqual(connection._conn_timeout, 10)
         self.assertEqual(connection._read_timeout, 11)
-        self.assertEqual(connection._writer, pyredis.connection.writer)
+        self.assertEqual(connection._writer, pyredis.connection.encode_parts)
         self.assertEqual(connection._encoding, u'utf-8')
         self.assertIsNone(connection._reader)
         self.assertFalse(connection._closed)
@@ -68,111 +91,264 @@ class TestConnectionUnit(TestCase):
             unix_sock=u'/tmp/test.sock'
         )
 
-    def test__authenticate_ok(self):
-        connection = pyredis.connection.Connection(host=u'127.0.0.1', password=u'testpass')
-        connection.write = Mock()
-        connection.read = Mock()
-        connection.read.return_value = 'OK'
-        connection._sock = Mock()
-        connection._authenticate()
-        connection.write.assert_called_with(u'AUTH', u'testpass')
+    def test___init___unknown_parser(self):
+        self.assertRaises(
+            PyRedisError,
+            pyredis.connection.Connection,
+            host=u'127.0.0.1',
+            parser=u'blarg'
+        )
 
-    def test__authenticate_exception(self):
-        connection = pyredis.connection.Connection(host=u'127.0.0.1', password=u'testpass')
-        connection.write = Mock()
-        connection.read = Mock()
-        connection.read.side_effect = ReplyError
-        connection._sock = Mock()
-        self.assertRaises(ReplyError, connection._authenticate)
-        connection.write.assert_called_with(u'AUTH', u'testpass')
+    def test___init___hiredis_parser_not_installed(self):
+        with patch(u'pyredis.connection.HiredisReader', None):
+            self.assertRaises(
+                PyRedisError,
+                pyredis.connection.Connection,
+                host=u'127.0.0.1',
+                parser=u'hiredis'
+            )
+
+    def test__connect_python_parser(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        self.assertIsInstance(connection._reader, pyredis.connection.PythonReader)
+        self.assertEqual(connection.parser, u'python')
+
+    def test__connect_hiredis_parser(self):
+        hiredis_mock = Mock()
+        with patch(u'pyredis.connection.HiredisReader', hiredis_mock):
+            connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'hiredis')
+            connection._connect()
+            self.assertEqual(connection._reader, hiredis_mock())
+            self.assertEqual(connection.parser, u'hiredis')
+
+    def test_parser_auto(self):
+        with patch(u'pyredis.connection.HiredisReader', None):
+            with patch(u'pyredis.connection.Reader', pyredis.connection.PythonReader):
+                connection = pyredis.connection.Connection(host=u'127.0.0.1')
+                self.assertEqual(connection.parser, u'python')
+        hiredis_mock = Mock()
+        with patch(u'pyredis.connection.HiredisReader', hiredis_mock):
+            with patch(u'pyredis.connection.Reader', hiredis_mock):
+                connection = pyredis.connection.Connection(host=u'127.0.0.1')
+                self.assertEqual(connection.parser, u'hiredis')
+
+    def test__connect_lazy_decode(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8', lazy_decode=True)
+        connection._connect()
+        self.assertIsInstance(connection._reader, pyredis.connection.PythonReader)
+        self.assertTrue(connection._reader._replyparser._lazy_decode)
+
+    def test_lazy_decode_hiredis_parser(self):
+        with patch(u'pyredis.connection.HiredisReader', Mock()):
+            self.assertRaises(
+                PyRedisError, pyredis.connection.Connection,
+                host=u'127.0.0.1', parser=u'hiredis', lazy_decode=True
+            )
+
+    def _new_socket(self, *args):
+        # sockets connect right away, unless a test sets connect_ex
+        sock = self.socket_mock.socket.return_value
+        if not isinstance(sock.connect_ex.return_value, int):
+            sock.connect_ex.return_value = 0
+        return sock
+
+    def _resolve(self, *addrs):
+        self.resolver_mock.resolve.return_value = [
+            (family, self.socket_mock.SOCK_STREAM, 6, u'', sockaddr) for family, sockaddr in addrs
+        ]
+        return self.resolver_mock
+
+    def _select(self, *writable):
+        select_patcher = patch(u'pyredis.connection.select', autospec=True)
+        select_mock = select_patcher.start()
+        select_mock.select.side_effect = [([], list(socks), []) for socks in writable]
+        return select_mock
 
     def test__connect_inet46_ipv4(self):
+        resolver_mock = self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
+        self.socket_mock.socket.return_value.connect_ex.return_value = 0
         connection = pyredis.connection.Connection(host=u'127.0.0.1')
         sock = connection._connect_inet46()
+        resolver_mock.resolve.assert_called_with(u'127.0.0.1', 6379)
         self.socket_mock.socket.assert_called_with(
             self.socket_mock.AF_INET,
-            self.socket_mock.SOCK_STREAM
+            self.socket_mock.SOCK_STREAM,
+            6
         )
+        sock.setblocking.assert_called_with(0)
+        sock.connect_ex.assert_called_with((u'127.0.0.1', 6379))
         sock.settimeout.assert_called_with(2)
-        sock.connect.assert_called_with((u'127.0.0.1', 6379))
+        resolver_mock.prefer.assert_called_with(u'127.0.0.1', 6379, (u'127.0.0.1', 6379))
         self.assertEqual(sock, self.socket_mock.socket())
 
     def test__connect_inet46_ipv6(self):
-        sock_mock = Mock()
-        self.socket_mock.socket.side_effect = [socket.gaierror, sock_mock]
-        self.socket_mock.gaierror = socket.gaierror
+        self._resolve((self.socket_mock.AF_INET6, (u'::1', 6379, 0, 0)))
+        sock_mock = self.socket_mock.socket.return_value
+        sock_mock.connect_ex.return_value = errno.EINPROGRESS
+        sock_mock.getsockopt.return_value = 0
+        select_mock = self._select([sock_mock])
 
         connection = pyredis.connection.Connection(host=u'::1')
         sock = connection._connect_inet46()
 
-        self.socket_mock.socket.assert_has_calls([
-            call(
-                self.socket_mock.AF_INET,
-                self.socket_mock.SOCK_STREAM
-            ),
-            call(
-                self.socket_mock.AF_INET6,
-                self.socket_mock.SOCK_STREAM
-            )
-        ])
-
+        self.socket_mock.socket.assert_called_with(
+            self.socket_mock.AF_INET6,
+            self.socket_mock.SOCK_STREAM,
+            6
+        )
+        sock.connect_ex.assert_called_with((u'::1', 6379, 0, 0))
+        select_mock.select.assert_called_once_with([], [sock_mock], [], ANY)
+        sock.getsockopt.assert_called_with(self.socket_mock.SOL_SOCKET, self.socket_mock.SO_ERROR)
         sock.settimeout.assert_called_with(2)
-        sock.connect.assert_called_with((u'::1', 6379))
+        self.assertFalse(sock.close.called)
         self.assertEqual(sock, sock_mock)
 
+    def test__connect_inet46_happy_eyeballs(self):
+        self._resolve(
+            (self.socket_mock.AF_INET6, (u'::1', 6379, 0, 0)),
+            (self.socket_mock.AF_INET, (u'127.0.0.1', 6379))
+        )
+        sock6_mock = Mock()
+        sock6_mock.connect_ex.return_value = errno.EINPROGRESS
+        sock4_mock = Mock()
+        sock4_mock.connect_ex.return_value = errno.EINPROGRESS
+        sock4_mock.getsockopt.return_value = 0
+        self.socket_mock.socket.side_effect = [sock6_mock, sock4_mock]
+        select_mock = self._select([], [sock4_mock])
+        time_patcher = patch(u'pyredis.connection.time.time', autospec=True)
+        time_mock = time_patcher.start()
+        # the first select times out after the attempt delay
+        time_mock.side_effect = [100, 100, 100.25, 100.25]
+
+        connection = pyredis.connection.Connection(host=u'localhost')
+        sock = connection._connect_inet46()
+
+        self.assertEqual(sock, sock4_mock)
+        self.assertEqual(select_mock.select.call_args_list[0][0][3], pyredis.connection.CONNECT_ATTEMPT_DELAY)
+        select_mock.select.assert_called_with([], ANY, [], ANY)
+        self.assertEqual(set(select_mock.select.call_args[0][1]), set([sock6_mock, sock4_mock]))
+        sock6_mock.close.assert_called_with()
+        self.assertFalse(sock4_mock.close.called)
+
+    def test__connect_inet46_failed_attempt_starts_next(self):
+        resolver_mock = self._resolve(
+            (self.socket_mock.AF_INET6, (u'::1', 6379, 0, 0)),
+            (self.socket_mock.AF_INET, (u'127.0.0.1', 6379))
+        )
+        sock6_mock = Mock()
+        sock6_mock.connect_ex.return_value = errno.ECONNREFUSED
+        sock4_mock = Mock()
+        sock4_mock.connect_ex.return_value = 0
+        self.socket_mock.socket.side_effect = [sock6_mock, sock4_mock]
+
+        connection = pyredis.connection.Connection(host=u'localhost')
+        sock = connection._connect_inet46()
+
+        self.assertEqual(sock, sock4_mock)
+        sock6_mock.close.assert_called_with()
+        resolver_mock.prefer.assert_called_with(u'localhost', 6379, (u'127.0.0.1', 6379))
+
+    def test__connect_inet46_all_refused(self):
+        resolver_mock = self._resolve(
+            (self.socket_mock.AF_INET6, (u'::1', 6379, 0, 0)),
+            (self.socket_mock.AF_INET, (u'127.0.0.1', 6379))
+        )
+        sock6_mock = Mock()
+        sock6_mock.connect_ex.return_value = errno.EINPROGRESS
+        sock6_mock.getsockopt.return_value = errno.ECONNREFUSED
+        sock4_mock = Mock()
+        sock4_mock.connect_ex.return_value = errno.ECONNREFUSED
+        self.socket_mock.socket.side_effect = [sock6_mock, sock4_mock]
+        self._select([sock6_mock])
+
+        connection = pyredis.connection.Connection(host=u'localhost')
+        self.assertRaises(PyRedisConnError, connection._connect_inet46)
+        sock6_mock.close.assert_called_with()
+        sock4_mock.close.assert_called_with()
+        resolver_mock.invalidate.assert_called_with(u'localhost', 6379)
+        self.assertFalse(resolver_mock.prefer.called)
+
     def test__connect_inet46_no_ipv4_or_ipv6(self):
-        self.socket_mock.socket.side_effect = [socket.gaierror, socket.gaierror]
-        self.socket_mock.gaierror = socket.gaierror
+        resolver_mock = self._resolve()
+        resolver_mock.resolve.side_effect = socket.gaierror
 
         connection = pyredis.connection.Connection(host=u'blarg')
         self.assertRaises(PyRedisConnError, connection._connect_inet46)
+        self.assertFalse(self.socket_mock.socket.called)
 
     def test__connect_inet46_socket_timeout(self):
-        sock_mock = Mock()
-        sock_mock.connect.side_effect = socket.timeout
-
-        self.socket_mock.socket.return_value = sock_mock
-        self.socket_mock.gaierror = socket.gaierror
-        self.socket_mock.timeout = socket.timeout
-
-        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        resolver_mock = self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
+        sock_mock = self.socket_mock.socket.return_value
+        sock_mock.connect_ex.return_value = errno.EINPROGRESS
+        select_patcher = patch(u'pyredis.connection.select', autospec=True)
+        select_mock = select_patcher.start()
+        select_mock.select.return_value = ([], [], [])
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', conn_timeout=0.01)
         self.assertRaises(PyRedisConnError, connection._connect_inet46)
+        sock_mock.close.assert_called_with()
+        resolver_mock.invalidate.assert_called_with(u'127.0.0.1', 6379)
 
     def test__connect_inet46_OverflowError(self):
-        sock_mock = Mock()
-        sock_mock.connect.side_effect = OverflowError
-
-        self.socket_mock.gaierror = socket.gaierror
-        self.socket_mock.timeout = socket.timeout
-
-        self.socket_mock.socket.return_value = sock_mock
+        resolver_mock = self._resolve()
+        resolver_mock.resolve.side_effect = OverflowError
 
-        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', port=70000)
         self.assertRaises(PyRedisConnError, connection._connect_inet46)
 
     def test__connect_inet46_ConnectionRefusedError(self):
-        sock_mock = Mock()
-        sock_mock.connect.side_effect = ConnectionRefusedError
+        self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
+        self.socket_mock.socket.return_value.connect_ex.return_value = errno.ECONNREFUSED
 
-        self.socket_mock.gaierror = socket.gaierror
-        self.socket_mock.timeout = socket.timeout
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        self.assertRaises(PyRedisConnError, connection._connect_inet46)
 
-        self.socket_mock.socket.return_value = sock_mock
+    def test__connect_inet46_ConnectionAbortedError(self):
+        self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
+        self.socket_mock.socket.return_value.setblocking.side_effect = socket.error(errno.ECONNABORTED, u'aborted')
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1')
         self.assertRaises(PyRedisConnError, connection._connect_inet46)
+        self.socket_mock.socket.return_value.close.assert_called_with()
 
-    def test__connect_inet46_ConnectionAbortedError(self):
-        sock_mock = Mock()
-        sock_mock.connect.side_effect = ConnectionAbortedError
+    def test__set_sockopts_default(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        sock = Mock()
+        connection._set_sockopts(sock)
+        sock.setsockopt.assert_called_once_with(self.socket_mock.IPPROTO_TCP, self.socket_mock.TCP_NODELAY, 1)
 
-        self.socket_mock.gaierror = socket.gaierror
-        self.socket_mock.timeout = socket.timeout
+    def test__set_sockopts(self):
+        connection = pyredis.connection.Connection(
+            host=u'127.0.0.1', tcp_nodelay=False, keepalive=True, keepalive_idle=60,
+            keepalive_interval=10, keepalive_count=3, so_sndbuf=65536, so_rcvbuf=131072,
+            tcp_user_timeout=30000
+        )
+        sock = Mock()
+        connection._set_sockopts(sock)
+        sock.setsockopt.assert_has_calls([
+            call(self.socket_mock.SOL_SOCKET, self.socket_mock.SO_SNDBUF, 65536),
+            call(self.socket_mock.SOL_SOCKET, self.socket_mock.SO_RCVBUF, 131072),
+            call(self.socket_mock.SOL_SOCKET, self.socket_mock.SO_KEEPALIVE, 1),
+            call(self.socket_mock.IPPROTO_TCP, pyredis.connection.TCP_KEEPIDLE, 60),
+            call(self.socket_mock.IPPROTO_TCP, pyredis.connection.TCP_KEEPINTVL, 10),
+            call(self.socket_mock.IPPROTO_TCP, pyredis.connection.TCP_KEEPCNT, 3),
+            call(self.socket_mock.IPPROTO_TCP, pyredis.connection.TCP_USER_TIMEOUT, 30000),
+        ])
+        self.assertEqual(sock.setsockopt.call_count, 7)
 
-        self.socket_mock.socket.return_value = sock_mock
+    def test__set_sockopts_unix(self):
+        connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock', keepalive=True, so_sndbuf=65536)
+        sock = Mock()
+        connection._set_sockopts(sock, tcp=False)
+        sock.setsockopt.assert_called_once_with(self.socket_mock.SOL_SOCKET, self.socket_mock.SO_SNDBUF, 65536)
 
+    def test__connect_inet46_sockopts(self):
+        self._resolve((self.socket_mock.AF_INET, (u'127.0.0.1', 6379)))
         connection = pyredis.connection.Connection(host=u'127.0.0.1')
-        self.assertRaises(PyRedisConnError, connection._connect_inet46)
+        connection._set_sockopts = Mock()
+        sock = connection._connect_inet46()
+        connection._set_sockopts.assert_called_with(sock)
 
     def test__connect_unix(self):
         connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock')
@@ -187,7 +363,7 @@ class TestConnectionUnit(TestCase):
 
     def test__connect_unix_ConnectionRefusedError(self):
         sock_mock = Mock()
-        sock_mock.connect.side_effect = ConnectionRefusedError
+        sock_mock.connect.side_effect = socket.error(errno.ECONNREFUSED, u'Connection refused')
 
         self.socket_mock.timeout = socket.timeout
 
@@ -211,7 +387,7 @@ class TestConnectionUnit(TestCase):
 
     def test__connect_unix_FileNotFoundError(self):
         sock_mock = Mock()
-        sock_mock.connect.side_effect = FileNotFoundError
+        sock_mock.connect.side_effect = socket.error(errno.ENOENT, u'No such file or directory')
 
         self.socket_mock.timeout = socket.timeout
 
@@ -221,6 +397,51 @@ class TestConnectionUnit(TestCase):
 
         self.assertRaises(PyRedisConnError, connection._connect_unix)
 
+    def test__connect_unix_abstract(self):
+        connection = pyredis.connection.Connection(unix_sock=u'@redis')
+        sock = connection._connect_unix()
+        sock.connect.assert_called_with(u'\0redis')
+
+    def test__connect_unix_abstract_not_linux(self):
+        with patch(u'pyredis.connection.sys.platform', u'darwin'):
+            self.assertRaises(PyRedisError, pyredis.connection.Connection, unix_sock=u'@redis')
+
+    def test__connect_unix_peer_uid(self):
+        sock_mock = Mock()
+        sock_mock.getsockopt.return_value = pyredis.connection.UCRED.pack(4711, 1000, 1000)
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock', peer_uid=1000)
+        self.assertEqual(connection._connect_unix(), sock_mock)
+        sock_mock.getsockopt.assert_called_with(
+            self.socket_mock.SOL_SOCKET, pyredis.connection.SO_PEERCRED, pyredis.connection.UCRED.size
+        )
+
+    def test__connect_unix_peer_uid_mismatch(self):
+        sock_mock = Mock()
+        sock_mock.getsockopt.return_value = pyredis.connection.UCRED.pack(4711, 0, 0)
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(unix_sock=u'@redis', peer_uid=1000)
+        self.assertRaises(PyRedisConnError, connection._connect_unix)
+        sock_mock.close.assert_called_with()
+        self.assertTrue(connection.closed)
+
+    def test_peer_credentials(self):
+        sock_mock = Mock()
+        sock_mock.getsockopt.return_value = pyredis.connection.UCRED.pack(4711, 1000, 100)
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock')
+        self.assertIsNone(connection.peer_credentials)
+        connection._connect()
+        self.assertEqual(connection.peer_credentials, (4711, 1000, 100))
+
+    def test_peer_credentials_tcp(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        self.assertIsNone(connection.peer_credentials)
+
     def test__connect_ipv4(self):
         sock_mock = Mock()
         self.socket_mock.socket.return_value = sock_mock
@@ -228,8 +449,6 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection._connect()
 
         sock_mock.settimeout.assert_called_with(2)
@@ -245,8 +464,6 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection._connect()
 
         sock_mock.settimeout.assert_called_with(2)
@@ -262,8 +479,6 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'::1')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection._connect()
 
         sock_mock.settimeout.assert_called_with(2)
@@ -273,8 +488,6 @@ class TestConnectionUnit(TestCase):
         self.socket_mock.socket.return_value = sock_mock
 
         connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection._connect()
         connection.close()
 
@@ -283,25 +496,86 @@ class TestConnectionUnit(TestCase):
         self.assertIsNone(connection._reader)
         self.assertTrue(connection._closed)
 
-    def test__setdb(self):
+    def test__handshake_commands(self):
+        connection = pyredis.connection.Connection(
+            host=u'localhost', password=u'testpass', protocol=3, database=2, client_name=u'worker'
+        )
+        self.assertEqual(connection._handshake_commands(), [
+            (u'AUTH', u'testpass'),
+            (u'HELLO', 3),
+            (u'SELECT', 2),
+            (u'CLIENT', u'SETNAME', u'worker')
+        ])
+
+    def test__handshake_commands_default(self):
         connection = pyredis.connection.Connection(host=u'localhost')
-        connection.read = Mock()
-        connection.read.return_value = 'OK'
-        connection.write = Mock()
-        connection._sock = Mock()
-        connection._setdb()
-        connection.write.assert_called_with(u'SELECT', 0)
-        connection.read.assert_called_with()
-
-    def test__setdb_invalid_db(self):
-        connection = pyredis.connection.Connection(host=u'localhost', database=23234)
-        connection.read = Mock()
-        connection.read.side_effect = ReplyError
-        connection.write = Mock()
-        connection._sock = Mock()
-        self.assertRaises(ReplyError, connection._setdb)
-        connection.write.assert_called_with(u'SELECT', 23234)
-        connection.read.assert_called_with()
+        self.assertEqual(connection._handshake_commands(), [])
+
+    def test__handshake_commands_sentinel(self):
+        connection = pyredis.connection.Connection(host=u'localhost', password=u'testpass', sentinel=True)
+        self.assertEqual(connection._handshake_commands(), [])
+
+    def test_handshake_piggybacked(self):
+        sock_mock = Mock()
+        sock_mock.send.side_effect = lambda data: len(data)
+        sock_mock.recv_into.side_effect = recv_into_chunks('+OK\r\n+OK\r\n$3\r\nbar\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        pyredis.connection.Reader = Reader
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', password=u'testpass', client_name=u'worker')
+        connection.write(u'GET', u'foo')
+        self.assertEqual(sock_mock.send.call_args_list, [call(
+            writer(u'AUTH', u'testpass') + writer(u'CLIENT', u'SETNAME', u'worker') + writer(u'GET', u'foo')
+        )])
+        self.assertEqual(connection.read(), 'bar')
+        connection.write(u'GET', u'foo')
+        self.assertEqual(sock_mock.send.call_args, call(writer(u'GET', u'foo')))
+
+    def test_handshake_error(self):
+        sock_mock = Mock()
+        sock_mock.send.side_effect = lambda data: len(data)
+        sock_mock.recv_into.side_effect = recv_into_chunks('-ERR invalid password\r\n-NOAUTH\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        pyredis.connection.Reader = Reader
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', password=u'testpass')
+        connection.write(u'GET', u'foo')
+        self.assertRaises(ReplyError, connection.read)
+        self.assertTrue(connection.closed)
+        sock_mock.close.assert_called_with()
+
+    def test_handshake_read_first(self):
+        sock_mock = Mock()
+        sock_mock.send.side_effect = lambda data: len(data)
+        sock_mock.recv_into.side_effect = recv_into_chunks('%1\r\n+proto\r\n:3\r\n>2\r\n+message\r\n+hi\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', protocol=3)
+        self.assertEqual(connection.read(), ['message', 'hi'])
+        self.assertEqual(sock_mock.send.call_args_list, [call(writer(u'HELLO', 3))])
+
+    def test_handshake_select_not_piggybacked(self):
+        sock_mock = Mock()
+        sock_mock.send.side_effect = lambda data: len(data)
+        sock_mock.recv_into.side_effect = recv_into_chunks('-ERR DB index is out of range\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        pyredis.connection.Reader = Reader
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', database=23234)
+        self.assertRaises(ReplyError, connection.write, u'SET', u'foo', u'bar')
+        self.assertEqual(sock_mock.send.call_args_list, [call(writer(u'SELECT', 23234))])
+        self.assertTrue(connection.closed)
+
+    def test_protocol(self):
+        self.assertRaises(PyRedisError, pyredis.connection.Connection, host=u'localhost', protocol=4)
+        with patch(u'pyredis.connection.HiredisReader', Mock()):
+            self.assertRaises(
+                PyRedisError, pyredis.connection.Connection,
+                host=u'127.0.0.1', parser=u'hiredis', protocol=3
+            )
+        connection = pyredis.connection.Connection(host=u'localhost', protocol=3)
+        self.assertEqual(connection.protocol, 3)
+        self.assertEqual(connection.parser, u'python')
 
     def test_closed_false(self):
         connection = pyredis.connection.Connection(unix_sock=u'/tmp/test.sock')
@@ -327,8 +601,6 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection.write(cmd, payload)
 
         self.assertEqual(sock_mock.send.call_args_list, [call(msg)])
@@ -347,44 +619,100 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection.write(cmd, payload)
 
         self.assertEqual(sock_mock.send.call_args_list, [call(msg), call(msg[500:])])
 
+    def test_write_big_payload_not_copied(self):
+        payload = 'x' * SCATTER_THRESHOLD
+        header = '*2\r\n$3\r\nSET\r\n${0}\r\n'.format(SCATTER_THRESHOLD)
+
+        sock_mock = Mock()
+        sock_mock.send.side_effect = [len(header), 1000, SCATTER_THRESHOLD - 1000, 2]
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection.write(u'SET', payload)
+
+        calls = sock_mock.send.call_args_list
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(calls[0], call(header))
+        self.assertIs(calls[1][0][0], payload)
+        self.assertIsInstance(calls[2][0][0], memoryview)
+        self.assertEqual(calls[2][0][0].tobytes(), payload[1000:])
+        self.assertEqual(calls[3], call('\r\n'))
+
+    def test_write_sendmsg(self):
+        payload = 'x' * SCATTER_THRESHOLD
+        header = '*2\r\n$3\r\nSET\r\n${0}\r\n'.format(SCATTER_THRESHOLD)
+        sent_data = []
+
+        def sendmsg(views):
+            sent_data.append(''.join([view.tobytes() for view in views]))
+            return min(1000, sum([len(view) for view in views]))
+
+        sock_mock = Mock()
+        sock_mock.sendmsg.side_effect = sendmsg
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        with patch(u'pyredis.connection.HAS_SENDMSG', True):
+            connection.write(u'SET', payload)
+
+        msg = header + payload + '\r\n'
+        self.assertEqual(len(sent_data), (len(msg) + 999) // 1000)
+        for num, data in enumerate(sent_data):
+            self.assertEqual(data, msg[num * 1000:])
+        self.assertFalse(sock_mock.send.called)
+
     def test_write_exception_brokenpipeerror(self):
         cmd = u'ECHO'
         payload = u"x" * 512
 
         sock_mock = Mock()
 
-        sock_mock.send.side_effect = [BrokenPipeError]
+        sock_mock.send.side_effect = [socket.error(errno.EPIPE, u'Broken pipe')]
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         connection._connect()
         self.assertRaises(PyRedisConnError, connection.write, cmd, payload)
 
+    def test_write_read_peer_reset(self):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._sock = local
+        connection._reader = Reader()
+        connection.write(u'PING')
+        remote.close()
+        self.assertRaises(PyRedisConnError, connection.read)
+        self.assertTrue(connection.closed)
+
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._sock = local
+        connection._reader = Reader()
+        remote.close()
+        self.assertRaises(PyRedisConnError, connection.write, u'PING')
+        self.assertTrue(connection.closed)
+
     def test_read_one_chunk_one_message(self):
         raw_answer = '$10\r\nXXXXXXXXXX\r\n'
         answer = u'XXXXXXXXXX'
 
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [raw_answer]
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer)
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         result = connection.read()
@@ -396,15 +724,13 @@ class TestConnectionUnit(TestCase):
         answer = u'XXXXXXXXXX'
 
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [raw_answer1, raw_answer2]
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer1, raw_answer2)
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         result = connection.read()
@@ -415,15 +741,13 @@ class TestConnectionUnit(TestCase):
         answer = u'XXXXXXXXXX'
 
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [raw_answer]
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer)
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         result = connection.read()
@@ -435,26 +759,382 @@ class TestConnectionUnit(TestCase):
         answer2 = u'YYYYYYYYYY'
 
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [raw_answer]
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer)
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         result1 = connection.read()
         result2 = connection.read()
         self.assertEqual(result1, answer1)
         self.assertEqual(result2, answer2)
-        self.assertEqual(sock_mock.recv.call_args_list, [call(1500)])
+        self.assertEqual(sock_mock.recv_into.call_count, 1)
+
+    def test_read_without_recv_into(self):
+        raw_answer = '$10\r\nXXXXXXXXXX\r\n'
+
+        sock_mock = Mock()
+        sock_mock.recv.side_effect = [raw_answer]
+        self.socket_mock.socket.return_value = sock_mock
+
+        reader_mock = Mock(spec=[u'feed', u'gets'])
+        reader_mock.gets.side_effect = [False, u'XXXXXXXXXX']
+        self.reader_mock.return_value = reader_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        result = connection.read()
+        self.assertEqual(result, u'XXXXXXXXXX')
+        sock_mock.recv.assert_called_with(1500)
+        reader_mock.feed.assert_called_with(raw_answer)
+
+    def test_read_recv_buffer_size(self):
+        sock_mock = Mock()
+        sock_mock.recv.side_effect = ['+OK\r\n']
+        self.socket_mock.socket.return_value = sock_mock
+
+        reader_mock = Mock(spec=[u'feed', u'gets'])
+        reader_mock.gets.side_effect = [False, u'OK']
+        self.reader_mock.return_value = reader_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', recv_buffer_size=65536)
+        connection._connect()
+        connection.read()
+        sock_mock.recv.assert_called_with(65536)
+        self.assertEqual(connection.recv_buffer_size, 65536)
+
+    def test_read_recv_buffer_adaptive_grow(self):
+        received = []
+
+        def recv_into(buf, nbytes):
+            received.append((id(buf), nbytes))
+            buf[:nbytes] = 'x' * nbytes
+            return nbytes
+
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into
+        self.socket_mock.socket.return_value = sock_mock
+
+        reader_mock = Mock(spec=[u'feed', u'gets'])
+        reader_mock.gets.side_effect = [False, False, False, u'OK']
+        self.reader_mock.return_value = reader_mock
+
+        connection = pyredis.connection.Connection(
+            host=u'127.0.0.1', recv_buffer_size=1000, recv_buffer_adaptive=True
+        )
+        connection._connect()
+        connection.read()
+        self.assertEqual([nbytes for _, nbytes in received], [1000, 2000, 4000])
+        self.assertEqual(connection.recv_buffer_size, 8000)
+        self.assertEqual(reader_mock.feed.call_args_list[-1], call(connection._recv_buf, 0, 4000))
+
+    def test_read_recv_buffer_adaptive_shrink(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        reader_mock = Mock(spec=[u'feed', u'gets'])
+        reader_mock.gets.side_effect = [False, u'OK']
+        self.reader_mock.return_value = reader_mock
+
+        connection = pyredis.connection.Connection(
+            host=u'127.0.0.1', recv_buffer_size=1000, recv_buffer_adaptive=True
+        )
+        connection._connect()
+        connection._recv_size = 8000
+        connection.read()
+        self.assertEqual(connection.recv_buffer_size, 4000)
+
+    def test_read_big_bulk_recv_into(self):
+        payload = u'X' * 100000
+        raw_answer = '$100000\r\n' + payload.encode() + '\r\n'
+
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer[:1500], raw_answer[1500:])
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        result = connection.read()
+        self.assertEqual(result, payload)
+        self.assertEqual(sock_mock.recv_into.call_args_list[1][0][1], len(raw_answer) - 1500)
+
+    def test_read_no_decode(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('$2\r\n\xc3\xa4\r\n$2\r\n\xc3\xa4\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8', parser=u'python')
+        connection._connect()
+        result = connection.read(decode=False)
+        self.assertEqual(type(result), str)
+        self.assertEqual(result, '\xc3\xa4')
+        self.assertEqual(connection.read(), u'\xe4')
+
+    def test_read_as_array(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*2\r\n$1\r\n1\r\n$3\r\n2.5\r\n*1\r\n$1\r\na\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8', parser=u'python')
+        connection._connect()
+        self.assertEqual(list(connection.read(as_array=u'd')), [1.0, 2.5])
+        result = connection.read(as_array=u'd')
+        self.assertEqual(result, [u'a'])
+        self.assertEqual(type(result[0]), unicode)
+
+    def test_read_as_array_invalid_typecode(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect = Mock()
+        self.assertRaises(PyRedisError, connection.read, as_array=u'x')
+        self.assertFalse(connection._connect.called)
+
+    def test_read_many(self):
+        raw_answer1 = '+OK\r\n:1\r\n$3\r\nfo'
+        raw_answer2 = 'o\r\n-ERR blub\r\n'
+
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks(raw_answer1, raw_answer2)
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        result = connection.read_many(4, raise_on_result_err=False)
+        self.assertEqual(result[:3], ['OK', 1, u'foo'])
+        self.assertIsInstance(result[3], ReplyError)
+        self.assertEqual(sock_mock.recv_into.call_count, 2)
+
+    def test_read_many_raise_on_result_err(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('-ERR blub\r\n+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        self.assertRaises(ReplyError, connection.read_many, 2)
+        self.assertFalse(connection.closed)
+
+    def test_read_many_without_gets_many(self):
+        sock_mock = Mock()
+        sock_mock.recv.side_effect = ['+OK\r\n+OK\r\n']
+        self.socket_mock.socket.return_value = sock_mock
+
+        reader_mock = Mock(spec=[u'feed', u'gets'])
+        reader_mock.gets.side_effect = [u'OK', False, u'OK']
+        self.reader_mock.return_value = reader_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        self.assertEqual(connection.read_many(2), [u'OK', u'OK'])
+
+    def test_write_packed_duplex(self):
+        data = bytearray('*1\r\n$4\r\nPING\r\n' * 3)
+        sock_mock = Mock()
+        sock_mock.send.side_effect = [14, 28]
+        sock_mock.recv_into.side_effect = recv_into_chunks('+PONG\r\n+PO', 'NG\r\n+PONG\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        patch(u'pyredis.connection.HAS_POLL', False).start()
+        select_mock = patch(u'pyredis.connection.select', autospec=True).start()
+        select_mock.select.side_effect = [([], [sock_mock], []), ([sock_mock], [], []), ([], [sock_mock], [])]
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        result = connection.write_packed_duplex(data)
+        self.assertEqual(result, ['PONG'])
+        sent = [args[0].tobytes() for args, _ in sock_mock.send.call_args_list]
+        self.assertEqual(sent, [str(data), str(data[14:])])
+        select_mock.select.assert_called_with([sock_mock], [sock_mock], [], 2)
+        self.assertEqual(connection.read_many(2), ['PONG', 'PONG'])
+
+    def test_write_packed_duplex_timeout(self):
+        sock_mock = Mock()
+        self.socket_mock.socket.return_value = sock_mock
+        patch(u'pyredis.connection.HAS_POLL', False).start()
+        select_mock = patch(u'pyredis.connection.select', autospec=True).start()
+        select_mock.select.return_value = ([], [], [])
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        self.assertRaises(PyRedisConnReadTimeout, connection.write_packed_duplex, bytearray('*1\r\n$4\r\nPING\r\n'))
+        self.assertFalse(sock_mock.send.called)
+        self.assertTrue(connection.closed)
+
+    def test_write_packed_duplex_send_error(self):
+        sock_mock = Mock()
+        self.socket_mock.socket.return_value = sock_mock
+        patch(u'pyredis.connection.HAS_POLL', False).start()
+        select_mock = patch(u'pyredis.connection.select', autospec=True).start()
+        select_mock.select.return_value = ([], [sock_mock], [])
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        sock_mock.send.side_effect = socket.error(errno.EPIPE, u'Broken pipe')
+        self.assertRaises(PyRedisConnError, connection.write_packed_duplex, bytearray('*1\r\n$4\r\nPING\r\n'))
+        self.assertTrue(connection.closed)
+
+    def test_write_packed_duplex_send_timeout(self):
+        sock_mock = Mock()
+        self.socket_mock.socket.return_value = sock_mock
+        patch(u'pyredis.connection.HAS_POLL', False).start()
+        select_mock = patch(u'pyredis.connection.select', autospec=True).start()
+        select_mock.select.return_value = ([], [sock_mock], [])
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect()
+        sock_mock.send.side_effect = socket.timeout()
+        self.assertRaises(PyRedisConnReadTimeout, connection.write_packed_duplex, bytearray('*1\r\n$4\r\nPING\r\n'))
+        self.assertTrue(connection.closed)
+
+    def test_read_stream(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*3\r\n$1\r\na\r\n$1\r\nb', '\r\n$1\r\nc\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        stream = connection.read_stream()
+        self.assertEqual(next(stream), 'a')
+        self.assertEqual(sock_mock.recv_into.call_count, 1)
+        self.assertEqual(list(stream), ['b', 'c'])
+        self.assertEqual(sock_mock.recv_into.call_count, 2)
+        self.assertFalse(connection.closed)
+
+    def test_read_stream_not_an_array(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('+OK\r\n*0\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        self.assertEqual(list(connection.read_stream()), ['OK'])
+        self.assertEqual(list(connection.read_stream()), [])
+
+    def test_read_stream_raise_on_result_err(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*3\r\n:1\r\n-ERR blub\r\n:3\r\n+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        stream = connection.read_stream()
+        self.assertEqual(next(stream), 1)
+        self.assertRaises(ReplyError, next, stream)
+        self.assertFalse(connection.closed)
+        self.assertEqual(connection.read(), 'OK')
+
+    def test_read_stream_closed_when_abandoned(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*2\r\n:1\r\n:2\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        stream = connection.read_stream()
+        self.assertEqual(next(stream), 1)
+        stream.close()
+        self.assertTrue(connection.closed)
+
+    def test_read_stream_unfinished_read(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*2\r\n$1\r\na\r\n$1\r\nb\r\n$1\r\nv\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        stream = connection.read_stream()
+        self.assertEqual(next(stream), 'a')
+        self.assertEqual(connection.read(), 'v')
+        self.assertEqual(list(stream), [])
+        self.assertFalse(connection.closed)
+
+    def test_read_stream_unstarted_write(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('*2\r\n:1\r\n-ERR blub\r\n+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', parser=u'python')
+        connection._connect()
+        stream = connection.read_stream()
+        connection.write(u'PING')
+        self.assertEqual(connection.read_many(1), ['OK'])
+        self.assertEqual(list(stream), [])
+
+    def test_read_stream_handshake(self):
+        sock_mock = Mock()
+        sock_mock.send.side_effect = lambda data: len(data)
+        sock_mock.recv_into.side_effect = recv_into_chunks('+OK\r\n*2\r\n:1\r\n:2\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', password=u'pw', parser=u'python')
+        connection.write(u'LRANGE', u'foo', 0, -1)
+        self.assertEqual(list(connection.read_stream()), [1, 2])
+        self.assertFalse(connection.closed)
+
+    def test_read_stream_without_gets_stream(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._sock = Mock()
+        connection._reader = Mock(spec=[u'feed', u'gets'])
+        connection.read = Mock(return_value=['a', 'b'])
+        self.assertEqual(list(connection.read_stream()), ['a', 'b'])
+        connection.read.return_value = 'OK'
+        self.assertEqual(list(connection.read_stream()), ['OK'])
+
+    def test_read_push_handler(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('%1\r\n+proto\r\n:3\r\n>2\r\n+invalidate\r\n*1\r\n+key\r\n+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        handler = Mock()
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', protocol=3, push_handler=handler)
+        connection._connect()
+        self.assertEqual(connection.read(), 'OK')
+        handler.assert_called_once_with(['invalidate', ['key']])
+        self.assertIsInstance(handler.call_args[0][0], pyredis.connection.PushReply)
+
+    def test_read_many_push_handler(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks('%1\r\n+proto\r\n:3\r\n+OK\r\n>1\r\n+msg\r\n:1\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        handler = Mock()
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', protocol=3, push_handler=handler)
+        connection._connect()
+        self.assertEqual(connection.read_many(2), ['OK', 1])
+        handler.assert_called_once_with(['msg'])
+        self.assertEqual(sock_mock.recv_into.call_count, 1)
+
+    def test_read_stream_push_handler(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = recv_into_chunks(
+            '%1\r\n+proto\r\n:3\r\n>2\r\n+invalidate\r\n*1\r\n+k\r\n*2\r\n:1\r\n:2\r\n+OK\r\n')
+        self.socket_mock.socket.return_value = sock_mock
+        handler = Mock()
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', protocol=3, push_handler=handler)
+        connection._connect()
+        self.assertEqual(list(connection.read_stream()), [1, 2])
+        handler.assert_called_once_with(['invalidate', ['k']])
+        self.assertIsInstance(handler.call_args[0][0], pyredis.connection.PushReply)
+        self.assertEqual(connection.read(), 'OK')
+        self.assertFalse(connection.closed)
+
+    def test_read_many_zero(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1')
+        connection._connect = Mock()
+        self.assertEqual(connection.read_many(0), [])
+        self.assertFalse(connection._connect.called)
 
     def test_read_exception_socket_timeout(self):
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [socket.timeout]
+        sock_mock.recv_into.side_effect = [socket.timeout]
         self.socket_mock.socket.return_value = sock_mock
         self.socket_mock.timeout = socket.timeout
 
@@ -462,8 +1142,6 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         self.assertRaises(PyRedisConnReadTimeout, connection.read)
@@ -471,7 +1149,7 @@ class TestConnectionUnit(TestCase):
 
     def test_read_exception_socket_timeout_close_on_timeout_false(self):
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [socket.timeout]
+        sock_mock.recv_into.side_effect = [socket.timeout]
         self.socket_mock.socket.return_value = sock_mock
         self.socket_mock.timeout = socket.timeout
 
@@ -479,24 +1157,31 @@ class TestConnectionUnit(TestCase):
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         self.assertRaises(PyRedisConnReadTimeout, connection.read, close_on_timeout=False)
         self.assertFalse(connection.closed)
 
+    def test_read_exception_dead_peer(self):
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = [socket.error(errno.ETIMEDOUT, u'Connection timed out')]
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', keepalive=True, tcp_user_timeout=1000)
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        self.assertRaises(PyRedisConnError, connection.read)
+        self.assertTrue(connection.closed)
+
     def test_read_exception_connection_lost(self):
         sock_mock = Mock()
-        sock_mock.recv.side_effect = [u'']
+        sock_mock.recv_into.side_effect = [0]
         self.socket_mock.socket.return_value = sock_mock
 
         reader_mock = Mock()
         self.reader_mock.return_value = reader_mock
 
         connection = pyredis.connection.Connection(host=u'127.0.0.1', encoding=u'utf-8')
-        connection._authenticate = Mock()
-        connection._setdb = Mock()
         pyredis.connection.Reader = Reader
         connection._connect()
         self.assertRaises(PyRedisConnClosed, connection.read)
@@ -519,3 +1204,53 @@ class TestConnectionUnit(TestCase):
         reader_mock.gets.return_value = ReplyError(u'blub')
         connection._reader = reader_mock
         connection.read(raise_on_result_err=False)
+
+    def test_reconnect_policy_connection_lost(self):
+        policy_mock = Mock(spec=ReconnectPolicy)
+        sock_mock = Mock()
+        sock_mock.recv_into.side_effect = [0]
+        self.socket_mock.socket.return_value = sock_mock
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', reconnect_policy=policy_mock)
+        pyredis.connection.Reader = Reader
+        connection._connect()
+        policy_mock.before_connect.assert_called_with(u'127.0.0.1:6379', False)
+        policy_mock.connect_succeeded.assert_called_with(u'127.0.0.1:6379')
+        self.assertRaises(PyRedisConnClosed, connection.read)
+        sock_mock.close.assert_called_with()
+        self.assertFalse(connection.closed)
+        self.assertIsNone(connection._sock)
+        self.assertEqual(connection.reconnect_policy, policy_mock)
+
+        self.assertRaises(PyRedisConnClosed, connection.read)
+        connection.write(u'PING')
+        policy_mock.before_connect.assert_called_with(u'127.0.0.1:6379', True)
+        sock_mock.send.assert_called_with(writer(u'PING'))
+        self.assertFalse(connection._reconnecting)
+
+    def test_reconnect_policy_connect_failed(self):
+        policy_mock = Mock(spec=ReconnectPolicy)
+        self.socket_mock.socket.return_value.connect_ex.return_value = errno.ECONNREFUSED
+
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', reconnect_policy=policy_mock)
+        self.assertRaises(PyRedisConnError, connection.write, u'PING')
+        policy_mock.connect_failed.assert_called_with(u'127.0.0.1:6379')
+        self.assertFalse(policy_mock.connect_succeeded.called)
+        self.assertFalse(connection.closed)
+
+    def test_reconnect_policy_circuit_open(self):
+        policy_mock = Mock(spec=ReconnectPolicy)
+        policy_mock.before_connect.side_effect = PyRedisCircuitOpen(u'open')
+
+        connection = pyredis.connection.Connection(unix_sock=u'/tmp/redis.sock', reconnect_policy=policy_mock)
+        self.assertRaises(PyRedisCircuitOpen, connection.write, u'PING')
+        policy_mock.before_connect.assert_called_with(u'/tmp/redis.sock', False)
+        self.assertFalse(self.socket_mock.socket.called)
+        self.assertFalse(policy_mock.connect_failed.called)
+
+    def test_reconnect_policy_close(self):
+        connection = pyredis.connection.Connection(host=u'127.0.0.1', reconnect_policy=Mock(spec=ReconnectPolicy))
+        connection._connect()
+        connection.close()
+        self.assertTrue(connection.closed)
+        self.assertRaises(PyRedisConnError, connection.write, u'PING')
@@ -21,6 +21,10 @@ class TestHelperUnit(TestCase):
         result = dict_from_list(source)
         self.assertEqual(result, expected)
 
+    def test_dict_from_list_dict(self):
+        source = {u'test1': 1234}
+        self.assertIs(dict_from_list(source), source)
+
     def test_tag_from_key_no_tag(self):
         key = u'testkey'
         result = tag_from_key(key)
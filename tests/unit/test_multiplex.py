@@ -0,0 +1,243 @@
+from __future__ import absolute_import
+from Queue import Queue
+from unittest import TestCase
+from unittest.mock import Mock, patch
+import threading
+
+from pyredis.exceptions import *
+from pyredis.protocol import Reader, writer
+import pyredis.multiplex
+
+
+class FakeConnection(object):
+    u""" Connection answering every command with its first argument. """
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.replies = Queue()
+        self.reader = Reader()
+        self.written = []
+        self.closed = False
+        self.fail_write = None
+        self.instances.append(self)
+
+    def write_packed(self, data):
+        if self.fail_write:
+            raise self.fail_write
+        self.written.append(data)
+        self.reader.feed(str(data))
+        for command in self.reader.gets_many():
+            if command[0] == u'FAIL':
+                self.replies.put(PyRedisConnClosed(u'Connection went away while reading'))
+            elif command[0] == u'ERR':
+                self.replies.put(ReplyError(u'ERR'))
+            else:
+                self.replies.put(command[1])
+
+    def read(self, raise_on_result_err=True, decode=True):
+        reply = self.replies.get()
+        if isinstance(reply, PyRedisConnClosed):
+            raise reply
+        return reply if decode else (u'raw', reply)
+
+    def close(self):
+        self.closed = True
+
+
+class TestMultiplexFuture(TestCase):
+    def test_result(self):
+        future = pyredis.multiplex.MultiplexFuture()
+        self.assertFalse(future.done())
+        future.set_result(u'OK')
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), u'OK')
+
+    def test_result_reply_error(self):
+        future = pyredis.multiplex.MultiplexFuture()
+        future.set_result(ReplyError(u'ERR'))
+        self.assertRaises(ReplyError, future.result)
+
+    def test_result_exception(self):
+        future = pyredis.multiplex.MultiplexFuture()
+        future.set_exception(PyRedisConnError(u'lost'))
+        self.assertRaises(PyRedisConnError, future.result)
+
+    def test_result_timeout(self):
+        future = pyredis.multiplex.MultiplexFuture()
+        self.assertRaises(PyRedisConnReadTimeout, future.result, 0.01)
+
+
+class TestMultiplexConnectionUnit(TestCase):
+    def setUp(self):
+        self.addCleanup(patch.stopall)
+        FakeConnection.instances = []
+        connection_patcher = patch(u'pyredis.multiplex.Connection', FakeConnection)
+        connection_patcher.start()
+
+    def test_execute_async(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        future = connection.execute_async(u'GET', u'foo')
+        self.assertEqual(future.result(1), u'foo')
+        self.assertEqual(FakeConnection.instances[0].kwargs, {u'host': u'127.0.0.1'})
+
+    def test_execute_async_decode(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        self.assertEqual(connection.execute_async(u'GET', u'foo', decode=False).result(1), (u'raw', u'foo'))
+
+    def test_execute_async_reply_error(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        error = connection.execute_async(u'ERR')
+        ok = connection.execute_async(u'GET', u'foo')
+        self.assertRaises(ReplyError, error.result, 1)
+        self.assertEqual(ok.result(1), u'foo')
+
+    def test__write_loop_coalesced(self):
+        with patch.object(pyredis.multiplex.MultiplexConnection, u'_start'):
+            connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1', batch_size=2)
+        futures = [connection.execute_async(u'GET', key) for key in u'abcde']
+        connection._pending.put(None)
+        connection._write_loop()
+        self.assertEqual(FakeConnection.instances[0].written, [
+            writer(u'GET', u'a') + writer(u'GET', u'b'),
+            writer(u'GET', u'c') + writer(u'GET', u'd'),
+            writer(u'GET', u'e'),
+        ])
+        self.assertEqual([future for future, _ in connection._inflight], futures)
+
+    def test_execute_async_threads(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        errors = []
+
+        def worker(num):
+            for i in xrange(200):
+                key = u'{0}:{1}'.format(num, i)
+                if connection.execute_async(u'GET', key).result(5) != key:
+                    errors.append(key)
+        threads = [threading.Thread(target=worker, args=(num,)) for num in xrange(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(FakeConnection.instances), 1)
+
+    def test_execute_async_read_error(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        self.assertRaises(PyRedisConnClosed, connection.execute_async(u'FAIL').result, 1)
+        self.assertEqual(connection.execute_async(u'GET', u'foo').result(1), u'foo')
+        self.assertEqual(len(FakeConnection.instances), 2)
+        self.assertTrue(FakeConnection.instances[0].closed)
+
+    def test_execute_async_write_error(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        FakeConnection.instances[0].fail_write = IOError(u'broken pipe')
+        self.assertRaises(PyRedisConnError, connection.execute_async(u'GET', u'foo').result, 1)
+        self.assertEqual(connection.execute_async(u'GET', u'foo').result(1), u'foo')
+        self.assertEqual(len(FakeConnection.instances), 2)
+
+    def test__reset_waits_for_write(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        self.addCleanup(connection.close)
+        conn = FakeConnection.instances[0]
+        writing = threading.Event()
+        release = threading.Event()
+        write_packed = conn.write_packed
+
+        def slow_write_packed(data):
+            writing.set()
+            release.wait(5)
+            write_packed(data)
+        conn.write_packed = slow_write_packed
+        future = connection.execute_async(u'GET', u'foo')
+        writing.wait(5)
+        reset = threading.Thread(target=connection._reset, args=(conn, IOError(u'reset')))
+        reset.start()
+        reset.join(0.05)
+        self.assertFalse(conn.closed)
+        release.set()
+        reset.join(5)
+        self.assertTrue(conn.closed)
+        self.assertRaises(PyRedisConnError, future.result, 1)
+
+    def test_close(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        futures = [connection.execute_async(u'GET', key) for key in u'abc']
+        connection.close()
+        self.assertTrue(connection.closed)
+        self.assertEqual([future.result(0) for future in futures], list(u'abc'))
+        self.assertTrue(FakeConnection.instances[0].closed)
+        self.assertRaises(PyRedisConnError, connection.execute_async, u'GET', u'foo')
+        connection.close()
+
+    def test_close_concurrent_execute(self):
+        connection = pyredis.multiplex.MultiplexConnection(host=u'127.0.0.1')
+        futures = []
+
+        def execute():
+            for _ in xrange(200):
+                try:
+                    futures.append(connection.execute_async(u'GET', u'foo'))
+                except PyRedisConnError:
+                    return
+
+        threads = [threading.Thread(target=execute) for _ in xrange(4)]
+        for thread in threads:
+            thread.start()
+        connection.close()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([future.result(1) for future in futures], [u'foo'] * len(futures))
+
+
+class TestMultiplexClientUnit(TestCase):
+    def setUp(self):
+        self.addCleanup(patch.stopall)
+        connection_patcher = patch(u'pyredis.multiplex.MultiplexConnection', autospec=True)
+        self.connection_mock = connection_patcher.start()
+        self.connection_mock.side_effect = lambda **kwargs: Mock()
+
+    def test___init__(self):
+        client = pyredis.multiplex.MultiplexClient(connections=3, host=u'127.0.0.1')
+        self.assertEqual(len(client._conns), 3)
+        self.connection_mock.assert_called_with(batch_size=pyredis.multiplex.BATCH_SIZE, host=u'127.0.0.1')
+        self.assertRaises(PyRedisError, pyredis.multiplex.MultiplexClient, connections=0, host=u'127.0.0.1')
+
+    def test_execute(self):
+        client = pyredis.multiplex.MultiplexClient(host=u'127.0.0.1')
+        conn = client._conns[0]
+        self.assertEqual(client.get(u'foo'), conn.execute_async.return_value.result.return_value)
+        conn.execute_async.assert_called_with(u'GET', u'foo', decode=True)
+
+    def test_execute_async(self):
+        client = pyredis.multiplex.MultiplexClient(host=u'127.0.0.1')
+        conn = client._conns[0]
+        self.assertEqual(client.execute_async(u'DUMP', u'foo', decode=False), conn.execute_async.return_value)
+        conn.execute_async.assert_called_with(u'DUMP', u'foo', decode=False)
+
+    def test_execute_thread_keeps_connection(self):
+        client = pyredis.multiplex.MultiplexClient(connections=2, host=u'127.0.0.1')
+        used = []
+
+        def worker():
+            used.append(client._get_conn())
+            used.append(client._get_conn())
+        threads = [threading.Thread(target=worker) for _ in xrange(2)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        self.assertIs(used[0], used[1])
+        self.assertIs(used[2], used[3])
+        self.assertIsNot(used[0], used[2])
+
+    def test_close(self):
+        client = pyredis.multiplex.MultiplexClient(connections=2, host=u'127.0.0.1')
+        client.close()
+        for conn in client._conns:
+            conn.close.assert_called_with()
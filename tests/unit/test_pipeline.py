@@ -0,0 +1,249 @@
+from __future__ import absolute_import
+from unittest import TestCase
+from unittest.mock import Mock, call
+
+from pyredis.exceptions import *
+from pyredis.protocol import pack_commands
+import pyredis.pipeline
+
+
+class TestFuture(TestCase):
+    def test_result(self):
+        future = pyredis.pipeline.Future()
+        self.assertFalse(future.done())
+        future.set_result(None)
+        self.assertTrue(future.done())
+        self.assertIsNone(future.result())
+        self.assertIsNone(future.exception())
+
+    def test_result_reply_error(self):
+        future = pyredis.pipeline.Future()
+        future.set_result(ReplyError(u'ERR'))
+        self.assertTrue(future.done())
+        self.assertRaises(ReplyError, future.result)
+        self.assertIsInstance(future.exception(), ReplyError)
+
+    def test_result_not_flushed(self):
+        future = pyredis.pipeline.Future()
+        self.assertRaises(PyRedisError, future.result)
+        self.assertRaises(PyRedisError, future.exception)
+
+
+class TestPipelineUnit(TestCase):
+    def setUp(self):
+        self.conn_1 = Mock()
+        self.conn_2 = Mock()
+        self.client = Mock()
+        self.client._cluster = False
+        self.client._pipeline_conn.return_value = self.conn_1
+
+    def test_execute(self):
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        future = pipe.get(u'foo')
+        self.assertIsInstance(future, pyredis.pipeline.Future)
+        self.assertFalse(future.done())
+        self.assertEqual(len(pipe), 1)
+        self.client._pipeline_conn.assert_called_with(shard_key=None, sock=None)
+        self.assertFalse(self.conn_1.write_packed.called)
+
+    def test_execute_cluster_no_shard_key(self):
+        self.client._cluster = True
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        self.assertRaises(PyRedisError, pipe.execute, u'GET', u'foo')
+        self.assertRaises(PyRedisError, pipe.execute, u'GET', u'foo', shard_key=u'foo', sock=u'host_6379')
+
+    def test_flush(self):
+        self.conn_1.read_many.return_value = ['OK', 'bar', ReplyError(u'WRONGTYPE')]
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        futures = [pipe.set(u'foo', u'bar'), pipe.get(u'foo'), pipe.incr(u'foo')]
+        pipe.flush()
+        self.conn_1.write_packed.assert_called_once_with(
+            pack_commands([(u'SET', u'foo', u'bar'), (u'GET', u'foo'), (u'INCR', u'foo')])
+        )
+        self.conn_1.read_many.assert_called_once_with(3, raise_on_result_err=False)
+        self.assertEqual(futures[0].result(), 'OK')
+        self.assertEqual(futures[1].result(), 'bar')
+        self.assertRaises(ReplyError, futures[2].result)
+        self.assertEqual(len(pipe), 0)
+
+    def test_flush_empty(self):
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        pipe.flush()
+        self.assertFalse(self.conn_1.write_packed.called)
+
+    def test_flush_no_decode(self):
+        self.conn_1.read.side_effect = ['bar', '\x00\x01']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        value = pipe.get(u'foo')
+        dump = pipe.dump(u'foo')
+        pipe.flush()
+        self.assertEqual(self.conn_1.read.call_args_list[1][1], dict(
+            raise_on_result_err=False, decode=False, as_array=None
+        ))
+        self.assertFalse(self.conn_1.read_many.called)
+        self.assertEqual(value.result(), 'bar')
+        self.assertEqual(dump.result(), '\x00\x01')
+
+    def test_flush_grouped_by_conn(self):
+        self.client._cluster = True
+        self.client._pipeline_conn.side_effect = lambda shard_key, sock: {
+            u'a': self.conn_1, u'b': self.conn_2
+        }[shard_key]
+        self.conn_1.read_many.return_value = ['1', '3']
+        self.conn_2.read_many.return_value = ['2']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        futures = [pipe.get(u'a'), pipe.get(u'b'), pipe.get(u'a')]
+        pipe.flush()
+        self.conn_1.write_packed.assert_called_once_with(pack_commands([(u'GET', u'a'), (u'GET', u'a')]))
+        self.conn_2.write_packed.assert_called_once_with(pack_commands([(u'GET', u'b')]))
+        self.assertEqual([future.result() for future in futures], ['1', '2', '3'])
+
+    def test_flush_conn_error(self):
+        self.client._cluster = True
+        self.client._pipeline_conn.side_effect = lambda shard_key, sock: {
+            u'a': self.conn_1, u'b': self.conn_2
+        }[shard_key]
+        self.conn_1.read_many.side_effect = PyRedisConnClosed(u'gone')
+        self.conn_2.read_many.return_value = ['2']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        first, second = pipe.get(u'a'), pipe.get(u'b')
+        self.assertRaises(PyRedisConnClosed, pipe.flush)
+        self.assertRaises(PyRedisConnClosed, first.result)
+        self.assertEqual(second.result(), '2')
+        self.client._pipeline_conn_failed.assert_called_once_with([self.conn_1])
+
+    def test_flush_write_error(self):
+        self.conn_1.write_packed.side_effect = PyRedisConnError(u'broken pipe')
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        future = pipe.get(u'foo')
+        self.assertRaises(PyRedisConnError, pipe.flush)
+        self.assertRaises(PyRedisConnError, future.result)
+        self.assertFalse(self.conn_1.read_many.called)
+        self.client._pipeline_conn_failed.assert_called_once_with([self.conn_1])
+
+    def test_flush_conn_failed_error(self):
+        self.conn_1.read_many.side_effect = PyRedisConnReadTimeout(u'timeout')
+        self.client._pipeline_conn_failed.side_effect = PyRedisError(u'no map')
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        future = pipe.get(u'foo')
+        self.assertRaises(PyRedisConnReadTimeout, pipe.flush)
+        self.assertRaises(PyRedisConnReadTimeout, future.result)
+
+    def test_flush_moved(self):
+        self.client._cluster = True
+        self.conn_1.read_many.return_value = ['OK', ReplyError(u'MOVED 42 host2:12345')]
+        self.client._pipeline_redirect.return_value = self.conn_2
+        self.conn_2.read_many.return_value = ['bar']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        first, second = pipe.set(u'a', 1), pipe.get(u'b')
+        pipe.flush()
+        self.client._pipeline_redirect.assert_called_once_with(u'MOVED 42 host2:12345', u'b', refresh=True)
+        self.assertFalse(self.client._pipeline_conn_failed.called)
+        self.conn_2.write_packed.assert_called_once_with(pack_commands([(u'GET', u'b')]))
+        self.assertEqual(first.result(), 'OK')
+        self.assertEqual(second.result(), 'bar')
+
+    def test_flush_moved_refresh_once(self):
+        self.client._cluster = True
+        moved = ReplyError(u'MOVED 42 host2:12345')
+        self.conn_1.read_many.return_value = [moved, moved]
+        self.client._pipeline_redirect.return_value = self.conn_2
+        self.conn_2.read_many.return_value = ['1', '2']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        futures = [pipe.get(u'a'), pipe.get(u'b')]
+        pipe.flush()
+        self.assertEqual(self.client._pipeline_redirect.call_args_list, [
+            call(u'MOVED 42 host2:12345', u'a', refresh=True),
+            call(u'MOVED 42 host2:12345', u'b', refresh=False)
+        ])
+        self.assertEqual([future.result() for future in futures], ['1', '2'])
+
+    def test_flush_ask(self):
+        self.client._cluster = True
+        self.conn_1.read_many.return_value = [ReplyError(u'ASK 42 host2:12345')]
+        self.client._pipeline_redirect.return_value = self.conn_2
+        self.conn_2.read_many.return_value = ['OK', 'bar']
+        pipe = pyredis.pipeline.Pipeline(self.client)
+        future = pipe.get(u'b')
+        pipe.flush()
+        self.conn_2.write_packed.assert_called_once_with(pack_commands([(u'ASKING',), (u'GET', u'b')]))
+        self.conn_2.read_many.assert_called_once_with(2, raise_on_result_err=False)
+        self.assertEqual(future.result(), 'bar')
+
+    def test_flush_redirect_retries(self):
+        self.client._cluster = True
+        self.conn_1.read_many.return_value = [ReplyError(u'MOVED 42 host1:12345')]
+        self.client._pipeline_redirect.return_value = self.conn_1
+        pipe = pyredis.pipeline.Pipeline(self.client, retries=2)
+        future = pipe.get(u'b')
+        pipe.flush()
+        self.assertEqual(self.conn_1.write_packed.call_count, 3)
+        self.assertRaises(PyRedisError, future.result)
+
+    def test_flush_no_redirect(self):
+        client = Mock(spec=[u'_cluster', u'_pipeline_conn'])
+        client._cluster = True
+        client._pipeline_conn.return_value = self.conn_1
+        self.conn_1.read_many.return_value = [ReplyError(u'MOVED 42 host2:12345')]
+        pipe = pyredis.pipeline.Pipeline(client)
+        future = pipe.get(u'b')
+        pipe.flush()
+        self.assertRaises(ReplyError, future.result)
+        self.assertEqual(self.conn_1.write_packed.call_count, 1)
+
+    def test_context_manager(self):
+        self.conn_1.read_many.return_value = ['bar']
+        release = Mock()
+        with pyredis.pipeline.Pipeline(self.client, release=release) as pipe:
+            future = pipe.get(u'foo')
+        self.assertEqual(future.result(), 'bar')
+        release.assert_called_once_with(self.client)
+
+    def test_flush_release(self):
+        self.conn_1.read_many.return_value = ['bar']
+        release = Mock()
+        pipe = pyredis.pipeline.Pipeline(self.client, release=release)
+        future = pipe.get(u'foo')
+        pipe.flush()
+        self.assertEqual(future.result(), 'bar')
+        release.assert_called_once_with(self.client)
+        self.assertRaises(PyRedisError, pipe.get, u'foo')
+        pipe.flush()
+        self.assertEqual(release.call_count, 1)
+
+    def test_flush_release_conn_error(self):
+        self.conn_1.read_many.side_effect = PyRedisConnError(u'lost')
+        release = Mock()
+        pipe = pyredis.pipeline.Pipeline(self.client, release=release)
+        pipe.get(u'foo')
+        self.assertRaises(PyRedisConnError, pipe.flush)
+        release.assert_called_once_with(self.client)
+
+    def test_discard_release(self):
+        release = Mock()
+        pipe = pyredis.pipeline.Pipeline(self.client, release=release)
+        future = pipe.get(u'foo')
+        pipe.discard()
+        self.assertRaises(PyRedisError, future.result)
+        release.assert_called_once_with(self.client)
+
+    def test_context_manager_flushed(self):
+        self.conn_1.read_many.return_value = ['bar']
+        release = Mock()
+        with pyredis.pipeline.Pipeline(self.client, release=release) as pipe:
+            future = pipe.get(u'foo')
+            pipe.flush()
+        self.assertEqual(future.result(), 'bar')
+        release.assert_called_once_with(self.client)
+
+    def test_context_manager_exception(self):
+        release = Mock()
+        try:
+            with pyredis.pipeline.Pipeline(self.client, release=release) as pipe:
+                future = pipe.get(u'foo')
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertFalse(self.conn_1.write_packed.called)
+        self.assertRaises(PyRedisError, future.result)
+        release.assert_called_once_with(self.client)
@@ -20,6 +20,9 @@ class TestBasePoolUnit(TestCase):
         self.assertEqual(self.pool._conn_timeout, 2)
         self.assertEqual(self.pool._read_timeout, 2)
         self.assertEqual(self.pool.pool_size, 16)
+        self.assertEqual(self.pool.recv_buffer_size, 1500)
+        self.assertFalse(self.pool.recv_buffer_adaptive)
+        self.assertEqual(self.pool.parser, u'auto')
         self.assertFalse(self.pool.close_on_err)
 
     def test___init___custom_args(self):
@@ -31,7 +34,9 @@ class TestBasePoolUnit(TestCase):
             conn_timeout=23,
             read_timeout=12,
             pool_size=123,
-            lock=lock_mock
+            lock=lock_mock,
+            recv_buffer_size=65536,
+            recv_buffer_adaptive=True
         )
         self.assertEqual(pool.database, 1)
         self.assertEqual(pool.password, u'blubber')
@@ -40,6 +45,8 @@ class TestBasePoolUnit(TestCase):
         self.assertEqual(pool.read_timeout, 12)
         self.assertEqual(pool.pool_size, 123)
         self.assertEqual(pool._lock, lock_mock)
+        self.assertEqual(pool.recv_buffer_size, 65536)
+        self.assertTrue(pool.recv_buffer_adaptive)
 
     def test_acquire_free(self):
         client_orig = Mock()
@@ -92,6 +99,34 @@ class TestBasePoolUnit(TestCase):
         self.assertIn(client, self.pool._pool_free)
         self.assertNotIn(client, self.pool._pool_used)
 
+    def test_pipeline(self):
+        client = Mock()
+        client.closed = False
+        client._cluster = False
+        client._pipeline_conn.return_value.read_many.return_value = ['bar']
+        self.pool.acquire = Mock(return_value=client)
+        self.pool.release = Mock()
+
+        with self.pool.pipeline() as pipe:
+            future = pipe.get(u'foo')
+            self.assertFalse(self.pool.release.called)
+        self.pool.release.assert_called_once_with(client)
+        self.assertEqual(future.result(), 'bar')
+
+    def test_pipeline_flush(self):
+        client = Mock()
+        client.closed = False
+        client._cluster = False
+        client._pipeline_conn.return_value.read_many.return_value = ['bar']
+        self.pool.acquire = Mock(return_value=client)
+        self.pool.release = Mock()
+
+        pipe = self.pool.pipeline()
+        future = pipe.get(u'foo')
+        pipe.flush()
+        self.pool.release.assert_called_once_with(client)
+        self.assertEqual(future.result(), 'bar')
+
     def test_release_shrink(self):
         client = Mock()
         client.closed = False
@@ -214,7 +249,23 @@ class TestClusterPoolUnit(TestCase):
             cluster_map=self.pool._map,
             encoding=None,
             slave_ok=False,
-            database=0)
+            database=0,
+            recv_buffer_size=1500,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            client_name=None,
+            reconnect_policy=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None)
         self.assertEqual(self.client_mock_inst, client)
 
 
@@ -237,11 +288,21 @@ class TestHashPoolUnit(TestCase):
         client = self.pool._connect()
         self.client_mock.assert_called_with(
             buckets=self.pool.buckets,
+            peer_uid=self.pool.peer_uid,
             database=self.pool.database,
             password=self.pool.password,
             encoding=self.pool.encoding,
             conn_timeout=self.pool.conn_timeout,
-            read_timeout=self.pool.read_timeout
+            read_timeout=self.pool.read_timeout,
+            recv_buffer_size=self.pool.recv_buffer_size,
+            recv_buffer_adaptive=self.pool.recv_buffer_adaptive,
+            parser=self.pool.parser,
+            lazy_decode=self.pool.lazy_decode,
+            protocol=self.pool.protocol,
+            push_handler=self.pool.push_handler,
+            client_name=self.pool.client_name,
+            reconnect_policy=self.pool.reconnect_policy,
+            **self.pool.socket_options
         )
         self.assertEqual(client, client_mock)
 
@@ -270,6 +331,13 @@ class TestPoolUnit(TestCase):
         self.assertEqual(pool.unix_sock, u'/tmp/redis.sock')
         self.assertIsNone(pool.host)
 
+    def test___init___peer_uid(self):
+        pool = pyredis.pool.Pool(unix_sock=u'@redis', peer_uid=999)
+        self.assertEqual(pool.peer_uid, 999)
+        pool._connect()
+        self.assertEqual(self.client_mock.call_args[1][u'unix_sock'], u'@redis')
+        self.assertEqual(self.client_mock.call_args[1][u'peer_uid'], 999)
+
     def test__init___no_host_or_unix_sock(self):
         self.assertRaises(PyRedisError, pyredis.pool.Pool)
 
@@ -286,11 +354,21 @@ class TestPoolUnit(TestCase):
             host=self.pool.host,
             port=self.pool.port,
             unix_sock=self.pool.unix_sock,
+            peer_uid=self.pool.peer_uid,
             database=self.pool.database,
             password=self.pool.password,
             encoding=self.pool.encoding,
             conn_timeout=self.pool.conn_timeout,
-            read_timeout=self.pool.read_timeout
+            read_timeout=self.pool.read_timeout,
+            recv_buffer_size=self.pool.recv_buffer_size,
+            recv_buffer_adaptive=self.pool.recv_buffer_adaptive,
+            parser=self.pool.parser,
+            lazy_decode=self.pool.lazy_decode,
+            protocol=self.pool.protocol,
+            push_handler=self.pool.push_handler,
+            client_name=self.pool.client_name,
+            reconnect_policy=self.pool.reconnect_policy,
+            **self.pool.socket_options
         )
         self.assertEqual(client, client_mock)
 
@@ -418,7 +496,23 @@ class TestSentinelPoolUnit(TestCase):
             host=u'host1',
             encoding=None,
             database=0,
-            port=12345
+            port=12345,
+            recv_buffer_size=1500,
+            recv_buffer_adaptive=False,
+            parser=u'auto',
+            lazy_decode=False,
+            protocol=2,
+            push_handler=None,
+            client_name=None,
+            reconnect_policy=None,
+            tcp_nodelay=True,
+            keepalive=False,
+            keepalive_idle=None,
+            keepalive_interval=None,
+            keepalive_count=None,
+            so_sndbuf=None,
+            so_rcvbuf=None,
+            tcp_user_timeout=None
         )
         self.assertEqual(client, client_mock)
 
@@ -1,7 +1,10 @@
 from __future__ import absolute_import
 from unittest import TestCase
 import pyredis.protocol as hiredis
-from pyredis.protocol import writer, to_bytes
+import pyredis.protocol
+from pyredis.protocol import writer, to_bytes, encode_into, encode_parts, pack_commands, ReadBuffer, BUFFER_SIZE_IDLE_MAX
+from pyredis.protocol import STREAM_END, LazyString, PushReply, numeric_array, decode_reply
+from unittest.mock import Mock, patch
 import sys
 from itertools import izip
 
@@ -222,6 +225,34 @@ class ReaderTest(TestCase):
         self.reader.feed('*1\r\n*1\r\n*1\r\n*1\r\n$1\r\n!\r\n')
         self.assertEqual([[[['!']]]], self.reply())
 
+    def test_nested_multi_bulk_depth_resume(self):
+        depth = 5000
+        payload = '*1\r\n' * depth + '$1\r\n!\r\n'
+        for pos in xrange(0, len(payload), 7):
+            self.assertFalse(self.reply())
+            self.reader.feed(payload[pos:pos + 7])
+        result = self.reply()
+        for _ in xrange(depth):
+            result = result[0]
+        self.assertEqual('!', result)
+
+    def test_multi_bulk_byte_by_byte(self):
+        payload = '*3\r\n:1\r\n*2\r\n+ok\r\n$-1\r\n$3\r\nfoo\r\n'
+        for byte in payload[:-1]:
+            self.reader.feed(byte)
+            self.assertFalse(self.reply())
+        self.reader.feed(payload[-1])
+        self.assertEqual([1, ['ok', None], 'foo'], self.reply())
+
+    def test_bulk_string_reserves_announced_size(self):
+        self.reader.feed('$100000\r\nxx')
+        self.assertFalse(self.reply())
+        self.assertEqual(self.reader._replyparser.wanted, 100000)
+        self.assertGreaterEqual(len(self.reader._buffer._buf), 100002)
+        self.reader.feed('x' * 99998 + '\r\n')
+        self.assertEqual('x' * 100000, self.reply())
+        self.assertEqual(self.reader._replyparser.wanted, 0)
+
     def test_subclassable(self):
         class TestReader(hiredis.Reader):
             def __init__(self, *args, **kwargs):
@@ -249,11 +280,268 @@ class ReaderTest(TestCase):
         self.reader.feed(data, 4, len(data) - 4)
         self.assertEqual('ok', self.reply())
 
+    def test_many_replies_one_feed(self):
+        self.reader.feed('+ok\r\n' * 1000 + '$5\r\nhello\r\n')
+        for _ in xrange(1000):
+            self.assertEqual('ok', self.reply())
+        self.assertEqual('hello', self.reply())
+        self.assertFalse(self.reply())
+
+    def test_gets_many(self):
+        self.reader.feed('+ok\r\n:1\r\n*2\r\n$1\r\na\r\n$1\r\nb\r\n-err\r\n$3\r\nfo')
+        results = self.reader.gets_many()
+        self.assertEqual(['ok', 1, ['a', 'b']], results[:3])
+        self.assertEqual(hiredis.ReplyError, type(results[3]))
+        self.assertEqual([], self.reader.gets_many())
+        self.reader.feed('o\r\n')
+        self.assertEqual(['foo'], self.reader.gets_many())
+
+    def test_gets_many_max_n(self):
+        self.reader.feed('+ok\r\n' * 5)
+        self.assertEqual(['ok', 'ok'], self.reader.gets_many(2))
+        self.assertEqual(['ok', 'ok', 'ok'], self.reader.gets_many(10))
+
     def test_feed_bytearray(self):
         if sys.hexversion >= 0x02060000:
             self.reader.feed(bytearray('+ok\r\n'))
             self.assertEqual('ok', self.reply())
 
+    def test_resp3_map(self):
+        self.reader.feed('%2\r\n+a\r\n:1\r\n$1\r\nb\r\n%1\r\n+c\r\n_\r\n')
+        self.assertEqual({'a': 1, 'b': {'c': None}}, self.reply())
+
+    def test_resp3_map_partial(self):
+        self.reader.feed('%1\r\n$1\r\na\r\n$3\r\nfo')
+        self.assertFalse(self.reply())
+        self.reader.feed('o\r\n')
+        self.assertEqual({'a': 'foo'}, self.reply())
+
+    def test_resp3_empty_map(self):
+        self.reader.feed('%0\r\n')
+        self.assertEqual({}, self.reply())
+
+    def test_resp3_map_null_key(self):
+        self.reader.feed('%2\r\n_\r\n+v\r\n+a\r\n_\r\n')
+        self.assertEqual({None: 'v', 'a': None}, self.reply())
+
+    def test_resp3_map_unhashable_key(self):
+        self.reader.feed('%1\r\n*2\r\n:1\r\n:2\r\n+x\r\n')
+        self.assertEqual({(1, 2): 'x'}, self.reply())
+
+    def test_resp3_set(self):
+        self.reader.feed('~3\r\n+a\r\n+b\r\n+a\r\n~0\r\n')
+        self.assertEqual(set(['a', 'b']), self.reply())
+        self.assertEqual(set(), self.reply())
+
+    def test_resp3_set_unhashable(self):
+        self.reader.feed('~2\r\n*1\r\n:1\r\n:2\r\n')
+        self.assertEqual([[1], 2], self.reply())
+
+    def test_resp3_scalars(self):
+        self.reader.feed(',1.5\r\n,-inf\r\n#t\r\n#f\r\n_\r\n(3492890328409238509324850943850943825024385\r\n')
+        self.assertEqual(1.5, self.reply())
+        self.assertEqual(float(u'-inf'), self.reply())
+        self.assertIs(True, self.reply())
+        self.assertIs(False, self.reply())
+        self.assertIsNone(self.reply())
+        self.assertEqual(3492890328409238509324850943850943825024385, self.reply())
+
+    def test_resp3_verbatim(self):
+        self.reader = hiredis.Reader(encoding=u'utf-8')
+        self.reader.feed('=15\r\ntxt:Some string\r\n')
+        self.assertEqual(u'Some string', self.reply())
+
+    def test_resp3_blob_error(self):
+        self.reader.feed('!21\r\nSYNTAX invalid syntax\r\n')
+        error = self.reply()
+        self.assertEqual(hiredis.ReplyError, type(error))
+        self.assertEqual((u'SYNTAX invalid syntax',), error.args)
+
+    def test_resp3_push(self):
+        self.reader.feed('>3\r\n+message\r\n+chan\r\n+hello\r\n')
+        result = self.reply()
+        self.assertIsInstance(result, PushReply)
+        self.assertEqual(['message', 'chan', 'hello'], result)
+
+    def test_resp3_attribute(self):
+        self.reader.feed('|1\r\n+ttl\r\n:3600\r\n*2\r\n:1\r\n|1\r\n+a\r\n#t\r\n:2\r\n')
+        self.assertEqual([1, 2], self.reply())
+        self.assertEqual({'a': True}, self.reader.attributes)
+
+    def test_resp3_attribute_top_level(self):
+        self.reader.feed('|1\r\n+ttl\r\n:3600\r\n+OK\r\n+next\r\n')
+        self.assertEqual('OK', self.reply())
+        self.assertEqual({'ttl': 3600}, self.reader.attributes)
+        self.assertEqual('next', self.reply())
+        self.assertIsNone(self.reader.attributes)
+
+    def test_gets_stream_map_and_set(self):
+        self.reader.feed('%2\r\n+a\r\n:1\r\n+b\r\n:2\r\n~1\r\n+x\r\n')
+        self.assertEqual(['a', 1, 'b', 2, STREAM_END], [self.reader.gets_stream() for _ in xrange(5)])
+        self.assertEqual(['x', STREAM_END], [self.reader.gets_stream() for _ in xrange(2)])
+
+    def test_as_array(self):
+        self.reader = hiredis.Reader(encoding=u'utf-8', as_array=u'd')
+        self.reader.feed('*3\r\n$3\r\n1.5\r\n:2\r\n$2\r\n-3\r\n')
+        self.assertEqual([1.5, 2.0, -3.0], list(self.reply()))
+
+    def test_as_array_not_numeric(self):
+        self.reader = hiredis.Reader(encoding=u'utf-8', as_array=u'q')
+        self.reader.feed('*2\r\n$1\r\n1\r\n$-1\r\n*2\r\n:1\r\n$2\r\n\xc3\xa4\r\n$2\r\n\xc3\xa4\r\n')
+        self.assertEqual([u'1', None], self.reply())
+        self.assertEqual([1, u'\xe4'], self.reply())
+        self.assertEqual(u'\xe4', self.reply())
+
+    def test_as_array_gets_many(self):
+        self.reader = hiredis.Reader(as_array=u'q')
+        self.reader.feed('*1\r\n:7\r\n+OK\r\n')
+        results = self.reader.gets_many()
+        self.assertEqual([7], list(results[0]))
+        self.assertEqual('OK', results[1])
+
+    def test_as_array_invalid_typecode(self):
+        self.assertRaises(ValueError, hiredis.Reader, as_array=u'x')
+
+    def test_lazy_decode(self):
+        self.reader = hiredis.Reader(encoding=u'utf-8', lazy_decode=True)
+        self.reader.feed('*2\r\n$2\r\n\xc3\xa4\r\n$1\r\n\xff\r\n')
+        result = self.reply()
+        self.assertEqual(type(result[0]), LazyString)
+        self.assertEqual('\xc3\xa4', result[0])
+        self.assertEqual(u'\xe4', result[0].text)
+        self.assertIs(result[0].text, result[0].text)
+        self.assertEqual('\xff', result[1].text)
+
+    def test_set_encoding(self):
+        self.reader = hiredis.Reader(encoding=u'utf-8')
+        self.reader.feed('$2\r\n\xc3\xa4\r\n' * 2)
+        self.reader.set_encoding(None)
+        self.assertEqual('\xc3\xa4', self.reply())
+        self.reader.set_encoding(u'utf-8')
+        self.assertEqual(u'\xe4', self.reply())
+
+    def test_gets_stream_array(self):
+        self.reader.feed('*3\r\n$1\r\na\r\n*2\r\n:1\r\n:2\r\n$1\r\nc\r\n+next\r\n')
+        self.assertEqual('a', self.reader.gets_stream())
+        self.assertEqual([1, 2], self.reader.gets_stream())
+        self.assertEqual('c', self.reader.gets_stream())
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+        self.assertEqual('next', self.reply())
+
+    def test_gets_stream_partial(self):
+        self.reader.feed('*2\r\n$3\r\nfoo\r\n$3\r\nba')
+        self.assertEqual('foo', self.reader.gets_stream())
+        self.assertFalse(self.reader.gets_stream())
+        self.reader.feed('r\r\n')
+        self.assertEqual('bar', self.reader.gets_stream())
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+        self.assertFalse(self.reader.gets_stream())
+
+    def test_gets_stream_does_not_keep_elements(self):
+        self.reader.feed('*2\r\n$3\r\nfoo\r\n')
+        self.assertEqual('foo', self.reader.gets_stream())
+        stack = self.reader._replyparser._stack
+        self.assertEqual(1, len(stack))
+        self.assertEqual([1, None], stack[0][:2])
+
+    def test_gets_stream_not_an_array(self):
+        self.reader.feed('$3\r\nfoo\r\n-err\r\n')
+        self.assertEqual('foo', self.reader.gets_stream())
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+        self.assertIsInstance(self.reader.gets_stream(), hiredis.ReplyError)
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+
+    def test_gets_stream_empty_and_null_array(self):
+        self.reader.feed('*0\r\n*-1\r\n')
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+        self.assertIs(STREAM_END, self.reader.gets_stream())
+        self.assertFalse(self.reader.gets_stream())
+
+
+class TestReadBuffer(TestCase):
+    def test_read_getline(self):
+        buf = ReadBuffer()
+        buf.write('+ok\r\n$5\r\nhello\r\n')
+        self.assertEqual(buf.getline(), '+ok')
+        self.assertEqual(buf.peek(), '$')
+        self.assertEqual(buf.read(1), '$')
+        self.assertEqual(buf.getline(), '5')
+        self.assertEqual(buf.read_exact(5, 2), 'hello')
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(buf.read(1), '')
+        self.assertEqual(buf.peek(), '')
+
+    def test_getline_partial(self):
+        buf = ReadBuffer()
+        buf.write('+ok\r')
+        self.assertIsNone(buf.getline())
+        buf.write('\n')
+        self.assertEqual(buf.getline(), '+ok')
+
+    def test_read_exact_partial(self):
+        buf = ReadBuffer()
+        buf.write('hello\r')
+        self.assertIsNone(buf.read_exact(5, 2))
+        buf.write('\n')
+        self.assertEqual(buf.read_exact(5, 2), 'hello')
+
+    def test_grow(self):
+        buf = ReadBuffer(size=4)
+        buf.write('x' * 10)
+        buf.write('y' * 10)
+        self.assertEqual(len(buf), 20)
+        self.assertEqual(buf.read(), 'x' * 10 + 'y' * 10)
+
+    def test_grow_below_threshold(self):
+        buf = ReadBuffer(size=8, compact_threshold=4)
+        buf.write('abcdefgh')
+        self.assertEqual(buf.read(2), 'ab')
+        buf.write('ij')
+        self.assertEqual(buf._rpos, 0)
+        self.assertEqual(len(buf._buf), 16)
+        self.assertEqual(buf.read(), 'cdefghij')
+
+    def test_compact_above_threshold(self):
+        buf = ReadBuffer(size=8, compact_threshold=4)
+        buf.write('abcdefgh')
+        self.assertEqual(buf.read(5), 'abcde')
+        buf.write('ij')
+        self.assertEqual(buf._rpos, 0)
+        self.assertEqual(len(buf._buf), 8)
+        self.assertEqual(buf.read(), 'fghij')
+
+    def test_reserve(self):
+        buf = ReadBuffer(size=8)
+        buf.write('abc')
+        buf.reserve(100)
+        self.assertGreaterEqual(len(buf._buf), 103)
+        self.assertEqual(buf.read(), 'abc')
+
+    def test_shrink_when_drained(self):
+        buf = ReadBuffer(size=8)
+        buf.reserve(BUFFER_SIZE_IDLE_MAX + 1)
+        buf.write('abc')
+        buf.read(3)
+        self.assertEqual(len(buf._buf), 8)
+
+    def test_recv_into(self):
+        def recv_into(view, length):
+            view[:5] = 'hello'
+            return 5
+        sock = Mock()
+        sock.recv_into.side_effect = recv_into
+        buf = ReadBuffer(size=2)
+        self.assertEqual(buf.recv_into(sock, 16), 5)
+        self.assertEqual(sock.recv_into.call_args[0][1], 16)
+        self.assertEqual(buf.read(), 'hello')
+
+    def test_reset_when_drained(self):
+        buf = ReadBuffer(size=8)
+        buf.write('abc')
+        buf.read(3)
+        self.assertEqual(buf._rpos, 0)
+        self.assertEqual(buf._wpos, 0)
+
 
 class TestWriter(TestCase):
     def test_encode_0_args(self):
@@ -281,6 +569,92 @@ class TestWriter(TestCase):
             expected)
 
 
+    def test_encode_big_member(self):
+        payload = u'x' * 2000
+        expected = '*2\r\n$4\r\nECHO\r\n$2000\r\n' + payload.encode() + '\r\n'
+        self.assertEqual(
+            writer(u'ECHO', payload),
+            expected)
+
+    def test_encode_cached_command(self):
+        expected = '*2\r\n$3\r\nGET\r\n$1\r\na\r\n'
+        self.assertEqual(writer(u'GET', u'a'), expected)
+        self.assertEqual(writer(u'GET', u'a'), expected)
+        self.assertEqual(writer('GET', u'a'), expected)
+        self.assertIn(u'GET', pyredis.protocol._COMMANDS)
+
+    def test_encode_numbers(self):
+        expected = '*4\r\n$4\r\nZADD\r\n$1\r\nz\r\n$3\r\n1.5\r\n$2\r\n42\r\n'
+        self.assertEqual(
+            writer(u'ZADD', u'z', 1.5, 42),
+            expected)
+
+    def test_encode_into(self):
+        buf = bytearray('+')
+        result = encode_into(buf, u'PING')
+        self.assertIs(result, buf)
+        self.assertEqual(buf, bytearray('+*1\r\n$4\r\nPING\r\n'))
+
+    def test_encode_parts_small(self):
+        self.assertEqual(encode_parts(u'SET', u'a', u'b'), [writer(u'SET', u'a', u'b')])
+
+    def test_encode_parts_big_member(self):
+        payload = 'x' * pyredis.protocol.SCATTER_THRESHOLD
+        chunks = encode_parts(u'SET', u'a', payload, u'EX', 10)
+        self.assertEqual(len(chunks), 3)
+        self.assertIs(chunks[1], payload)
+        self.assertEqual(''.join(chunks), writer(u'SET', u'a', payload, u'EX', 10))
+
+    def test_pack_commands(self):
+        commands = [(u'SET', u'a', 1), (u'GET', u'a'), (u'PING',)]
+        expected = ''.join([writer(*args) for args in commands])
+        result = pack_commands(commands)
+        self.assertIsInstance(result, bytearray)
+        self.assertEqual(result, bytearray(expected))
+
+    def test_pack_commands_into_buf(self):
+        buf = bytearray()
+        result = pack_commands([(u'PING',), (u'PING',)], buf)
+        self.assertIs(result, buf)
+        self.assertEqual(buf, bytearray(writer(u'PING') * 2))
+
+
+class TestNumericArray(TestCase):
+    def test_float(self):
+        result = numeric_array(['1.5', 2, u'3'], u'd')
+        self.assertEqual([1.5, 2.0, 3.0], list(result))
+        if pyredis.protocol.numpy:
+            self.assertEqual(pyredis.protocol.numpy.float64, result.dtype)
+        else:
+            self.assertEqual(u'd', result.typecode)
+
+    def test_int(self):
+        result = numeric_array(['1', 2, '-3'], u'q')
+        self.assertEqual([1, 2, -3], list(result))
+        self.assertEqual(8, result.itemsize)
+
+    def test_empty(self):
+        self.assertEqual([], list(numeric_array([], u'd')))
+
+    def test_not_numeric(self):
+        self.assertIsNone(numeric_array(['1', None], u'd'))
+        self.assertIsNone(numeric_array(['1.5'], u'q'))
+        self.assertIsNone(numeric_array(['1', ['2']], u'd'))
+        self.assertIsNone(numeric_array('1', u'd'))
+
+    def test_without_numpy(self):
+        with patch(u'pyredis.protocol.numpy', None):
+            result = numeric_array(['1', '2'], u'q')
+        self.assertEqual([1, 2], list(result))
+
+    def test_invalid_typecode(self):
+        self.assertRaises(ValueError, numeric_array, ['1'], u'x')
+
+    def test_decode_reply(self):
+        result = decode_reply(['\xc3\xa4', '\xff', 1, ['a'], {'k': 'v'}], u'utf-8')
+        self.assertEqual([u'\xe4', '\xff', 1, [u'a'], {u'k': u'v'}], result)
+
+
 class TestToBytes(TestCase):
     def test_int(self):
         expected = '512'
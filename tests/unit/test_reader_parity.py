@@ -0,0 +1,113 @@
+from __future__ import absolute_import
+from unittest import TestCase
+
+from pyredis.protocol import Reader as PythonReader
+from tests.unit.resp_corpus import CORPUS, CORPUS_INVALID_UTF8, CORPUS_UTF8, DECODE_ERROR, ERROR
+
+try:
+    from hiredis import Reader as HiredisReader
+except ImportError:
+    HiredisReader = None
+
+CHUNK_SIZES = (1, 2, 3, 7, 1500, None)
+
+
+def normalize(reply):
+    if isinstance(reply, Exception):
+        return ERROR, reply.args[0]
+    elif isinstance(reply, list):
+        return [normalize(item) for item in reply]
+    return reply
+
+
+class ReaderConformanceMixin(object):
+    reader_class = None
+    # index of the expected replies in CORPUS_INVALID_UTF8
+    invalid_utf8_expected = 2
+
+    def replies(self, payload, chunk_size, **kwargs):
+        reader = self.reader_class(**kwargs)
+        if not chunk_size:
+            chunk_size = len(payload)
+        replies = []
+        for pos in xrange(0, len(payload), chunk_size):
+            reader.feed(payload[pos:pos + chunk_size])
+            while True:
+                try:
+                    reply = reader.gets()
+                except UnicodeDecodeError:
+                    replies.append(DECODE_ERROR)
+                    continue
+                if reply is False:
+                    break
+                replies.append(normalize(reply))
+        return replies
+
+    def test_corpus(self):
+        for name, payload, expected in CORPUS:
+            for chunk_size in CHUNK_SIZES:
+                self.assertEqual(
+                    self.replies(payload, chunk_size), expected,
+                    u'{0} failed with chunk size {1}'.format(name, chunk_size)
+                )
+
+    def test_corpus_utf8(self):
+        for name, payload, expected in CORPUS_UTF8:
+            for chunk_size in CHUNK_SIZES:
+                replies = self.replies(payload, chunk_size, encoding=u'utf-8')
+                self.assertEqual(replies, expected, u'{0} failed with chunk size {1}'.format(name, chunk_size))
+
+    def test_corpus_invalid_utf8(self):
+        for entry in CORPUS_INVALID_UTF8:
+            name, payload, expected = entry[0], entry[1], entry[self.invalid_utf8_expected]
+            for chunk_size in CHUNK_SIZES:
+                replies = self.replies(payload, chunk_size, encoding=u'utf-8')
+                self.assertEqual(replies, expected, u'{0} failed with chunk size {1}'.format(name, chunk_size))
+
+    def test_feed_offset_length(self):
+        data = 'xx+ok\r\nyy'
+        reader = self.reader_class()
+        reader.feed(data, 2, 5)
+        self.assertEqual(reader.gets(), 'ok')
+        reader.feed('xx+okyy', 2)
+        reader.feed('\r\n', 0)
+        self.assertEqual(reader.gets(), 'okyy')
+        reader.feed('+a\r\n', 0, 4)
+        self.assertEqual(reader.gets(), 'a')
+
+    def test_feed_invalid_offset_length(self):
+        reader = self.reader_class()
+        for args in ((6,), (0, 6), (3, 3), (-1,), (0, -2)):
+            self.assertRaises(ValueError, reader.feed, '+ok\r\n', *args)
+
+    def test_feed_zero_length(self):
+        reader = self.reader_class()
+        reader.feed('+ok\r\n', 0, 0)
+        self.assertFalse(reader.gets())
+
+
+class TestPythonReaderConformance(ReaderConformanceMixin, TestCase):
+    reader_class = PythonReader
+
+
+class TestHiredisReaderConformance(ReaderConformanceMixin, TestCase):
+    reader_class = HiredisReader
+    invalid_utf8_expected = 3
+
+    def setUp(self):
+        if not HiredisReader:
+            self.skipTest(u'hiredis is not installed')
+
+
+class TestReaderParity(TestCase):
+    def setUp(self):
+        if not HiredisReader:
+            self.skipTest(u'hiredis is not installed')
+
+    def test_same_replies(self):
+        for name, payload, _ in CORPUS:
+            python = ReaderConformanceMixin()
+            python.reader_class = PythonReader
+            hiredis = ReaderConformanceMixin()
+            hiredis.reader_class = HiredisReader
+            self.assertEqual(python.replies(payload, 3), hiredis.replies(payload, 3), name)
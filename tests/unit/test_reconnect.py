@@ -0,0 +1,124 @@
+from __future__ import absolute_import
+from unittest import TestCase
+from unittest.mock import patch
+
+from pyredis.exceptions import *
+import pyredis.reconnect
+
+
+class TestReconnectPolicyUnit(TestCase):
+    def setUp(self):
+        self.addCleanup(patch.stopall)
+
+        sleep_patcher = patch(u'pyredis.reconnect.time.sleep', autospec=True)
+        self.sleep_mock = sleep_patcher.start()
+
+        time_patcher = patch(u'pyredis.reconnect.time.time', autospec=True)
+        self.time_mock = time_patcher.start()
+        self.time_mock.return_value = 1000
+
+        uniform_patcher = patch(u'pyredis.reconnect.random.uniform', autospec=True)
+        self.uniform_mock = uniform_patcher.start()
+        self.uniform_mock.side_effect = lambda low, high: high
+
+    def test_before_connect(self):
+        policy = pyredis.reconnect.ReconnectPolicy()
+        policy.before_connect(u'redis:6379')
+        self.assertFalse(self.sleep_mock.called)
+
+    def test_before_connect_reconnect(self):
+        policy = pyredis.reconnect.ReconnectPolicy(base_delay=0.1)
+        policy.before_connect(u'redis:6379', reconnect=True)
+        self.sleep_mock.assert_called_with(0.1)
+        self.uniform_mock.assert_called_with(0, 0.1)
+
+    def test_before_connect_backoff(self):
+        policy = pyredis.reconnect.ReconnectPolicy(base_delay=0.1, max_delay=0.5)
+        delays = []
+        for _ in xrange(4):
+            policy.connect_failed(u'redis:6379')
+            policy.before_connect(u'redis:6379')
+            delays.append(self.sleep_mock.call_args[0][0])
+        self.assertEqual(delays, [0.2, 0.4, 0.5, 0.5])
+
+    def test_before_connect_per_endpoint(self):
+        policy = pyredis.reconnect.ReconnectPolicy()
+        policy.connect_failed(u'redis:6379')
+        policy.before_connect(u'other:6379')
+        self.assertFalse(self.sleep_mock.called)
+
+    def test_connect_succeeded(self):
+        policy = pyredis.reconnect.ReconnectPolicy()
+        policy.connect_failed(u'redis:6379')
+        policy.connect_succeeded(u'redis:6379')
+        policy.before_connect(u'redis:6379')
+        self.assertFalse(self.sleep_mock.called)
+
+    def test_delay_large_failures(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_delay=5)
+        self.assertEqual(policy.delay(100000), 5)
+
+    def test_circuit_open(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_attempts=2, reset_timeout=10)
+        policy.connect_failed(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_CLOSED)
+        policy.connect_failed(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_OPEN)
+        self.assertRaises(PyRedisCircuitOpen, policy.before_connect, u'redis:6379')
+        self.assertFalse(self.sleep_mock.called)
+
+    def test_circuit_half_open(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_attempts=1, reset_timeout=10)
+        policy.connect_failed(u'redis:6379')
+        self.time_mock.return_value = 1010
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_HALF_OPEN)
+        policy.before_connect(u'redis:6379')
+        self.assertFalse(self.sleep_mock.called)
+        # only a single trial connect is let through
+        self.assertRaises(PyRedisCircuitOpen, policy.before_connect, u'redis:6379')
+
+    def test_circuit_half_open_failed(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_attempts=1, reset_timeout=10)
+        policy.connect_failed(u'redis:6379')
+        self.time_mock.return_value = 1010
+        policy.before_connect(u'redis:6379')
+        policy.connect_failed(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_OPEN)
+        self.time_mock.return_value = 1019
+        self.assertRaises(PyRedisCircuitOpen, policy.before_connect, u'redis:6379')
+
+    def test_circuit_half_open_succeeded(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_attempts=1, reset_timeout=10)
+        policy.connect_failed(u'redis:6379')
+        self.time_mock.return_value = 1010
+        policy.before_connect(u'redis:6379')
+        policy.connect_succeeded(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_CLOSED)
+        policy.before_connect(u'redis:6379')
+
+    def test_circuit_never_opens(self):
+        policy = pyredis.reconnect.ReconnectPolicy()
+        for _ in xrange(100):
+            policy.connect_failed(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_CLOSED)
+
+    def test_reset(self):
+        policy = pyredis.reconnect.ReconnectPolicy(max_attempts=1)
+        policy.connect_failed(u'redis:6379')
+        policy.connect_failed(u'other:6379')
+        policy.reset(u'redis:6379')
+        self.assertEqual(policy.state(u'redis:6379'), pyredis.reconnect.CIRCUIT_CLOSED)
+        self.assertEqual(policy.state(u'other:6379'), pyredis.reconnect.CIRCUIT_OPEN)
+        policy.reset()
+        self.assertEqual(policy.state(u'other:6379'), pyredis.reconnect.CIRCUIT_CLOSED)
+
+    def test_should_retry(self):
+        policy = pyredis.reconnect.ReconnectPolicy(retries=2)
+        self.assertTrue(policy.should_retry(u'GET', 1))
+        self.assertTrue(policy.should_retry(u'get', 2))
+        self.assertFalse(policy.should_retry(u'GET', 3))
+        self.assertFalse(policy.should_retry(u'INCR', 1))
+
+    def test_should_retry_default(self):
+        policy = pyredis.reconnect.ReconnectPolicy()
+        self.assertFalse(policy.should_retry(u'GET', 1))
@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+from unittest import TestCase
+from unittest.mock import patch
+
+import pyredis.resolver
+import socket
+import threading
+
+V4_A = (socket.AF_INET, socket.SOCK_STREAM, 6, u'', (u'10.0.0.1', 6379))
+V4_B = (socket.AF_INET, socket.SOCK_STREAM, 6, u'', (u'10.0.0.2', 6379))
+V6_A = (socket.AF_INET6, socket.SOCK_STREAM, 6, u'', (u'fd00::1', 6379, 0, 0))
+V6_B = (socket.AF_INET6, socket.SOCK_STREAM, 6, u'', (u'fd00::2', 6379, 0, 0))
+
+
+class TestInterleave(TestCase):
+    def test_interleave(self):
+        self.assertEqual(
+            pyredis.resolver.interleave([V6_A, V6_B, V4_A, V4_B]),
+            [V6_A, V4_A, V6_B, V4_B]
+        )
+
+    def test_interleave_first_family_first(self):
+        self.assertEqual(
+            pyredis.resolver.interleave([V4_A, V6_A, V6_B]),
+            [V4_A, V6_A, V6_B]
+        )
+
+    def test_interleave_duplicates(self):
+        self.assertEqual(pyredis.resolver.interleave([V4_A, V4_A, V6_A]), [V4_A, V6_A])
+
+    def test_interleave_empty(self):
+        self.assertEqual(pyredis.resolver.interleave([]), [])
+
+
+class TestResolverUnit(TestCase):
+    def setUp(self):
+        self.addCleanup(patch.stopall)
+
+        getaddrinfo_patcher = patch(u'pyredis.resolver.socket.getaddrinfo', autospec=True)
+        self.getaddrinfo_mock = getaddrinfo_patcher.start()
+        self.getaddrinfo_mock.return_value = [V6_A, V4_A]
+
+        time_patcher = patch(u'pyredis.resolver.time.time', autospec=True)
+        self.time_mock = time_patcher.start()
+        self.time_mock.return_value = 1000
+
+    def test_resolve(self):
+        resolver = pyredis.resolver.Resolver()
+        self.assertEqual(resolver.resolve(u'redis', 6379), [V6_A, V4_A])
+        self.getaddrinfo_mock.assert_called_once_with(u'redis', 6379, 0, socket.SOCK_STREAM)
+
+    def test_resolve_cached(self):
+        resolver = pyredis.resolver.Resolver(ttl=10)
+        resolver.resolve(u'redis', 6379)
+        self.time_mock.return_value = 1009
+        self.assertEqual(resolver.resolve(u'redis', 6379), [V6_A, V4_A])
+        self.assertEqual(self.getaddrinfo_mock.call_count, 1)
+
+    def test_resolve_expired(self):
+        resolver = pyredis.resolver.Resolver(ttl=10)
+        resolver.resolve(u'redis', 6379)
+        self.time_mock.return_value = 1010
+        resolver.resolve(u'redis', 6379)
+        self.assertEqual(self.getaddrinfo_mock.call_count, 2)
+
+    def test_resolve_ttl_0(self):
+        resolver = pyredis.resolver.Resolver(ttl=0)
+        resolver.resolve(u'redis', 6379)
+        resolver.resolve(u'redis', 6379)
+        self.assertEqual(self.getaddrinfo_mock.call_count, 2)
+
+    def test_resolve_per_host_and_port(self):
+        resolver = pyredis.resolver.Resolver()
+        resolver.resolve(u'redis', 6379)
+        resolver.resolve(u'redis', 6380)
+        resolver.resolve(u'other', 6379)
+        self.assertEqual(self.getaddrinfo_mock.call_count, 3)
+
+    def test_resolve_gaierror(self):
+        self.getaddrinfo_mock.side_effect = socket.gaierror
+        resolver = pyredis.resolver.Resolver()
+        self.assertRaises(socket.gaierror, resolver.resolve, u'blarg', 6379)
+
+    def test_resolve_lookups_dropped(self):
+        resolver = pyredis.resolver.Resolver()
+        resolver.resolve(u'redis', 6379)
+        self.getaddrinfo_mock.side_effect = socket.gaierror
+        self.assertRaises(socket.gaierror, resolver.resolve, u'blarg', 6379)
+        self.assertEqual(resolver._lookups, {})
+
+    def test_resolve_concurrent(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def getaddrinfo(*args):
+            started.set()
+            release.wait(5)
+            return [V4_A]
+        self.getaddrinfo_mock.side_effect = getaddrinfo
+        resolver = pyredis.resolver.Resolver()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve(u'redis', 6379)))
+                   for _ in xrange(2)]
+        threads[0].start()
+        started.wait(5)
+        threads[1].start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [[V4_A], [V4_A]])
+        self.assertEqual(self.getaddrinfo_mock.call_count, 1)
+        self.assertEqual(resolver._lookups, {})
+
+    def test_invalidate(self):
+        resolver = pyredis.resolver.Resolver()
+        resolver.resolve(u'redis', 6379)
+        resolver.invalidate(u'redis', 6379)
+        resolver.resolve(u'redis', 6379)
+        self.assertEqual(self.getaddrinfo_mock.call_count, 2)
+
+    def test_clear(self):
+        resolver = pyredis.resolver.Resolver()
+        resolver.resolve(u'redis', 6379)
+        resolver.clear()
+        resolver.resolve(u'redis', 6379)
+        self.assertEqual(self.getaddrinfo_mock.call_count, 2)
+
+    def test_prefer(self):
+        self.getaddrinfo_mock.return_value = [V6_A, V6_B, V4_A, V4_B]
+        resolver = pyredis.resolver.Resolver()
+        resolver.resolve(u'redis', 6379)
+        resolver.prefer(u'redis', 6379, V4_A[4])
+        self.assertEqual(resolver.resolve(u'redis', 6379), [V4_A, V6_A, V4_B, V6_B])
+        self.assertEqual(self.getaddrinfo_mock.call_count, 1)
+
+    def test_prefer_not_cached(self):
+        resolver = pyredis.resolver.Resolver()
+        resolver.prefer(u'redis', 6379, V4_A[4])
+        resolver.resolve(u'redis', 6379)
+        self.assertEqual(resolver.resolve(u'redis', 6379), [V6_A, V4_A])